@@ -7,6 +7,13 @@
 # - Import attachments from Lastpass to Bitwarden using lpass CLI and Vault Management API 
 #   - Import personal folders only, shared only, or all folders.
 #   - The script will perform search based on item name. If multiple results returned, the script will choose the first item.
+# v0.4
+# - Index all Bitwarden items by name and folder from a single `bw list items` instead of searching per item.
+#   If several items share a name, the one in the matching folder/collection is chosen.
+# - Download attachments across a pool of workers (-w, default 4). Uploads run one at a time,
+#   as concurrent `bw` processes would share the CLI's unlocked data.json.
+# - Record every uploaded attachment in a journal (-j, default attachments-journal.jsonl).
+#   Re-running the script skips attachments already in the journal.
 
 
 # External module required: 
@@ -31,8 +38,10 @@ import configparser
 import os.path
 import os
 import re
-from subprocess import Popen, PIPE
 import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 #TODO: Automatic run of CLI and bw serve?
 bw_vault_uri = ""
@@ -53,6 +62,10 @@ verbose = False
 add_group_if_not_exists = True
 lpass_path = ""
 bw_path = ""
+max_workers = 4
+journal_path = "attachments-journal.jsonl"
+journal_lock = threading.Lock()
+bw_cli_lock = threading.Lock()  # The bw CLI doesn't lock its data.json, so only one bw command runs at a time
 
 def find_program_path(f_name):
     # Check if 'bw' file exists in the same directory as the script
@@ -74,79 +87,104 @@ def find_program_path(f_name):
 
     return ""
 
-def add_attachment_to_bw_cli(item_id, attach_name):
-    print("Adding attachemnt to BW, item id:", item_id, "Name:", attach_name)
-    try:        
-        subprocess.run([bw_path, 'create', 'attachment', '--itemid',item_id,'--file',attach_name,"--quiet"])
-    except subprocess.CalledProcessError as e:
-        print(f"There is an issue uploading the attachement {attach_name} Exit code: {e.returncode}\nError: {e.stderr}")
-        exit(1)
-
-def search_item_cli(item_name):
-
-    output = subprocess.check_output([bw_path, 'list', 'items', '--search', item_name])
-
-    output_str = output.decode('utf-8')
-    data = json.loads(output_str)
-
-    if (debug):
-        print("** Item Search Result from CLI:")
-        print("** Item data: ", data,"\n")
-    return data
-
-def check_import_attachments(item_id, item_name):
-    if (debug): print("Processing Item:",item_name)
-    pipe = Popen('lpass show '+item_id, shell=True, stdout=PIPE)
-    bw_item_id = ""
-    for line in pipe.stdout:
-        line_str = line.decode('utf-8').strip() 
-        if line_str.find("att-") == 0:
-            if (debug): print("Line:",line_str)
-            if bw_item_id == "":
-                #first attachment, get item ID in BW
-                item_search_result = search_item_cli(item_name)
-                
-                if len(item_search_result)>0:
-                    for item_found in item_search_result:
-                        if (debug): print("processing search result:", item_found)
-                        if item_name == item_found['name']:
-                            bw_item_id = item_found['id']
-                            print("Item found in BW, Item ID:",bw_item_id)
-                            break
-                else:
-                    print("Item is not found in Bitwarden. Item:",item_name," skipped")
-                    break
-
-            if not bw_item_id == "":
-                re_result = re.search(r"(.+):\s(.+)$",line_str.strip())
-                attach_id = re_result.group(1).strip()
-                attach_name = re_result.group(2).strip()
-                pipe = Popen(f'echo "S" | {lpass_path} show --attach '+attach_id+" "+item_id, shell=True, stdout=PIPE)
-                #(output, err) = pipe.communicate()
-                p_status = pipe.wait()
-                if p_status == 0:
-                    print("Success!")
-                    add_attachment_to_bw_cli(bw_item_id, attach_name)
-                    os.remove(attach_name)
-                    #shall we check whether removal is successful?
-                else:
-                    print("Downloading attachmend failed! Name:",attach_name)
-
-    return 0
-
-def import_attachments(source):
-
-
-    pipe = Popen(f'{lpass_path} ls --color=never', shell=True, stdout=PIPE)
-    
-    for line in pipe.stdout:
-        #print("Line:",line.decode('utf-8').strip())
+def add_attachment_to_bw_cli(item_id, attach_path):
+    attach_name = os.path.basename(attach_path)
+    with bw_cli_lock:
+        print("Adding attachment to BW, item id:", item_id, "Name:", attach_name)
+        result = subprocess.run([bw_path, 'create', 'attachment', '--itemid', item_id, '--file', attach_path],
+                                capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"There is an issue uploading the attachment {attach_name} Exit code: {result.returncode}\nError: {result.stderr}")
+        return None
+
+    # The CLI returns the updated item; the new attachment is the last one with this file name
+    bw_attach_id = ""
+    try:
+        for attachment in json.loads(result.stdout).get('attachments') or []:
+            if attachment.get('fileName') == attach_name:
+                bw_attach_id = attachment.get('id', "")
+    except json.JSONDecodeError:
+        pass
+    return bw_attach_id
+
+def load_journal():
+    # Returns {(lastpass item id, lastpass attachment id): bitwarden attachment id}
+    completed = {}
+    if not os.path.exists(journal_path):
+        return completed
+
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    for line in content.splitlines():
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # Partially written line from an interrupted run
+        completed[(entry['lp_item_id'], entry['lp_attach_id'])] = entry['bw_attach_id']
+
+    if content and not content.endswith("\n"):
+        with open(journal_path, 'a', encoding='utf-8') as f:
+            f.write("\n")
+    return completed
+
+def record_in_journal(item_id, attach_id, attach_name, bw_item_id, bw_attach_id):
+    entry = {
+        "lp_item_id": item_id,
+        "lp_attach_id": attach_id,
+        "name": attach_name,
+        "bw_item_id": bw_item_id,
+        "bw_attach_id": bw_attach_id,
+    }
+    with journal_lock:
+        with open(journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+def bw_list(object_type):
+    output = subprocess.check_output([bw_path, 'list', object_type])
+    return json.loads(output.decode('utf-8'))
+
+def build_bw_item_index():
+    # One `bw list items` for the whole vault, indexed by item name.
+    # Each entry keeps the names of the folder and collections the item is in.
+    folders = {f['id']: f['name'] for f in bw_list('folders') if f.get('id')}
+    collections = {c['id']: c['name'] for c in bw_list('collections')}
+
+    index = {}
+    for item in bw_list('items'):
+        containers = set()
+        if item.get('folderId') in folders:
+            containers.add(folders[item['folderId']])
+        for collection_id in item.get('collectionIds') or []:
+            if collection_id in collections:
+                containers.add(collections[collection_id])
+        index.setdefault(item['name'], []).append((item['id'], containers))
+
+    if (debug): print("** Indexed", sum(len(v) for v in index.values()), "Bitwarden items")
+    return index
+
+def find_bw_item(bw_index, item_name, folder):
+    candidates = bw_index.get(item_name, [])
+    if not candidates:
+        return ""
+    # Prefer the item in the same folder/collection, otherwise take the first one
+    for bw_item_id, containers in candidates:
+        if folder in containers or "Shared-" + folder in containers:
+            return bw_item_id
+    return candidates[0][0]
+
+def list_lp_items(source):
+    output = subprocess.check_output([lpass_path, 'ls', '--color=never'])
+
+    lp_items = []
+    for line in output.decode('utf-8').splitlines():
         folder_and_name = item_id = folder = item_name =""
-        re_result = re.search(r"(.+)\[id:\s(\d+)\]",line.decode('utf-8').strip())
+        re_result = re.search(r"(.+)\[id:\s(\d+)\]",line.strip())
         if re_result:
             folder_and_name = re_result.group(1)
             item_id = re_result.group(2)
-        
+
         shared = False
         if folder_and_name.find("Shared-") == 0:
             shared=True
@@ -154,18 +192,85 @@ def import_attachments(source):
 
         re_result = re.search(r"(.+)/(.+)?$",folder_and_name)
         if re_result:
-            #folder = re_result.group(1)
+            folder = re_result.group(1)
             item_name = re_result.group(2).strip()
 
         if not item_name.strip() == "":
-            if source == "all":
-                check_import_attachments(item_id, item_name)
-            elif source == "shared" and shared:
-                check_import_attachments(item_id, item_name)
-            elif source == "personal" and not shared:
-                check_import_attachments(item_id, item_name)
+            if source == "all" or (source == "shared" and shared) or (source == "personal" and not shared):
+                lp_items.append((item_id, folder, item_name))
+
+    return lp_items
+
+def list_lp_attachments(item_id):
+    result = subprocess.run([lpass_path, 'show', item_id], capture_output=True, text=True)
+    attachments = []
+    for line in result.stdout.splitlines():
+        line_str = line.strip()
+        if line_str.find("att-") == 0:
+            if (debug): print("Line:",line_str)
+            re_result = re.search(r"(.+):\s(.+)$",line_str)
+            attachments.append((re_result.group(1).strip(), re_result.group(2).strip()))
+    return attachments
+
+def migrate_attachment(item_id, bw_item_id, attach_id, attach_name):
+    # Each download gets its own directory so attachments with the same name don't collide
+    with tempfile.TemporaryDirectory() as work_dir:
+        result = subprocess.run([lpass_path, 'show', '--attach', attach_id, item_id],
+                                input=b"S\n", cwd=work_dir, capture_output=True)
+        if result.returncode != 0:
+            print("Downloading attachment failed! Name:",attach_name)
+            return False
+        if (debug): print("Downloaded attachment:", attach_name)
+        bw_attach_id = add_attachment_to_bw_cli(bw_item_id, os.path.join(work_dir, attach_name))
+
+    if bw_attach_id is None:
+        return False
+    record_in_journal(item_id, attach_id, attach_name, bw_item_id, bw_attach_id)
+    return True
+
+def import_attachments(source):
+    completed = load_journal()
+    if completed:
+        print("Journal", journal_path, "has", len(completed), "attachments already uploaded. These will be skipped.")
+
+    print("Building Bitwarden item index...")
+    bw_index = build_bw_item_index()
+    lp_items = list_lp_items(source)
+    print("Checking", len(lp_items), "LastPass items for attachments...")
+
+    # Listing attachments and transferring them run in separate pools,
+    # so downloads and uploads start while the remaining items are still being checked
+    uploaded = failed = skipped = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as list_executor, \
+            ThreadPoolExecutor(max_workers=max_workers) as transfer_executor:
+        listings = list_executor.map(list_lp_attachments, [item_id for item_id, _, _ in lp_items])
+
+        transfers = []
+        for (item_id, folder, item_name), attachments in zip(lp_items, listings):
+            if not attachments:
+                continue
+            if (debug): print("Processing Item:",item_name)
+
+            bw_item_id = find_bw_item(bw_index, item_name, folder)
+            if bw_item_id == "":
+                print("Item is not found in Bitwarden. Item:",item_name," skipped")
+                continue
+            print("Item found in BW, Item ID:",bw_item_id)
+
+            for attach_id, attach_name in attachments:
+                if (item_id, attach_id) in completed:
+                    if (debug): print("Already uploaded, skipping:", attach_name)
+                    skipped += 1
+                    continue
+                transfers.append(transfer_executor.submit(migrate_attachment, item_id, bw_item_id, attach_id, attach_name))
+
+        for future in as_completed(transfers):
+            if future.result():
+                uploaded += 1
+            else:
+                failed += 1
 
- 
+    print("Attachments uploaded:", uploaded, "skipped:", skipped, "failed:", failed)
 
 def print_help():
     print("usage: bwLPmigration.py <options>")
@@ -174,6 +279,8 @@ def print_help():
     sys.stdout.write("%-18s %-50s\n" % ("-h, --help","Display help for commands "))
     sys.stdout.write("%-18s %-50s\n" % ("-c","The commands. See below for command list"))
     sys.stdout.write("%-18s %-50s\n" % ("-f, --config","File contains BW and LP configurations. Default: config.cfg"))
+    sys.stdout.write("%-18s %-50s\n" % ("-w, --workers","Number of parallel attachment downloads. Default: 4"))
+    sys.stdout.write("%-18s %-50s\n" % ("-j, --journal","Journal of uploaded attachments, used to resume. Default: attachments-journal.jsonl"))
     sys.stdout.write("%-18s %-50s\n" % ("-v","Verbose Output"))
     sys.stdout.write("%-18s %-50s\n" % ("-d","Debug Output"))
     print("")
@@ -220,11 +327,13 @@ def main(argv):
     global debug
     global lpass_path
     global bw_path
+    global max_workers
+    global journal_path
     lpass_path = find_program_path("lpass")
     bw_path = find_program_path("bw")
     
     try:
-        opts, args = getopt.getopt(argv,"hvdc:f:",["help","config="])
+        opts, args = getopt.getopt(argv,"hvdc:f:w:j:",["help","config=","workers=","journal="])
     except getopt.GetoptError:
         print("Invalid options!")   
         print_help()
@@ -237,6 +346,10 @@ def main(argv):
             configfile = arg
         elif opt == "-c":
             command = arg
+        elif opt in ("-w", "--workers"):
+            max_workers = int(arg)
+        elif opt in ("-j", "--journal"):
+            journal_path = arg
         elif opt == "-v":
             verbose = True
         elif opt == "-d":
@@ -0,0 +1,193 @@
+# Batch version of add_item_to_collection.py: assigns many existing items to collections in one run.
+#
+# The mapping file lists which collection(s) each item should be in. Items and collections can be
+# given by ID or by exact name.
+#   CSV:  item,collection            (one pair per row, or several collections separated by ';')
+#   JSON: {"item": ["collection", ...], ...}
+#
+# All items and collections are loaded once, the needed changes are worked out up front, and only
+# items that are missing a collection are updated. Updates go through one `bw serve` process
+# (https://bitwarden.com/help/cli/#serve) from a pool of workers, instead of spawning
+# `bw get` / `bw encode` / `bw edit` for every item.
+#
+# Usage:
+#   python3 add_items_to_collections.py mapping.csv --dry-run
+#   python3 add_items_to_collections.py mapping.json --workers 8
+#   python3 add_items_to_collections.py mapping.csv --replace   # Items end up in exactly the listed collections
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from variables import bw_path, org_id
+
+DEFAULT_PORT = 8087
+DEFAULT_WORKERS = 8
+
+http = requests.Session()
+
+
+# Read the mapping file as {item ID or name: [collection IDs or names]}
+def load_mapping(path):
+  mapping = {}
+  if path.lower().endswith(".json"):
+    with open(path, "r") as file:
+      for item, collections in json.load(file).items():
+        mapping.setdefault(item, []).extend([collections] if isinstance(collections, str) else collections)
+    return mapping
+
+  with open(path, "r", newline="") as file:
+    for row in csv.reader(file):
+      if len(row) < 2 or row[0].strip().lower() == "item":
+        continue
+      collections = [c.strip() for c in row[1].split(";") if c.strip()]
+      mapping.setdefault(row[0].strip(), []).extend(collections)
+  return mapping
+
+
+# Resolve IDs or names to IDs using one {id: name} index; names must be unique
+def resolve(keys, objects, kind):
+  ids_by_name = {}
+  for object_id, name in objects.items():
+    ids_by_name.setdefault(name, []).append(object_id)
+
+  resolved = {}
+  for key in keys:
+    if key in objects:
+      resolved[key] = key
+    elif len(ids_by_name.get(key, [])) == 1:
+      resolved[key] = ids_by_name[key][0]
+    elif key in ids_by_name:
+      print(f"Skipping {kind} '{key}': {len(ids_by_name[key])} {kind}s have this name, use the ID instead")
+    else:
+      print(f"Skipping {kind} '{key}': not found")
+  return resolved
+
+
+def start_serve(port):
+  # Reuse a server that is already running, otherwise start one with the session key
+  url = f"http://localhost:{port}"
+  try:
+    http.get(f"{url}/status", timeout=2)
+    return url, None
+  except requests.RequestException:
+    pass
+
+  from authentication import session_key
+  process = subprocess.Popen(
+    bw_path + ["serve", "--port", str(port)],
+    env={**os.environ, "BW_SESSION": session_key},
+    stdout=subprocess.DEVNULL,
+    stderr=subprocess.DEVNULL
+  )
+  for _ in range(240):
+    if process.poll() is not None:
+      sys.exit("bw serve exited unexpectedly")
+    try:
+      http.get(f"{url}/status", timeout=2)
+      return url, process
+    except requests.RequestException:
+      time.sleep(0.25)
+  process.kill()
+  sys.exit("bw serve did not start")
+
+
+def serve_list(url, object_type):
+  result = http.get(f"{url}/list/object/{object_type}", params={"organizationId": org_id}).json()
+  if not result.get("success"):
+    sys.exit(f"Unable to list {object_type}: {result.get('message')}")
+  return result["data"]["data"]
+
+
+# https://bitwarden.com/help/vault-management-api/ - edit the collections of an item
+def set_item_collections(url, item_id, collection_ids):
+  result = http.put(
+    f"{url}/object/item-collections/{item_id}",
+    params={"organizationId": org_id},
+    json=collection_ids
+  ).json()
+  if not result.get("success"):
+    raise RuntimeError(result.get("message"))
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Assign many items to collections from a CSV or JSON mapping")
+  parser.add_argument("mapping", help="CSV (item,collection) or JSON ({item: [collections]}) mapping file")
+  parser.add_argument("--replace", action="store_true", help="Set each item's collections to exactly the listed ones instead of adding")
+  parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Concurrent updates (default: {DEFAULT_WORKERS})")
+  parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"bw serve port (default: {DEFAULT_PORT})")
+  parser.add_argument("--dry-run", action="store_true", help="Only show what would change")
+  args = parser.parse_args()
+
+  mapping = load_mapping(args.mapping)
+  url, serve_process = start_serve(args.port)
+  http.mount(url, HTTPAdapter(pool_maxsize=args.workers))
+
+  try:
+    # Load all items and collections once
+    items = {item["id"]: item for item in serve_list(url, "items")}
+    collections = {collection["id"]: collection["name"] for collection in serve_list(url, "collections")}
+
+    item_ids = resolve(mapping.keys(), {item_id: item["name"] for item_id, item in items.items()}, "item")
+    collection_ids = resolve({c for cs in mapping.values() for c in cs}, collections, "collection")
+
+    # Work out the new collection list of every item that needs a change
+    wanted = {}
+    unresolved = set()
+    for key, item_id in item_ids.items():
+      wanted.setdefault(item_id, set()).update(collection_ids[c] for c in mapping[key] if c in collection_ids)
+      if any(c not in collection_ids for c in mapping[key]):
+        unresolved.add(item_id)
+
+    # Replacing with only the collections that resolved would take items out of the ones that didn't
+    if args.replace:
+      for item_id in unresolved:
+        print(f"Skipping item '{items[item_id]['name']}': --replace needs every listed collection to resolve")
+        del wanted[item_id]
+
+    changes = {}
+    for item_id, collection_set in wanted.items():
+      current = set(items[item_id].get("collectionIds") or [])
+      if args.replace:
+        # Collections this account can't list can't be named in the mapping, so leave them as they are
+        target = collection_set | {c for c in current if c not in collections}
+      else:
+        target = current | collection_set
+      if target != current:
+        changes[item_id] = sorted(target)
+
+    print(f"{len(changes)} of {len(wanted)} items need collection changes")
+    if args.dry_run:
+      for item_id, target in changes.items():
+        print(f"  {items[item_id]['name']}: {', '.join(collections.get(c, c) for c in target)}")
+      return
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+      futures = {executor.submit(set_item_collections, url, item_id, target): item_id for item_id, target in changes.items()}
+      for done, future in enumerate(as_completed(futures), 1):
+        name = items[futures[future]]["name"]
+        try:
+          future.result()
+          print(f"[{done}/{len(changes)}] Updated {name}")
+        except Exception as e:
+          failed += 1
+          print(f"[{done}/{len(changes)}] Error updating {name}: {e}")
+
+    print(f"Done: {len(changes) - failed} updated, {failed} failed, {len(wanted) - len(changes)} already correct"
+          + (f", {len(unresolved)} skipped" if args.replace and unresolved else ""))
+  finally:
+    if serve_process is not None:
+      serve_process.kill()
+
+
+if __name__ == "__main__":
+  main()
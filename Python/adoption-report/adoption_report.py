@@ -9,6 +9,8 @@ Usage:
     python adoption_report.py                                    # interactive setup
     python adoption_report.py --region us|eu --days 90          # non-interactive
     python adoption_report.py --region self-hosted --server-url https://bw.example.com
+    python adoption_report.py --region us --days 90 --store rollups.sqlite   # incremental
+    python adoption_report.py --orgs orgs.json --store rollups/              # many organisations
 
 Credentials (BW_CLIENT_ID / BW_CLIENT_SECRET) are read from environment variables
 or a .env file. If either is missing the script launches an interactive wizard that
@@ -22,10 +24,16 @@ from __future__ import annotations
 import argparse
 import csv
 import getpass
+import hashlib
+import json
 import os
+import re
+import sqlite3
 import sys
 import threading
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -237,6 +245,15 @@ POLICY_TYPES: dict[int, str] = {
     19: "Block Claimed Domain Account Creation",
 }
 
+# Batch mode defaults
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 10  # API requests per second across all organisations
+
+# Retries for throttled (429), failed (5xx) and dropped requests
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 6
+MAX_RETRY_DELAY = 60  # seconds
+
 REGION_URLS: dict[str, dict[str, str]] = {
     "us": {
         "api": "https://api.bitwarden.com",
@@ -253,19 +270,77 @@ REGION_URLS: dict[str, dict[str, str]] = {
 # Bitwarden API client
 # ---------------------------------------------------------------------------
 
+class APIError(Exception):
+    """A Bitwarden API call failed; the message is ready to show to the user."""
+
+
+class RateLimiter:
+    """Spaces out calls so that at most `rate` start per second, shared between threads."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.lock = threading.Lock()
+        self.next_time = time.monotonic()
+
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
 class BitwardenClient:
-    def __init__(self, api_url: str, identity_url: str, client_id: str, client_secret: str) -> None:
+    def __init__(
+        self,
+        api_url: str,
+        identity_url: str,
+        client_id: str,
+        client_secret: str,
+        limiter: Optional[RateLimiter] = None,
+        quiet: bool = False,
+    ) -> None:
         self.api_base = api_url.rstrip("/")
         self.identity_base = identity_url.rstrip("/")
         self.client_id = client_id
         self.client_secret = client_secret
+        self.limiter = limiter
+        self.quiet = quiet  # no inline progress output (used when several orgs run at once)
         self._token: Optional[str] = None
+        self.session = requests.Session()  # pooled connections
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying 429/5xx responses and connection errors with exponential backoff
+        (or the server's Retry-After). Every attempt, retries included, waits for the rate limiter.
+        """
+        attempt = 0
+        while True:
+            if self.limiter:
+                self.limiter.wait()
+            attempt += 1
+            delay = 2 ** (attempt - 1)
+            try:
+                resp = self.session.request(method, url, timeout=30, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == MAX_ATTEMPTS:
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUSES or attempt == MAX_ATTEMPTS:
+                    return resp
+                try:
+                    delay = max(float(resp.headers.get("Retry-After", "")), 0)
+                except ValueError:
+                    pass
+            time.sleep(min(delay, MAX_RETRY_DELAY))
 
     def authenticate(self) -> None:
         """Obtain an OAuth2 Bearer token via the client credentials flow."""
         url = f"{self.identity_base}/connect/token"
         try:
-            resp = requests.post(
+            resp = self._request(
+                "POST",
                 url,
                 data={
                     "grant_type": "client_credentials",
@@ -273,52 +348,38 @@ class BitwardenClient:
                     "client_id": self.client_id,
                     "client_secret": self.client_secret,
                 },
-                timeout=30,
             )
         except requests.RequestException as exc:
-            print(f"{C.RED}ERROR:{C.RESET} Could not reach identity server — {exc}", file=sys.stderr)
-            sys.exit(1)
+            raise APIError(f"Could not reach identity server — {exc}") from exc
 
         if resp.status_code != 200:
             try:
                 msg = resp.json().get("error_description", resp.text)
             except Exception:
                 msg = resp.text
-            print(f"{C.RED}ERROR:{C.RESET} Authentication failed ({resp.status_code}) — {msg}", file=sys.stderr)
-            sys.exit(1)
+            raise APIError(f"Authentication failed ({resp.status_code}) — {msg}")
 
         token = resp.json().get("access_token")
         if not token:
-            print(
-                f"{C.RED}ERROR:{C.RESET} Authentication succeeded but no access_token in response.",
-                file=sys.stderr,
-            )
-            sys.exit(1)
+            raise APIError("Authentication succeeded but no access_token in response.")
         self._token = token
 
     def _get(self, path: str, params: Optional[dict] = None) -> dict:
-        """Make an authenticated GET request; exit with a clear message on failure."""
+        """Make an authenticated GET request; raise APIError with a clear message on failure."""
         headers = {"Authorization": f"Bearer {self._token}"}
         url = f"{self.api_base}{path}"
         try:
-            resp = requests.get(url, headers=headers, params=params, timeout=30)
+            resp = self._request("GET", url, headers=headers, params=params)
         except requests.RequestException as exc:
-            print(f"{C.RED}ERROR:{C.RESET} Request to {path} failed — {exc}", file=sys.stderr)
-            sys.exit(1)
+            raise APIError(f"Request to {path} failed — {exc}") from exc
 
         if resp.status_code == 401:
-            print(
-                f"{C.RED}ERROR:{C.RESET} 401 Unauthorized. Your token may have expired or "
-                "the client lacks organisation API access.",
-                file=sys.stderr,
+            raise APIError(
+                "401 Unauthorized. Your token may have expired or "
+                "the client lacks organisation API access."
             )
-            sys.exit(1)
         if not resp.ok:
-            print(
-                f"{C.RED}ERROR:{C.RESET} GET {path} returned {resp.status_code}: {resp.text}",
-                file=sys.stderr,
-            )
-            sys.exit(1)
+            raise APIError(f"GET {path} returned {resp.status_code}: {resp.text}")
 
         return resp.json()
 
@@ -365,13 +426,14 @@ class BitwardenClient:
             "end": end.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
         }
         date_range = f"{start.strftime('%Y-%m-%d')} – {end.strftime('%Y-%m-%d')}"
-        sys.stdout.write(
+        progress = sys.stdout.write if not self.quiet else (lambda text: None)
+        progress(
             f"  {C.CYAN}>{C.RESET}  Fetching events  {C.DIM}({date_range}){C.RESET}\n"
         )
         sys.stdout.flush()
         page = 1
         while True:
-            sys.stdout.write(
+            progress(
                 f"\r\x1b[2K    {C.DIM}page {page}...{C.RESET}"
             )
             sys.stdout.flush()
@@ -387,7 +449,7 @@ class BitwardenClient:
                 "continuationToken": token,
             }
             page += 1
-        sys.stdout.write(
+        progress(
             f"\r\x1b[2K  {C.GREEN}{_TICK}{C.RESET}  Fetching events  "
             f"{C.DIM}{len(events)} events{C.RESET}\n"
         )
@@ -406,21 +468,49 @@ class BitwardenClient:
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _parse_date(date_str: Optional[str]) -> Optional[datetime]:
-    """Parse an ISO 8601 date string (with or without fractional seconds) to UTC datetime."""
-    if not date_str:
+# An identical copy of parse_timestamp in Python/event_warehouse.py, duplicated on purpose because
+# this script doesn't depend on anything outside its folder. Change both together;
+# Python/benchmarks/bench_parse_timestamp.py checks that they agree.
+_DAY_EPOCHS: dict[str, int] = {}  # "2024-05-01T" -> epoch of that midnight, one entry per day seen
+_DAY_SECONDS: dict[str, int] = {}  # "12:34:56" -> seconds into the day, at most 86400 entries
+
+
+def parse_timestamp(date_str: str) -> int:
+    """
+    Return a Bitwarden event timestamp (2024-05-01T12:34:56.1234567Z) as epoch seconds (UTC).
+
+    Called for every event, so instead of parsing each string with datetime, its date and its time
+    of day are looked up in caches that nearly always hit. Raises ValueError if unparseable.
+    """
+    day = _DAY_EPOCHS.get(date_str[:11])
+    seconds = _DAY_SECONDS.get(date_str[11:19])
+    if day is None or seconds is None:
+        return _parse_timestamp_uncached(date_str)
+    return day + seconds
+
+
+def _parse_timestamp_uncached(date_str: str) -> int:
+    dt = datetime.fromisoformat(date_str[:19]).replace(tzinfo=timezone.utc)
+    if date_str[4:5] + date_str[7:8] + date_str[10:11] + date_str[13:14] + date_str[16:17] in ('--T::', '-- ::'):
+        _DAY_EPOCHS[date_str[:11]] = int(dt.replace(hour=0, minute=0, second=0).timestamp())
+        _DAY_SECONDS[date_str[11:19]] = dt.hour * 3600 + dt.minute * 60 + dt.second
+    return int(dt.timestamp())
+
+
+def _parse_epoch(date_str: Optional[str]) -> Optional[int]:
+    """Epoch seconds of a full event date (date and time), or None if missing or unparseable."""
+    if not date_str or len(date_str) < 19:
         return None
     try:
-        s = date_str.rstrip("Z")
-        if "." in s:
-            dt = datetime.strptime(s[:26], "%Y-%m-%dT%H:%M:%S.%f")
-        else:
-            dt = datetime.strptime(s, "%Y-%m-%dT%H:%M:%S")
-        return dt.replace(tzinfo=timezone.utc)
+        return parse_timestamp(date_str)
     except ValueError:
         return None
 
 
+def _epoch(dt: Optional[datetime]) -> Optional[int]:
+    return int(dt.timestamp()) if dt else None
+
+
 def _pct(count: int, total: int) -> str:
     return f"{count / total * 100:.1f}%" if total else "N/A"
 
@@ -429,6 +519,250 @@ def _fmt_date(dt: Optional[datetime]) -> str:
     return dt.strftime("%Y-%m-%d %H:%M UTC") if dt else "N/A"
 
 
+# ---------------------------------------------------------------------------
+# Activity rollups
+# ---------------------------------------------------------------------------
+
+# Per-member daily counters, and the event types that feed them
+ROLLUP_COUNTERS: tuple[str, ...] = (
+    "logins", "autofills", "password_views", "item_views", "items_created", "items_edited", "failed_logins",
+)
+COUNTER_BY_EVENT: dict[int, str] = {
+    EVENT_LOGIN: "logins",
+    EVENT_AUTOFILL: "autofills",
+    EVENT_PASSWORD_VIEWED: "password_views",
+    EVENT_ITEM_VIEWED: "item_views",
+    EVENT_ITEM_CREATED: "items_created",
+    EVENT_ITEM_EDITED: "items_edited",
+    EVENT_FAILED_LOGIN: "failed_logins",
+    EVENT_FAILED_LOGIN_2FA: "failed_logins",
+}
+
+# Each incremental run re-fetches this much before the stored watermark, to pick up events
+# that reached the API late (clients upload in batches); events already counted are skipped.
+ROLLUP_LOOKBACK = timedelta(minutes=15)
+
+
+def _event_fingerprint(event: dict) -> str:
+    return hashlib.sha1(json.dumps(event, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def rollup_events(events: list[dict]) -> tuple[dict[tuple[str, str], list], dict[tuple[str, str, int], int]]:
+    """
+    Reduce events to per-member, per-UTC-day aggregates.
+
+    Returns (member_days, device_days):
+    - member_days[(day, actingUserId)] = [*ROLLUP_COUNTERS, last login epoch, last activity epoch]
+    - device_days[(day, actingUserId, device code)] = event count
+    Events without a parseable date are counted on the current day.
+    """
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    counter_index = {name: i for i, name in enumerate(ROLLUP_COUNTERS)}
+    login_slot, activity_slot = len(ROLLUP_COUNTERS), len(ROLLUP_COUNTERS) + 1
+    member_days: dict[tuple[str, str], list] = {}
+    device_days: dict[tuple[str, str, int], int] = defaultdict(int)
+
+    for event in events:
+        uid: Optional[str] = event.get("actingUserId")
+        if not uid:
+            continue
+        date_str = event.get("date")
+        ts = _parse_epoch(date_str)
+        day = date_str[:10] if ts is not None else today
+
+        row = member_days.get((day, uid))
+        if row is None:
+            row = member_days[(day, uid)] = [0] * len(ROLLUP_COUNTERS) + [None, None]
+        etype: int = event.get("type", -1)
+        counter = COUNTER_BY_EVENT.get(etype)
+        if counter:
+            row[counter_index[counter]] += 1
+        if ts is not None:
+            if row[activity_slot] is None or ts > row[activity_slot]:
+                row[activity_slot] = ts
+            if etype == EVENT_LOGIN and (row[login_slot] is None or ts > row[login_slot]):
+                row[login_slot] = ts
+
+        device_code: Optional[int] = event.get("device")
+        if device_code is not None:
+            device_days[(day, uid, device_code)] += 1
+
+    return member_days, device_days
+
+
+class RollupStore:
+    """
+    SQLite store of per-member daily activity, so repeat runs only fetch new events.
+
+    The store records which time range it holds complete rollups for (covered_from / covered_to,
+    epoch seconds). A run fetches only what lies outside that range: new events since
+    covered_to (less ROLLUP_LOOKBACK), and older days when --days grows. Fingerprints of the
+    events in the last ROLLUP_LOOKBACK are kept so re-fetched events aren't counted twice.
+    Rollups are by UTC day, so a report built from the store covers whole days.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        counters = ", ".join(f"{name} INTEGER NOT NULL DEFAULT 0" for name in ROLLUP_COUNTERS)
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS member_days (
+                day TEXT NOT NULL, user_id TEXT NOT NULL, {counters},
+                last_login INTEGER, last_activity INTEGER,
+                PRIMARY KEY (day, user_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS device_days (
+                day TEXT NOT NULL, user_id TEXT NOT NULL, device INTEGER NOT NULL, events INTEGER NOT NULL,
+                PRIMARY KEY (day, user_id, device)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS recent_events (fingerprint TEXT PRIMARY KEY, ts INTEGER NOT NULL) WITHOUT ROWID;
+        """)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: object) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def claim(self, owner: str) -> None:
+        """Tie the store to one organisation's API client; refuse to mix in another's events."""
+        stored = self._get_meta("owner")
+        if stored is None:
+            with self.conn:
+                self._set_meta("owner", owner)
+        elif stored != owner:
+            raise ValueError(f"{self.path} holds rollups for a different organisation ({stored})")
+
+    def coverage(self) -> Optional[tuple[int, int]]:
+        covered_from, covered_to = self._get_meta("covered_from"), self._get_meta("covered_to")
+        if covered_from is None or covered_to is None:
+            return None
+        return int(covered_from), int(covered_to)
+
+    def reset(self) -> None:
+        with self.conn:
+            for table in ("member_days", "device_days", "recent_events"):
+                self.conn.execute(f"DELETE FROM {table}")
+            self.conn.execute("DELETE FROM meta WHERE key IN ('covered_from', 'covered_to')")
+
+    def add_events(self, events: list[dict], covered_from: Optional[int] = None, covered_to: Optional[int] = None) -> int:
+        """
+        Fold events into the daily rollups, skipping ones already counted near the watermark, and
+        extend the covered range. Returns the number of events counted.
+        """
+        # Only a run that moves the watermark overlaps earlier fetches and needs the fingerprints:
+        # events since the old watermark's lookback may already be counted, and those since the
+        # new watermark's lookback are remembered for the next run.
+        coverage = self.coverage()
+        lookback = int(ROLLUP_LOOKBACK.total_seconds())
+        check_since = coverage[1] - lookback if coverage and covered_to is not None else None
+        recent_since = covered_to - lookback if covered_to is not None else None
+        fresh, recent = [], []
+        for event in events:
+            ts = _parse_epoch(event.get("date")) if recent_since is not None else None
+            if ts is not None and (ts >= recent_since or (check_since is not None and ts >= check_since)):
+                fingerprint = _event_fingerprint(event)
+                if check_since is not None and ts >= check_since and self.conn.execute(
+                    "SELECT 1 FROM recent_events WHERE fingerprint = ?", (fingerprint,)
+                ).fetchone():
+                    continue
+                if ts >= recent_since:
+                    recent.append((fingerprint, ts))
+            fresh.append(event)
+
+        member_days, device_days = rollup_events(fresh)
+        assignments = ", ".join(f"{name} = {name} + excluded.{name}" for name in ROLLUP_COUNTERS)
+        with self.conn:
+            self.conn.executemany(
+                f"""INSERT INTO member_days (day, user_id, {", ".join(ROLLUP_COUNTERS)}, last_login, last_activity)
+                    VALUES (?, ?, {", ".join("?" * len(ROLLUP_COUNTERS))}, ?, ?)
+                    ON CONFLICT (day, user_id) DO UPDATE SET {assignments},
+                        last_login = NULLIF(MAX(COALESCE(last_login, 0), COALESCE(excluded.last_login, 0)), 0),
+                        last_activity = NULLIF(MAX(COALESCE(last_activity, 0), COALESCE(excluded.last_activity, 0)), 0)""",
+                ((day, uid, *row) for (day, uid), row in member_days.items()),
+            )
+            self.conn.executemany(
+                """INSERT INTO device_days (day, user_id, device, events) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (day, user_id, device) DO UPDATE SET events = events + excluded.events""",
+                ((day, uid, device, count) for (day, uid, device), count in device_days.items()),
+            )
+            self.conn.executemany("INSERT OR IGNORE INTO recent_events (fingerprint, ts) VALUES (?, ?)", recent)
+            if covered_to is not None:
+                self.conn.execute("DELETE FROM recent_events WHERE ts < ?", (recent_since,))
+            if covered_from is not None:
+                self._set_meta("covered_from", min(covered_from, coverage[0]) if coverage else covered_from)
+            if covered_to is not None:
+                self._set_meta("covered_to", max(covered_to, coverage[1]) if coverage else covered_to)
+        return len(fresh)
+
+    def load(self, since_day: Optional[str] = None) -> tuple[dict[str, dict], dict[str, dict[int, int]]]:
+        """
+        Sum the rollups from since_day (YYYY-MM-DD, inclusive; all days if None) per member.
+
+        Returns (activity, device_counts):
+        - activity[actingUserId] = {counter: total, "last_login": datetime|None, "last_activity": datetime|None}
+        - device_counts[actingUserId] = {device code: events}
+        """
+        since_day = since_day or ""
+        sums = ", ".join(f"SUM({name})" for name in ROLLUP_COUNTERS)
+        activity: dict[str, dict] = {}
+        for uid, *values in self.conn.execute(
+            f"SELECT user_id, {sums}, MAX(last_login), MAX(last_activity) FROM member_days "
+            "WHERE day >= ? GROUP BY user_id",
+            (since_day,),
+        ):
+            totals = dict(zip(ROLLUP_COUNTERS, values))
+            totals["last_login"], totals["last_activity"] = (
+                datetime.fromtimestamp(ts, timezone.utc) if ts else None for ts in values[len(ROLLUP_COUNTERS):]
+            )
+            activity[uid] = totals
+
+        device_counts: dict[str, dict[int, int]] = defaultdict(dict)
+        for uid, device, count in self.conn.execute(
+            "SELECT user_id, device, SUM(events) FROM device_days WHERE day >= ? GROUP BY user_id, device",
+            (since_day,),
+        ):
+            device_counts[uid][device] = count
+        return activity, device_counts
+
+
+def sync_rollups(client: "BitwardenClient", store: RollupStore, start: datetime, end: datetime) -> int:
+    """
+    Bring the store up to date for the window [start, end], fetching only what it doesn't hold.
+    start is rounded down to midnight UTC, since rollups are per day. Returns events counted.
+    """
+    start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    start_ts, end_ts = _epoch(start), _epoch(end)
+    coverage = store.coverage()
+    if coverage and coverage[1] < start_ts:
+        # Nothing stored overlaps the window; start over rather than leave a gap in the rollups
+        store.reset()
+        coverage = None
+
+    if coverage is None:
+        return store.add_events(client.get_all_events(start, end), covered_from=start_ts, covered_to=end_ts)
+
+    counted = 0
+    covered_from, covered_to = coverage
+    if start_ts < covered_from:
+        # The window grew (e.g. --days 30 -> 90): backfill the older days. The API's end bound is
+        # inclusive, so drop events at or after covered_from, which are already counted.
+        older = [
+            e for e in client.get_all_events(start, datetime.fromtimestamp(covered_from, timezone.utc))
+            if (_parse_epoch(e.get("date")) or covered_from) < covered_from
+        ]
+        counted += store.add_events(older, covered_from=start_ts)
+
+    since = datetime.fromtimestamp(covered_to, timezone.utc) - ROLLUP_LOOKBACK
+    counted += store.add_events(client.get_all_events(since, end), covered_to=end_ts)
+    return counted
+
+
 # ---------------------------------------------------------------------------
 # Metrics computation
 # ---------------------------------------------------------------------------
@@ -437,7 +771,8 @@ def compute_metrics(
     members: list[dict],
     groups: list[dict],
     group_members_map: dict[str, list[str]],
-    events: list[dict],
+    activity: dict[str, dict],
+    device_counts: dict[str, dict[int, int]],
     policies: list[dict],
     subscription: dict,
     days: int,
@@ -445,6 +780,9 @@ def compute_metrics(
     """
     Returns (org_summary, per_member_metrics).
 
+    activity and device_counts are the window's event rollups per actingUserId, as returned
+    by RollupStore.load().
+
     Key ID notes:
     - event.actingUserId  matches  member.userId  (cross-platform Bitwarden account UUID)
     - member.id is the org-scoped UUID used for group membership lookups
@@ -475,67 +813,36 @@ def compute_metrics(
         if uid:
             user_id_to_member[uid] = m
 
-    # ---- Aggregate events by actingUserId (Bitwarden account UUID) ----
-    login_counts: dict[str, int] = defaultdict(int)
-    last_login: dict[str, datetime] = {}
-    last_activity: dict[str, datetime] = {}
-    autofill_counts: dict[str, int] = defaultdict(int)
-    password_view_counts: dict[str, int] = defaultdict(int)
-    item_view_counts: dict[str, int] = defaultdict(int)
-    items_created_counts: dict[str, int] = defaultdict(int)
-    items_edited_counts: dict[str, int] = defaultdict(int)
-    failed_login_counts: dict[str, int] = defaultdict(int)
+    # ---- Aggregate rollups by actingUserId (Bitwarden account UUID) ----
+    def counts(name: str) -> dict[str, int]:
+        return {uid: totals[name] for uid, totals in activity.items()}
+
+    login_counts = counts("logins")
+    autofill_counts = counts("autofills")
+    password_view_counts = counts("password_views")
+    item_view_counts = counts("item_views")
+    items_created_counts = counts("items_created")
+    items_edited_counts = counts("items_edited")
+    failed_login_counts = counts("failed_logins")
+    last_login: dict[str, datetime] = {uid: t["last_login"] for uid, t in activity.items() if t["last_login"]}
+    last_activity: dict[str, datetime] = {uid: t["last_activity"] for uid, t in activity.items() if t["last_activity"]}
+    active_user_ids: set[str] = {uid for uid, n in login_counts.items() if n}  # Accounts with a login event
     device_sets: dict[str, set[str]] = defaultdict(set)
-    active_user_ids: set[str] = set()          # Bitwarden account UUIDs with a login event
     device_totals: dict[str, int] = defaultdict(int)
     channel_totals: dict[str, int] = defaultdict(int)
     browser_totals: dict[str, int] = defaultdict(int)
 
-    for event in events:
-        uid: Optional[str] = event.get("actingUserId")
-        if not uid:
-            continue
-
-        etype: int = event.get("type", -1)
-        date: Optional[datetime] = _parse_date(event.get("date"))
-        device_code: Optional[int] = event.get("device")
-        device_label: str = (
-            DEVICE_TYPES.get(device_code, f"Unknown ({device_code})")
-            if device_code is not None
-            else "Unknown"
-        )
-
-        if date:
-            if uid not in last_activity or date > last_activity[uid]:
-                last_activity[uid] = date
-
-        if device_code is not None:
+    for uid, per_device in device_counts.items():
+        for device_code, count in per_device.items():
+            device_label = DEVICE_TYPES.get(device_code, f"Unknown ({device_code})")
             device_sets[uid].add(device_label)
-            device_totals[device_label] += 1
+            device_totals[device_label] += count
             channel = ACCESS_CHANNEL.get(device_code)
             if channel:
-                channel_totals[channel] += 1
+                channel_totals[channel] += count
             brand = BROWSER_BRAND.get(device_code)
             if brand:
-                browser_totals[brand] += 1
-
-        if etype == EVENT_LOGIN:
-            login_counts[uid] += 1
-            active_user_ids.add(uid)
-            if date and (uid not in last_login or date > last_login[uid]):
-                last_login[uid] = date
-        elif etype == EVENT_AUTOFILL:
-            autofill_counts[uid] += 1
-        elif etype == EVENT_PASSWORD_VIEWED:
-            password_view_counts[uid] += 1
-        elif etype == EVENT_ITEM_VIEWED:
-            item_view_counts[uid] += 1
-        elif etype == EVENT_ITEM_CREATED:
-            items_created_counts[uid] += 1
-        elif etype == EVENT_ITEM_EDITED:
-            items_edited_counts[uid] += 1
-        elif etype in (EVENT_FAILED_LOGIN, EVENT_FAILED_LOGIN_2FA):
-            failed_login_counts[uid] += 1
+                browser_totals[brand] += count
 
     # ---- Build per-member metrics (keyed by org member ID) ----
     per_member: dict[str, dict] = {}
@@ -657,15 +964,18 @@ def compute_metrics(
 # CSV export
 # ---------------------------------------------------------------------------
 
+def report_folder(output_prefix: str) -> str:
+    """Dated output folder for a run, e.g. adoption_report_2026-04-09."""
+    return f"{output_prefix}_{datetime.now(timezone.utc).strftime('%Y-%m-%d')}"
+
+
 def write_csv(
-    output_prefix: str,
+    folder: str,
     org_summary: dict,
     per_member: dict[str, dict],
     pending_by_group: dict[str, int],
     days: int,
 ) -> tuple[str, str]:
-    date_stamp = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    folder = f"{output_prefix}_{date_stamp}"
     os.makedirs(folder, exist_ok=True)
 
     summary_path = os.path.join(folder, "summary.csv")
@@ -1103,6 +1413,266 @@ def _print_summary_table(
     print()
 
 
+# ---------------------------------------------------------------------------
+# Report generation
+# ---------------------------------------------------------------------------
+
+class _QuietStep:
+    """Drop-in for Spinner that prints nothing, for organisations reported in parallel."""
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+
+    def __enter__(self) -> "_QuietStep":
+        return self
+
+    def done(self, detail: str = "") -> None:
+        pass
+
+    def __exit__(self, *_: object) -> None:
+        pass
+
+
+def resolve_urls(
+    region: str,
+    server_url: Optional[str] = None,
+    names: tuple[str, str] = ("region", "server_url"),
+) -> tuple[str, str]:
+    """
+    Return (api_url, identity_url) for a region; raises ValueError for bad input.
+    names are what the region and server URL are called in error messages.
+    """
+    region_name, server_url_name = names
+    if region == "self-hosted":
+        if not server_url:
+            raise ValueError(f"{server_url_name} is required when {region_name} is self-hosted")
+        if not server_url.lower().startswith("https://"):
+            raise ValueError(f"{server_url_name} must use HTTPS (e.g. https://bw.example.com)")
+        base = server_url.rstrip("/")
+        return f"{base}/api", f"{base}/identity"
+    if region not in REGION_URLS:
+        raise ValueError(f"unknown {region_name} {region!r} (expected us, eu or self-hosted)")
+    return REGION_URLS[region]["api"], REGION_URLS[region]["identity"]
+
+
+def generate_report(
+    client: BitwardenClient,
+    days: int,
+    folder: str,
+    store_path: Optional[str] = None,
+    quiet: bool = False,
+) -> tuple[dict, str, str]:
+    """
+    Fetch one organisation's data, compute its metrics and write its CSVs to folder.
+    Returns (org_summary, summary_path, members_path); raises APIError or ValueError.
+    """
+    step = _QuietStep if quiet else Spinner
+
+    with step("Authenticating") as sp:
+        client.authenticate()
+        sp.done()
+
+    with step("Fetching members") as sp:
+        members = client.get_members()
+        sp.done(f"{len(members)} member{'s' if len(members) != 1 else ''}")
+
+    with step("Fetching groups") as sp:
+        groups = client.get_groups()
+        sp.done(f"{len(groups)} group{'s' if len(groups) != 1 else ''}")
+
+    with step("Fetching group memberships") as sp:
+        group_members_map: dict[str, list[str]] = {}
+        for g in groups:
+            group_members_map[g["id"]] = client.get_group_members(g["id"])
+        sp.done()
+
+    with step("Fetching subscription") as sp:
+        subscription = client.get_subscription()
+        sp.done()
+
+    with step("Fetching policies") as sp:
+        policies = client.get_policies()
+        sp.done()
+
+    # Always compute explicit start/end — never rely on the API's 30-day default
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(days=days)
+    # get_all_events manages its own inline progress output
+    if store_path:
+        store = RollupStore(store_path)
+        try:
+            store.claim(f"{client.api_base} {client.client_id}")
+            sync_rollups(client, store, start, end)
+            activity, device_counts = store.load(since_day=start.strftime("%Y-%m-%d"))
+        finally:
+            store.close()
+    else:
+        store = RollupStore()
+        store.add_events(client.get_all_events(start, end))
+        activity, device_counts = store.load()
+        store.close()
+
+    with step("Computing metrics") as sp:
+        org_summary, per_member, pending_by_group = compute_metrics(
+            members, groups, group_members_map, activity, device_counts, policies, subscription, days
+        )
+        sp.done()
+
+    with step("Writing CSV files") as sp:
+        summary_path, members_path = write_csv(folder, org_summary, per_member, pending_by_group, days)
+        sp.done()
+
+    return org_summary, summary_path, members_path
+
+
+# ---------------------------------------------------------------------------
+# Batch mode (many organisations)
+# ---------------------------------------------------------------------------
+
+def load_manifest(path: str) -> list[dict]:
+    """
+    Read a credentials manifest: a JSON list with one object per organisation::
+
+        [{"name": "Acme", "client_id": "organization.xxxx", "client_secret": "...",
+          "region": "us"},
+         {"name": "Globex", "client_id": "...", "client_secret": "...",
+          "region": "self-hosted", "server_url": "https://bw.globex.example"}]
+
+    region defaults to "us". Raises ValueError if the file isn't in this shape.
+    """
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    if not isinstance(entries, list) or not all(isinstance(e, dict) for e in entries):
+        raise ValueError("the manifest must be a JSON list of objects, one per organisation")
+    if not entries:
+        raise ValueError("the manifest lists no organisations")
+    if os.name == "posix" and os.stat(path).st_mode & 0o077:
+        print(
+            f"  {C.RED}Warning:{C.RESET} {path} holds API secrets but is readable by other users "
+            f"(chmod 600 {path})",
+            file=sys.stderr,
+        )
+    return entries
+
+
+def _folder_names(entries: list[dict]) -> list[str]:
+    """A filesystem-safe, unique folder name per manifest entry, from its name."""
+    names: list[str] = []
+    seen: set[str] = set()
+    for i, entry in enumerate(entries):
+        base = re.sub(r"[^A-Za-z0-9._-]+", "_", str(entry.get("name") or "")).strip("._") or f"org_{i + 1}"
+        name, n = base, 2
+        while name.lower() in seen:
+            name, n = f"{base}_{n}", n + 1
+        seen.add(name.lower())
+        names.append(name)
+    return names
+
+
+def _run_org(
+    entry: dict,
+    folder_name: str,
+    days: int,
+    root: str,
+    store_dir: Optional[str],
+    limiter: RateLimiter,
+) -> dict:
+    """Report on one organisation; failures are returned in the result, never raised."""
+    result: dict = {
+        "Organisation": str(entry.get("name") or folder_name),
+        "Status": "Failed",
+        "Error": "",
+        "Duration (s)": 0,
+        "Folder": "",
+    }
+    started = time.monotonic()
+    try:
+        if not entry.get("client_id") or not entry.get("client_secret"):
+            raise ValueError("client_id and client_secret are required")
+        api_url, identity_url = resolve_urls(entry.get("region") or "us", entry.get("server_url"))
+        client = BitwardenClient(
+            api_url, identity_url, entry["client_id"], entry["client_secret"], limiter=limiter, quiet=True
+        )
+        folder = os.path.join(root, folder_name)
+        store_path = os.path.join(store_dir, f"{folder_name}.sqlite") if store_dir else None
+        org_summary, _, _ = generate_report(client, days, folder, store_path, quiet=True)
+        result.update(org_summary)
+        result["Status"] = "OK"
+        result["Folder"] = folder
+    except Exception as exc:  # One organisation failing must not stop the others
+        result["Error"] = str(exc) or exc.__class__.__name__
+    result["Duration (s)"] = round(time.monotonic() - started, 1)
+    return result
+
+
+def write_batch_summary(path: str, results: list[dict]) -> None:
+    """One row per organisation: status, then every summary metric seen in any organisation."""
+    fieldnames: list[str] = []
+    for result in results:
+        fieldnames.extend(k for k in result if k not in fieldnames)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval="")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def run_batch(
+    manifest_path: str,
+    days: int,
+    output_prefix: str,
+    store_dir: Optional[str],
+    concurrency: int,
+    rate: float,
+) -> int:
+    """
+    Report on every organisation in the manifest, `concurrency` at a time, with all of them
+    sharing one API request budget of `rate` per second. Each organisation's CSVs go to
+    <output>_<date>/<name>/ and a cross-organisation summary to <output>_<date>/organisations.csv.
+    Returns the number of organisations that failed.
+    """
+    entries = load_manifest(manifest_path)
+    folder_names = _folder_names(entries)
+    root = report_folder(output_prefix)
+    os.makedirs(root, exist_ok=True)
+    if store_dir:
+        os.makedirs(store_dir, exist_ok=True)
+    limiter = RateLimiter(rate)
+
+    print()
+    print(f"  {C.BOLD}Bitwarden Adoption Report — {len(entries)} organisations{C.RESET}")
+    print(f"  {C.DIM}Window  : last {days} days{C.RESET}")
+    print(f"  {C.DIM}Budget  : {concurrency} at a time, {rate:g} requests/s{C.RESET}")
+    print(f"  {C.DIM}Output  : {root}/{C.RESET}")
+    print()
+
+    results: list[dict] = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(_run_org, entry, folder_name, days, root, store_dir, limiter)
+            for entry, folder_name in zip(entries, folder_names)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result["Status"] == "OK":
+                print(f"  {C.GREEN}{_TICK}{C.RESET}  {result['Organisation']}  "
+                      f"{C.DIM}{result['Duration (s)']}s{C.RESET}")
+            else:
+                print(f"  {C.RED}{_CROSS}{C.RESET}  {result['Organisation']}  {C.DIM}{result['Error']}{C.RESET}")
+
+    results.sort(key=lambda r: r["Organisation"].lower())
+    summary_path = os.path.join(root, "organisations.csv")
+    write_batch_summary(summary_path, results)
+
+    failed = sum(1 for r in results if r["Status"] != "OK")
+    print()
+    print(f"  {len(results) - failed} of {len(results)} organisations reported"
+          + (f", {C.RED}{failed} failed{C.RESET}" if failed else ""))
+    print(f"  {C.GREEN}{_TICK}{C.RESET}  {C.DIM}{summary_path}{C.RESET}")
+    print()
+    return failed
+
+
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
@@ -1121,6 +1691,10 @@ Non-interactive usage (set env vars to skip the setup wizard):
   python adoption_report.py --region us --days 90
   python adoption_report.py --region eu --days 30
   python adoption_report.py --region self-hosted --server-url https://bw.example.com
+  python adoption_report.py --orgs orgs.json --days 30 --concurrency 8 --rate 10
+
+Daily scheduled runs: add --store PATH to keep per-day activity rollups, so each run
+only fetches events newer than the previous one.
         """,
     )
     parser.add_argument(
@@ -1146,10 +1720,47 @@ Non-interactive usage (set env vars to skip the setup wizard):
         default="adoption_report",
         help="Output file prefix (default: adoption_report)",
     )
+    parser.add_argument(
+        "--store",
+        default=None,
+        metavar="PATH",
+        help="SQLite file of daily activity rollups; later runs only fetch events newer than it holds "
+             "(with --orgs, a directory holding one file per organisation)",
+    )
+    parser.add_argument(
+        "--orgs",
+        default=None,
+        metavar="MANIFEST",
+        help="Batch mode: JSON file listing the organisations to report on, with their credentials",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Batch mode: organisations processed at once (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"Batch mode: API requests per second across all organisations (default: {DEFAULT_RATE})",
+    )
     args = parser.parse_args()
 
     if args.days < 1:
         parser.error(f"--days must be a positive integer (got: {args.days})")
+    if args.concurrency < 1:
+        parser.error(f"--concurrency must be a positive integer (got: {args.concurrency})")
+    if not args.rate > 0:  # also rejects nan
+        parser.error(f"--rate must be a positive number (got: {args.rate:g})")
+
+    if args.orgs:
+        try:
+            failed = run_batch(args.orgs, args.days, args.output, args.store, args.concurrency, args.rate)
+        except (OSError, ValueError) as exc:
+            print(f"{C.RED}ERROR:{C.RESET} Could not read {args.orgs} — {exc}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(1 if failed else 0)
 
     client_id = os.getenv("BW_CLIENT_ID")
     client_secret = os.getenv("BW_CLIENT_SECRET")
@@ -1159,18 +1770,10 @@ Non-interactive usage (set env vars to skip the setup wizard):
         client_id, client_secret, api_url, identity_url = setup_credentials()
     else:
         # Derive URLs from --region flag (or default to US)
-        region = args.region or "us"
-        if region == "self-hosted":
-            if not args.server_url:
-                parser.error("--server-url is required when --region is self-hosted")
-            if not args.server_url.lower().startswith("https://"):
-                parser.error("--server-url must use HTTPS (e.g. https://bw.example.com)")
-            base = args.server_url.rstrip("/")
-            api_url = f"{base}/api"
-            identity_url = f"{base}/identity"
-        else:
-            api_url = REGION_URLS[region]["api"]
-            identity_url = REGION_URLS[region]["identity"]
+        try:
+            api_url, identity_url = resolve_urls(args.region or "us", args.server_url, ("--region", "--server-url"))
+        except ValueError as exc:
+            parser.error(str(exc))
 
     # Derive a short region label for display
     if "bitwarden.eu" in api_url:
@@ -1188,48 +1791,13 @@ Non-interactive usage (set env vars to skip the setup wizard):
     print()
 
     client = BitwardenClient(api_url, identity_url, client_id, client_secret)
-
-    with Spinner("Authenticating") as sp:
-        client.authenticate()
-        sp.done()
-
-    with Spinner("Fetching members") as sp:
-        members = client.get_members()
-        sp.done(f"{len(members)} member{'s' if len(members) != 1 else ''}")
-
-    with Spinner("Fetching groups") as sp:
-        groups = client.get_groups()
-        sp.done(f"{len(groups)} group{'s' if len(groups) != 1 else ''}")
-
-    with Spinner("Fetching group memberships") as sp:
-        group_members_map: dict[str, list[str]] = {}
-        for g in groups:
-            group_members_map[g["id"]] = client.get_group_members(g["id"])
-        sp.done()
-
-    with Spinner("Fetching subscription") as sp:
-        subscription = client.get_subscription()
-        sp.done()
-
-    with Spinner("Fetching policies") as sp:
-        policies = client.get_policies()
-        sp.done()
-
-    # Always compute explicit start/end — never rely on the API's 30-day default
-    end = datetime.now(timezone.utc)
-    start = end - timedelta(days=args.days)
-    # get_all_events manages its own inline progress output
-    events = client.get_all_events(start, end)
-
-    with Spinner("Computing metrics") as sp:
-        org_summary, per_member, pending_by_group = compute_metrics(
-            members, groups, group_members_map, events, policies, subscription, args.days
+    try:
+        org_summary, summary_path, members_path = generate_report(
+            client, args.days, report_folder(args.output), args.store
         )
-        sp.done()
-
-    with Spinner("Writing CSV files") as sp:
-        summary_path, members_path = write_csv(args.output, org_summary, per_member, pending_by_group, args.days)
-        sp.done()
+    except (APIError, ValueError) as exc:
+        print(f"{C.RED}ERROR:{C.RESET} {exc}", file=sys.stderr)
+        sys.exit(1)
 
     _print_summary_table(org_summary, args.days, region_label, summary_path, members_path)
 
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmark for parse_timestamp, the per-event date parser in event_warehouse.py (and its
+copy in adoption-report/adoption_report.py).
+
+Times the cached parser against the per-event datetime parsing it replaced, on synthetic
+Bitwarden event dates, and checks that every parser returns the same epoch seconds.
+
+Usage:
+------
+python benchmarks/bench_parse_timestamp.py
+python benchmarks/bench_parse_timestamp.py --events 1000000 --days 365 --repeat 5
+
+--events : Number of event dates to parse (default: 300000).
+--days   : How many days back the dates spread (default: 90).
+--repeat : Timing runs per parser; the fastest is reported (default: 5).
+--seed   : Random seed for the dates (default: 1).
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import event_warehouse  # noqa: E402
+
+ADOPTION_REPORT = os.path.join(os.path.dirname(HERE), "adoption-report", "adoption_report.py")
+
+# Dates that don't have the usual shape, to check every parser agrees on them too
+ODD_DATES = ["2024-02-29T23:59:59Z", "2024-02-29T00:00:00", "2024-01-01 03:04:05.1Z", "1999-12-31T23:59:59.9999999Z",
+             "2024-01-01T00:00:00+01:00", "2024-01-01", "2024-01-01T00:00", "20240101T010000", "2024-13-01T00:00:00Z",
+             "2024-01-01T24:00:00Z", "2024-01-01T0a:00:00Z", "2024-01-01X00:00:00Z", "garbage", ""]
+
+
+def fromisoformat_per_event(date_str):
+    """What parse_timestamp did before it was cached."""
+    return int(datetime.fromisoformat(date_str[:19]).replace(tzinfo=timezone.utc).timestamp())
+
+
+def strptime_per_event(date_str):
+    """What adoption_report's _parse_date + _epoch did before."""
+    s = date_str.rstrip("Z")
+    if "." in s:
+        dt = datetime.strptime(s[:26], "%Y-%m-%dT%H:%M:%S.%f")
+    else:
+        dt = datetime.strptime(s, "%Y-%m-%dT%H:%M:%S")
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
+
+
+def event_dates(count, days, seed):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    dates = [(now - timedelta(seconds=rng.random() * days * 86400)).strftime("%Y-%m-%dT%H:%M:%S.%f") + "0Z"
+             for _ in range(count)]
+    dates.sort(reverse=True)  # The API pages newest first
+    return dates
+
+
+def load_adoption_report():
+    """adoption_report's copy of the parser, or None if its dependencies aren't installed."""
+    spec = importlib.util.spec_from_file_location("adoption_report", ADOPTION_REPORT)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except ImportError as e:
+        print(f"Skipping adoption_report's copy ({e}); install adoption-report/requirements.txt to include it")
+        return None
+    return module
+
+
+def outcome(parser, date_str):
+    try:
+        return parser(date_str)
+    except ValueError:
+        return "ValueError"
+
+
+def clear_caches(*modules):
+    for module in modules:
+        module._DAY_EPOCHS.clear()
+        module._DAY_SECONDS.clear()
+
+
+def best_time(parse, dates, repeat, before=None):
+    best = float("inf")
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        for date_str in dates:
+            parse(date_str)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parse_timestamp against per-event datetime parsing")
+    parser.add_argument('--events', type=int, default=300000, help="Number of event dates to parse (default: 300000)")
+    parser.add_argument('--days', type=int, default=90, help="How many days back the dates spread (default: 90)")
+    parser.add_argument('--repeat', type=int, default=5, help="Timing runs per parser (default: 5)")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed for the dates (default: 1)")
+    args = parser.parse_args()
+
+    dates = event_dates(args.events, args.days, args.seed)
+    adoption_report = load_adoption_report()
+    cached_modules = [event_warehouse] + ([adoption_report] if adoption_report else [])
+
+    # Every parser must agree, with cold and with warm caches
+    parsers = {"event_warehouse.parse_timestamp": event_warehouse.parse_timestamp}
+    if adoption_report:
+        parsers["adoption_report.parse_timestamp"] = adoption_report.parse_timestamp
+    clear_caches(*cached_modules)
+    mismatches = 0
+    for _ in range(2):
+        for date_str in ODD_DATES + dates:
+            expected = outcome(fromisoformat_per_event, date_str)
+            for name, parse in parsers.items():
+                if outcome(parse, date_str) != expected:
+                    mismatches += 1
+                    print(f"MISMATCH {name}({date_str!r}): {outcome(parse, date_str)} != {expected}")
+    if mismatches:
+        sys.exit(1)
+    print(f"All parsers agree on {len(dates) + len(ODD_DATES)} dates, with cold and warm caches")
+
+    print(f"\n{len(dates)} event dates over {args.days} days, best of {args.repeat} runs:")
+    results = [
+        ("datetime.fromisoformat per event (before)", best_time(fromisoformat_per_event, dates, args.repeat)),
+        ("datetime.strptime per event (adoption_report before)", best_time(strptime_per_event, dates, args.repeat)),
+        ("parse_timestamp, cold caches", best_time(event_warehouse.parse_timestamp, dates, args.repeat,
+                                                   lambda: clear_caches(event_warehouse))),
+        ("parse_timestamp, warm caches", best_time(event_warehouse.parse_timestamp, dates, args.repeat)),
+    ]
+    if adoption_report:
+        results.append(("adoption_report._parse_epoch, warm caches",
+                        best_time(adoption_report._parse_epoch, dates, args.repeat)))
+
+    baseline = results[0][1]
+    for label, seconds in results:
+        print(f"  {label:<55} {seconds / len(dates) * 1e9:8.0f} ns/event  {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
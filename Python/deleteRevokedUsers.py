@@ -1,5 +1,12 @@
-import requests
+import argparse
 import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
 
 # Configuration — replace with your clientID and secret
 
@@ -8,67 +15,159 @@ CLIENT_SECRET = "YOUR_CLIENT_SECRET"
 API_BASE = "https://api.bitwarden.com"  # or your self-hosted public API base
 IDENTITY_URL = "https://identity.bitwarden.com/connect/token"  # or your instance
 
+REVOKED_STATUS = -1
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 5  # requests per second across all workers
+
+# Retries for throttled (429), failed (5xx) and dropped requests
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 6
+MAX_RETRY_DELAY = 60  # seconds
+
+# One pooled session for every call
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_maxsize=16))
+
+
+class RateLimiter:
+    """Spaces out calls so that at most `rate` start per second, shared between threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.lock = threading.Lock()
+        self.next_time = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def send(method, url, limiter=None, **kwargs):
+    """
+    Send a request, retrying 429/5xx responses and connection errors with exponential backoff
+    (or the server's Retry-After). Every attempt, retries included, waits for the rate limiter.
+    Returns the last response and the number of attempts it took.
+    """
+    attempt = 0
+    while True:
+        if limiter:
+            limiter.wait()
+        attempt += 1
+        delay = 2 ** (attempt - 1)
+        try:
+            resp = session.request(method, url, timeout=30, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == MAX_ATTEMPTS:
+                raise
+        else:
+            if resp.status_code not in RETRY_STATUSES or attempt == MAX_ATTEMPTS:
+                return resp, attempt
+            try:
+                delay = max(float(resp.headers.get("Retry-After", "")), 0)
+            except ValueError:
+                pass
+        time.sleep(min(delay, MAX_RETRY_DELAY))
+
+
 def get_access_token():
     """Get OAuth token using client_credentials grant."""
     data = {
         "grant_type": "client_credentials",
+        "scope": "api.organization",
         "client_id": CLIENT_ID,
         "client_secret": CLIENT_SECRET,
-        # Optionally, you may need a scope like "public.organization" or similar; check API docs.
     }
     headers = {
         "Content-Type": "application/x-www-form-urlencoded"
     }
-    resp = requests.post(IDENTITY_URL, data=data, headers=headers)
+    resp, _ = send("POST", IDENTITY_URL, data=data, headers=headers)
     resp.raise_for_status()
     token_data = resp.json()
     return token_data["access_token"]
 
-def get_org_members(token):
-    """Fetch list of members in the organization."""
-    url = f"{API_BASE}/public/members"  # endpoint path — check your API spec
+
+def get_org_members(token, limiter=None):
+    """Fetch all members in the organization, following continuation tokens."""
+    url = f"{API_BASE}/public/members"
     headers = {
         "Authorization": f"Bearer {token}"
     }
-    resp = requests.get(url, headers=headers)
-    resp.raise_for_status()
-    
-    
-    return resp.json()
+    members = []
+    continuation_token = None
+    while True:
+        params = {"continuationToken": continuation_token} if continuation_token else None
+        resp, _ = send("GET", url, limiter, headers=headers, params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        members.extend(data.get("data", []))
+        continuation_token = data.get("continuationToken")
+        if not continuation_token:
+            return members
+
 
-def remove_user(token, user_id):
-    """Delete or disable a user by ID."""
-    # The HTTP method / path depends on the API — this assumes DELETE /public/members/{id}
+def remove_user(token, user_id, limiter):
+    """Delete a user by ID. Raises on failure once retries are exhausted."""
     url = f"{API_BASE}/public/members/{user_id}"
     headers = {
         "Authorization": f"Bearer {token}"
     }
-    resp = requests.delete(url, headers=headers)
-    # It might be “disable” or “deactivate” instead of delete in some APIs.
-    if resp.status_code in (200, 204):
-        print(f"Removed user {user_id}")
-    else:
-        print(f"Failed to remove user {user_id}: {resp.status_code} {resp.text}")
+    resp, attempts = send("DELETE", url, limiter, headers=headers)
+    # A retry can find the member already gone when an earlier attempt succeeded but its response was lost
+    if resp.status_code == 404 and attempts > 1:
+        return
+    if resp.status_code not in (200, 204):
+        raise RuntimeError(f"{resp.status_code} {resp.text}")
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Remove all revoked members from the organization")
+    parser.add_argument("--dry-run", action="store_true", help="Only list and count the revoked members")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Concurrent deletes (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help=f"Maximum API requests per second (default: {DEFAULT_RATE})")
+    parser.add_argument("--verbose", action="store_true", help="Print the full member list")
+    args = parser.parse_args()
+    if args.rate <= 0:
+        parser.error(f"--rate must be greater than 0 (got {args.rate})")
+
+    limiter = RateLimiter(args.rate)
     token = get_access_token()
-    members = get_org_members(token)
-
-    members_resp = members.get("data", [])
-    print(json.dumps(members_resp, indent=2))
-
-
-    # The structure of each "member" object depends on the API; assume it has fields "id" and "status" 
-    # as well as email which I will be displaying on the terminal to show which Items were deleted
-    for m in members_resp:
-        # for example:
-        user_id = m.get("id")
-        status = m.get("status")
-        user_email = m.get("email") 
-        
-        if status == -1:
-            print(f"Removing user {user_id} with email: {user_email}  (status = {status})")
-            remove_user(token, user_id)
+    members = get_org_members(token, limiter)
+    if args.verbose:
+        print(json.dumps(members, indent=2))
+
+    revoked = [m for m in members if m.get("status") == REVOKED_STATUS]
+    print(f"{len(revoked)} of {len(members)} members are revoked")
+    for m in revoked:
+        print(f"  {m.get('id')}  {m.get('email')}")
+    if args.dry_run or not revoked:
+        return
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(remove_user, token, m.get("id"), limiter): m for m in revoked}
+        for done, future in enumerate(as_completed(futures), 1):
+            m = futures[future]
+            try:
+                future.result()
+                print(f"[{done}/{len(revoked)}] Removed user {m.get('id')} with email: {m.get('email')}")
+            except Exception as e:
+                failed += 1
+                print(f"[{done}/{len(revoked)}] Failed to remove user {m.get('id')} with email: {m.get('email')}: {e}")
+
+    # Verification pass: read the member list again and confirm no revoked members remain
+    remaining = [m for m in get_org_members(token, limiter) if m.get("status") == REVOKED_STATUS]
+    print(f"Removed {len(revoked) - failed} of {len(revoked)} revoked members")
+    if remaining:
+        print(f"Verification failed: {len(remaining)} revoked members remain:")
+        for m in remaining:
+            print(f"  {m.get('id')}  {m.get('email')}")
+        sys.exit(1)
+    print("Verification passed: no revoked members remain")
+
 
 if __name__ == "__main__":
     main()
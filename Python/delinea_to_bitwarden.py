@@ -10,6 +10,9 @@ Usage:
     # Direct import (recommended)
     python3 delinea_to_bitwarden.py secrets-export.xml
 
+    # Direct import in smaller chunks (large exports)
+    python3 delinea_to_bitwarden.py secrets-export.xml --chunk-size 200
+
     # Export to JSON (individual vault)
     python3 delinea_to_bitwarden.py secrets-export.xml --export -o output.json
 
@@ -22,11 +25,14 @@ import base64
 import getpass
 import hashlib
 import json
+import os
 import subprocess
 import sys
 import tempfile
 import uuid
 import xml.sax
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional, Dict, List, Any
@@ -135,20 +141,67 @@ class BitwardenAuth:
             return self.session_key
 
 
-class DelineaXMLHandler(xml.sax.handler.ContentHandler):
-    """SAX handler for parsing Delinea Secret Server XML exports"""
+class DelineaSecret:
+    """Compact representation of a parsed Delinea secret"""
+
+    __slots__ = ('name', 'template', 'folder', 'totp_code', 'items')
 
     def __init__(self):
+        self.name = ''
+        self.template = ''
+        self.folder = ''
+        self.totp_code = ''
+        self.items: Dict[str, tuple] = {}  # slug -> (field_name, value)
+
+
+class DelineaXMLHandler(xml.sax.handler.ContentHandler):
+    """
+    SAX handler for parsing Delinea Secret Server XML exports.
+
+    If `on_secret` is given, each completed secret is passed to it as soon as it is parsed
+    (after the template definitions have been read) instead of being kept in `self.secrets`.
+    """
+
+    # Secret-level and SecretItem-level tags whose text we keep
+    SECRET_TAGS = {'SecretName': 'name', 'SecretTemplateName': 'template',
+                   'FolderPath': 'folder', 'TotpKey': 'totp_code'}
+    SECRET_ITEM_TAGS = ('FieldName', 'Slug', 'Value')
+
+    def __init__(self, on_secret=None):
         super().__init__()
         self.stack = []
         self.templates = {}  # Template definitions
-        self.secrets = []    # All secrets/items
+        self.secrets = []    # All secrets/items (only when on_secret is not set)
         self.folders = []    # Folder structure
+        self.secret_count = 0
+
+        self.on_secret = on_secret
+        self.templates_done = False
+        self.pending_secrets = []  # Secrets seen before the templates were complete
 
         # Current parsing context
         self.template = None
         self.secret = None
         self.folder = None
+        self.secret_item = None  # {tag: value} for the SecretItem being parsed
+        self.text = []           # Text chunks of the current secret tag
+
+    def emit_secret(self, secret: DelineaSecret):
+        """Hand a completed secret to the consumer, or keep it if there is none"""
+        self.secret_count += 1
+        if self.on_secret is None:
+            self.secrets.append(secret)
+        elif not self.templates_done:
+            self.pending_secrets.append(secret)
+        else:
+            self.on_secret(secret)
+
+    def flush_pending_secrets(self):
+        """Release secrets held back while template definitions were still being read"""
+        self.templates_done = True
+        pending, self.pending_secrets = self.pending_secrets, []
+        for secret in pending:
+            self.on_secret(secret)
 
     def startElement(self, name, attrs):
         """Handle opening XML tags"""
@@ -163,10 +216,7 @@ class DelineaXMLHandler(xml.sax.handler.ContentHandler):
         # Secret (item)
         elif len(self.stack) == 2 and self.stack[1] == 'Secrets':
             if name == 'Secret':
-                self.secret = {
-                    'name': '', 'template': '', 'folder': '',
-                    'totp_code': '', 'items': {}, 'item': None
-                }
+                self.secret = DelineaSecret()
 
         # Folder
         elif len(self.stack) == 2 and self.stack[1] == 'Folders':
@@ -186,9 +236,7 @@ class DelineaXMLHandler(xml.sax.handler.ContentHandler):
         # Secret item (field value)
         elif len(self.stack) == 4 and name == 'SecretItem':
             if self.stack[1] == 'Secrets' and self.secret:
-                self.secret['item'] = {
-                    'field_name': '', 'slug': '', 'value': ''
-                }
+                self.secret_item = {}
 
         # Folder permission
         elif len(self.stack) == 4 and name == 'Permission':
@@ -204,7 +252,11 @@ class DelineaXMLHandler(xml.sax.handler.ContentHandler):
         """Handle closing XML tags"""
         self.stack.pop(-1)
 
-        if len(self.stack) == 2:
+        if len(self.stack) == 1:
+            if name == 'SecretTemplates' and self.on_secret is not None:
+                self.flush_pending_secrets()
+
+        elif len(self.stack) == 2:
             # Save completed template
             if self.stack[1] == 'SecretTemplates' and name == 'secrettype':
                 if self.template:
@@ -216,7 +268,7 @@ class DelineaXMLHandler(xml.sax.handler.ContentHandler):
             # Save completed secret
             elif self.stack[1] == 'Secrets' and name == 'Secret':
                 if self.secret:
-                    self.secrets.append(self.secret)
+                    self.emit_secret(self.secret)
                     self.secret = None
 
             # Save completed folder
@@ -225,6 +277,12 @@ class DelineaXMLHandler(xml.sax.handler.ContentHandler):
                     self.folders.append(self.folder)
                     self.folder = None
 
+        elif len(self.stack) == 3:
+            # Save secret-level text
+            if self.secret and self.stack[1] == 'Secrets' and name in self.SECRET_TAGS:
+                setattr(self.secret, self.SECRET_TAGS[name], ''.join(self.text))
+                self.text.clear()
+
         elif len(self.stack) == 4:
             # Save template field
             if name == 'field' and self.stack[1] == 'SecretTemplates':
@@ -236,12 +294,12 @@ class DelineaXMLHandler(xml.sax.handler.ContentHandler):
 
             # Save secret item
             elif name == 'SecretItem' and self.stack[1] == 'Secrets':
-                if self.secret and isinstance(self.secret['item'], dict):
-                    key = self.secret['item'].get('slug') or self.secret['item'].get('field_name')
-                    value = self.secret['item'].get('value')
+                if self.secret and self.secret_item is not None:
+                    field_name = self.secret_item.get('FieldName', '')
+                    key = self.secret_item.get('Slug') or field_name
                     if key:
-                        self.secret['items'][key] = self.secret['item']
-                    self.secret['item'] = None
+                        self.secret.items[key] = (field_name, self.secret_item.get('Value', ''))
+                    self.secret_item = None
 
             # Save folder permission
             elif name == 'Permission' and self.stack[1] == 'Folders':
@@ -249,6 +307,17 @@ class DelineaXMLHandler(xml.sax.handler.ContentHandler):
                     self.folder['permissions'].append(self.folder['permission'])
                     self.folder['permission'] = None
 
+        elif len(self.stack) == 5:
+            # Save secret item text
+            if self.secret_item is not None and self.stack[1] == 'Secrets' and name in self.SECRET_ITEM_TAGS:
+                self.secret_item[name] = ''.join(self.text)
+                self.text.clear()
+
+    def endDocument(self):
+        """Release any secrets still held back if the export had no templates section"""
+        if self.on_secret is not None and not self.templates_done:
+            self.flush_pending_secrets()
+
     def characters(self, content):
         """Handle text content within XML tags"""
         if len(self.stack) < 4 or not content:
@@ -268,24 +337,14 @@ class DelineaXMLHandler(xml.sax.handler.ContentHandler):
                         if self.stack[5] in ('isurl', 'ispassword', 'isnotes', 'isfile'):
                             self.template['field']['slug_type'] = self.stack[5]
 
-        # Secret content
+        # Secret content: collect chunks, joined once when the tag closes
         elif self.stack[1] == 'Secrets' and self.secret:
             if len(self.stack) == 4:
-                if self.stack[3] == 'SecretName':
-                    self.secret['name'] += content
-                elif self.stack[3] == 'SecretTemplateName':
-                    self.secret['template'] += content
-                elif self.stack[3] == 'FolderPath':
-                    self.secret['folder'] += content
-                elif self.stack[3] == 'TotpKey':
-                    self.secret['totp_code'] += content
-            elif len(self.stack) == 6 and isinstance(self.secret['item'], dict):
-                if self.stack[5] == 'FieldName':
-                    self.secret['item']['field_name'] += content
-                elif self.stack[5] == 'Slug':
-                    self.secret['item']['slug'] += content
-                elif self.stack[5] == 'Value':
-                    self.secret['item']['value'] += content
+                if self.stack[3] in self.SECRET_TAGS:
+                    self.text.append(content)
+            elif len(self.stack) == 6 and self.secret_item is not None:
+                if self.stack[5] in self.SECRET_ITEM_TAGS:
+                    self.text.append(content)
 
         # Folder content
         elif self.stack[1] == 'Folders' and self.folder:
@@ -305,10 +364,104 @@ class DelineaXMLHandler(xml.sax.handler.ContentHandler):
                     self.folder['permission']['folder_role'] += content
 
 
+_worker_converter = None
+
+
+def _init_conversion_worker(org_id: Optional[str], templates: Dict):
+    """Set up a converter in each worker process of the conversion pool"""
+    global _worker_converter
+    _worker_converter = DelineaToBitwardenConverter('', org_id=org_id)
+    _worker_converter.handler.templates = templates
+
+
+def _convert_secret_batch(secrets: List[DelineaSecret]) -> tuple:
+    """Convert a batch of secrets in a worker process"""
+    return _worker_converter.convert_secrets(secrets)
+
+
+class ConversionPipeline:
+    """
+    Converts secrets into Bitwarden items while the XML is still being parsed.
+    The SAX handler feeds secrets into `submit`; they are batched and handed to a
+    pool of worker processes. With a single worker, batches are converted inline.
+    """
+
+    BATCH_SIZE = 256
+
+    def __init__(self, converter: 'DelineaToBitwardenConverter', workers: int):
+        self.converter = converter
+        self.workers = workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.batch: List[DelineaSecret] = []
+        self.in_flight = deque()  # (future, folder paths) in submission order
+        self.items: List[Dict] = []
+        self.folder_paths: List[str] = []  # Folder path for each converted item
+
+    def submit(self, secret: DelineaSecret):
+        """Queue a parsed secret for conversion"""
+        secret.folder = self.converter.trim_personal_folder(secret.folder)
+        self.batch.append(secret)
+        if len(self.batch) >= self.BATCH_SIZE:
+            self._dispatch()
+
+    def _dispatch(self):
+        batch, self.batch = self.batch, []
+        if not batch:
+            return
+        folder_paths = [secret.folder for secret in batch]
+
+        if self.workers <= 1:
+            self._collect(self.converter.convert_secrets(batch), folder_paths)
+            return
+
+        if self.executor is None:
+            # Created on the first batch, once the handler has read the template definitions
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_conversion_worker,
+                initargs=(self.converter.org_id, self.converter.handler.templates)
+            )
+        self.in_flight.append((self.executor.submit(_convert_secret_batch, batch), folder_paths))
+
+        # Keep the queue bounded so parsing can't run arbitrarily far ahead of conversion
+        while len(self.in_flight) > self.workers * 2:
+            future, paths = self.in_flight.popleft()
+            self._collect(future.result(), paths)
+
+    def _collect(self, result: tuple, folder_paths: List[str]):
+        items, warnings = result
+        for warning in warnings:
+            print(warning)
+        for item, folder_path in zip(items, folder_paths):
+            if item is not None:
+                self.items.append(item)
+                self.folder_paths.append(folder_path)
+
+    def finish(self) -> tuple:
+        """Convert whatever is left and return (items, folder paths)"""
+        self._dispatch()
+        while self.in_flight:
+            future, paths = self.in_flight.popleft()
+            self._collect(future.result(), paths)
+        self.close()
+        return self.items, self.folder_paths
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+
 class DelineaToBitwardenConverter:
     """Converts Delinea Secret Server data to Bitwarden JSON format"""
 
     PERSONAL_FOLDER_PREFIX = '\\Personal Folders'
+    DEFAULT_CHUNK_SIZE = 500  # Items per `bw import` call in direct import mode
+    DEFAULT_WORKERS = min(4, os.cpu_count() or 1)  # Secret conversion processes
+    # `bw import` errors that come from the connection or the server rather than the items
+    NON_ITEM_ERRORS = ('econnrefused', 'econnreset', 'etimedout', 'enotfound', 'eai_again', 'socket hang up',
+                       'fetch failed', 'network', 'internal server error', 'bad gateway', 'service unavailable',
+                       'gateway timeout', 'too many requests', 'not logged in', 'vault is locked')
 
     def __init__(self, xml_path: str, org_id: Optional[str] = None):
         self.xml_path = xml_path
@@ -316,9 +469,13 @@ class DelineaToBitwardenConverter:
         self.handler = DelineaXMLHandler()
         self.folder_map = {}  # Maps folder path to folder/collection ID
 
-    def parse_xml(self):
-        """Parse the XML export file"""
+    def parse_xml(self, on_secret=None):
+        """
+        Parse the XML export file.
+        If `on_secret` is given, each secret is passed to it as soon as it is parsed.
+        """
         print(f"Parsing XML export: {self.xml_path}")
+        self.handler.on_secret = on_secret
         try:
             xml.sax.parse(self.xml_path, self.handler)
         except xml.sax.SAXParseException as e:
@@ -342,7 +499,7 @@ class DelineaToBitwardenConverter:
             print(f"   {type(e).__name__}: {e}")
             sys.exit(1)
 
-        print(f"  Found {len(self.handler.secrets)} secrets")
+        print(f"  Found {self.handler.secret_count} secrets")
         print(f"  Found {len(self.handler.folders)} folders")
         print(f"  Found {len(self.handler.templates)} templates")
 
@@ -360,12 +517,12 @@ class DelineaToBitwardenConverter:
             folder['path'] = self.trim_personal_folder(folder['path'])
 
         for secret in self.handler.secrets:
-            secret['folder'] = self.trim_personal_folder(secret['folder'])
+            secret.folder = self.trim_personal_folder(secret.folder)
 
         # Remove empty root folder
         self.handler.folders = [f for f in self.handler.folders if f['path']]
 
-    def detect_item_type(self, secret: Dict, items: Dict) -> int:
+    def detect_item_type(self, secret: DelineaSecret, items: Dict) -> int:
         """
         Detect Bitwarden item type based on template and fields.
         Returns: 1=login, 2=note, 3=card, 4=identity, 5=sshKey
@@ -382,7 +539,7 @@ class DelineaToBitwardenConverter:
 
         Custom fields are created for any remaining unmapped fields.
         """
-        template_name = secret.get('template', '')
+        template_name = secret.template
 
         # Template-based detection
         if template_name in ('Pin', 'Security Alarm Code'):
@@ -417,15 +574,15 @@ class DelineaToBitwardenConverter:
     def has_field_value(self, items: Dict, key: str) -> bool:
         """Return True only if `key` exists and has a non-empty value."""
         field = items.get(key)
-        if not isinstance(field, dict):
+        if field is None:
             return False
-        return str(field.get('value', '')).strip() != ''
+        return field[1].strip() != ''
 
     def pop_field(self, items: Dict, key: str) -> tuple:
         """Remove and return a field from items dict"""
         field = items.pop(key, None)
-        value = field.get('value', '') if isinstance(field, dict) else ''
-        return str(value), field
+        value = field[1] if field is not None else ''
+        return value, field
 
     def pop_field_value(self, items: Dict, key: str) -> str:
         """Remove and return just the value from items dict"""
@@ -483,40 +640,31 @@ class DelineaToBitwardenConverter:
             print(f"  Warning: Failed to calculate SSH fingerprint: {e}")
             return None
 
-    def convert_secret_to_bitwarden_item(self, secret: Dict) -> Dict:
+    def convert_secret_to_bitwarden_item(self, secret: DelineaSecret) -> Dict:
         """Convert a Delinea secret to a Bitwarden item"""
-        items = secret['items'].copy()  # Make a copy so we can pop fields
+        items = secret.items.copy()  # Make a copy so we can pop fields
 
         # Detect item type
         item_type = self.detect_item_type(secret, items)
 
         # Base item structure
+        now = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
         item = {
             "id": str(uuid.uuid4()),
             "organizationId": self.org_id,  # None for personal vault, UUID for org
             "folderId": None,
             "type": item_type,
-            "name": secret.get('name', 'Untitled'),
+            "name": secret.name or 'Untitled',
             "notes": self.pop_field_value(items, 'notes'),
             "favorite": False,
             "fields": [],
-            "revisionDate": datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
-            "creationDate": datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+            "revisionDate": now,
+            "creationDate": now,
             "deletedDate": None
         }
 
         # Handle folder/collection assignment
-        folder_path = secret.get('folder', '')
-        if self.org_id:
-            # Organization mode: use collectionIds (array)
-            if folder_path and folder_path in self.folder_map:
-                item['collectionIds'] = [self.folder_map[folder_path]]
-            else:
-                item['collectionIds'] = []
-        else:
-            # Personal vault mode: use folderId (single value)
-            if folder_path and folder_path in self.folder_map:
-                item['folderId'] = self.folder_map[folder_path]
+        self.assign_folder(item, secret.folder)
 
         # Type-specific handling
         if item_type == 1:  # Login
@@ -535,7 +683,35 @@ class DelineaToBitwardenConverter:
 
         return item
 
-    def build_login(self, items: Dict, secret: Dict) -> Dict:
+    def convert_secrets(self, secrets: List[DelineaSecret]) -> tuple:
+        """
+        Convert a batch of secrets.
+        Returns (items, warnings) where items lines up with `secrets` and holds None for failures.
+        """
+        items = []
+        warnings = []
+        for secret in secrets:
+            try:
+                items.append(self.convert_secret_to_bitwarden_item(secret))
+            except Exception as e:
+                items.append(None)
+                warnings.append(f"  Warning: Failed to convert secret '{secret.name or 'Unknown'}': {e}")
+        return items, warnings
+
+    def assign_folder(self, item: Dict, folder_path: str):
+        """Set the item's folder or collection from its Delinea folder path"""
+        if self.org_id:
+            # Organization mode: use collectionIds (array)
+            if folder_path and folder_path in self.folder_map:
+                item['collectionIds'] = [self.folder_map[folder_path]]
+            else:
+                item['collectionIds'] = []
+        else:
+            # Personal vault mode: use folderId (single value)
+            if folder_path and folder_path in self.folder_map:
+                item['folderId'] = self.folder_map[folder_path]
+
+    def build_login(self, items: Dict, secret: DelineaSecret) -> Dict:
         """Build login object for Bitwarden"""
         login = {
             "username": "",
@@ -584,7 +760,7 @@ class DelineaToBitwardenConverter:
                 break
 
         # Extract TOTP
-        totp_code = secret.get('totp_code', '')
+        totp_code = secret.totp_code
         if totp_code:
             login['totp'] = f'otpauth://totp/?secret={totp_code}'
 
@@ -727,23 +903,16 @@ class DelineaToBitwardenConverter:
 
         return ssh_key
 
-    def build_custom_fields(self, items: Dict, secret: Dict) -> List[Dict]:
+    def build_custom_fields(self, items: Dict, secret: DelineaSecret) -> List[Dict]:
         """Build custom fields from remaining items"""
         fields = []
-        template_name = secret.get('template', '')
-        template = self.handler.templates.get(template_name, {})
+        template = self.handler.templates.get(secret.template, {})
         template_fields = template.get('fields', {})
 
-        for slug, item in items.items():
-            if not isinstance(item, dict):
-                continue
-
-            value = item.get('value', '')
+        for slug, (field_name, value) in items.items():
             if not value:
                 continue
 
-            field_name = item.get('field_name', slug)
-
             # Determine field type based on template metadata
             field_type = 0  # Default to text
             template_field = template_fields.get(slug, {})
@@ -791,8 +960,11 @@ class DelineaToBitwardenConverter:
 
         return result
 
-    def convert(self) -> Dict:
-        """Main conversion method"""
+    def convert(self, workers: int = DEFAULT_WORKERS) -> Dict:
+        """
+        Main conversion method.
+        Secrets are converted by `workers` processes while the XML is still being parsed.
+        """
         print("\nStarting conversion...")
 
         if self.org_id:
@@ -800,8 +972,14 @@ class DelineaToBitwardenConverter:
         else:
             print("Personal vault mode")
 
-        # Parse XML
-        self.parse_xml()
+        # Parse XML, converting secrets to items as they arrive
+        print(f"Converting secrets to Bitwarden items ({workers} worker(s))...")
+        pipeline = ConversionPipeline(self, workers)
+        try:
+            self.parse_xml(on_secret=pipeline.submit)
+            items, item_folder_paths = pipeline.finish()
+        finally:
+            pipeline.close()
 
         # Normalize folder paths
         print("Normalizing folder paths...")
@@ -814,15 +992,9 @@ class DelineaToBitwardenConverter:
             print("Building folder structure...")
         folders_or_collections = self.build_folders_or_collections()
 
-        # Convert secrets to items
-        print("Converting secrets to Bitwarden items...")
-        items = []
-        for idx, secret in enumerate(self.handler.secrets, 1):
-            try:
-                item = self.convert_secret_to_bitwarden_item(secret)
-                items.append(item)
-            except Exception as e:
-                print(f"  Warning: Failed to convert secret '{secret.get('name', 'Unknown')}': {e}")
+        # Folders may follow the secrets in the export, so assign them once all are known
+        for item, folder_path in zip(items, item_folder_paths):
+            self.assign_folder(item, folder_path)
 
         print(f"\nConversion complete!")
         if self.org_id:
@@ -843,18 +1015,147 @@ class DelineaToBitwardenConverter:
                 "items": items
             }
 
-    def import_to_bitwarden(self, session_key: str) -> bool:
+    def _import_payload(self, payload: Dict, env: Dict) -> subprocess.CompletedProcess:
+        """Write a payload to a temporary file and run `bw import` on it"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as tmp_file:
+            tmp_path = tmp_file.name
+            json.dump(payload, tmp_file, ensure_ascii=False, separators=(',', ':'))
+
+        try:
+            return subprocess.run(
+                ['bw', 'import', 'bitwardenjson', tmp_path],
+                capture_output=True,
+                text=True,
+                env=env
+            )
+        finally:
+            try:
+                Path(tmp_path).unlink()
+            except OSError:
+                pass
+
+    def import_folder_structure(self, folders: List[Dict], env: Dict) -> Dict[str, Dict]:
+        """
+        Import the folder structure on its own, before any items.
+        Returns a map of local folder ID to the folder as it now exists in the vault,
+        so every item chunk can reference the same folders instead of creating duplicates.
+        """
+        if not folders:
+            return {}
+
+        print(f"\nImporting {len(folders)} folders...")
+        result = self._import_payload({"folders": folders, "items": []}, env)
+        if result.returncode != 0:
+            raise RuntimeError(f"Folder import failed: {result.stderr.strip()}")
+
+        subprocess.run(['bw', 'sync'], capture_output=True, text=True, env=env)
+        list_result = subprocess.run(
+            ['bw', 'list', 'folders'],
+            capture_output=True,
+            text=True,
+            env=env
+        )
+        if list_result.returncode != 0:
+            raise RuntimeError(f"Could not list folders: {list_result.stderr.strip()}")
+
+        vault_folders = {f['name']: f for f in json.loads(list_result.stdout) if f.get('id')}
+
+        folder_id_map = {}
+        for folder in folders:
+            vault_folder = vault_folders.get(folder['name'])
+            if vault_folder:
+                folder_id_map[folder['id']] = {"id": vault_folder['id'], "name": vault_folder['name']}
+            else:
+                print(f"  Warning: Folder '{folder['name']}' was not found in the vault after import")
+
+        print(f"Folders imported ✓")
+        return folder_id_map
+
+    def build_chunk_payload(self, items: List[Dict], folders_by_id: Dict[str, Dict]) -> Dict:
+        """Build an import payload for a chunk, carrying only the folders its items reference"""
+        folders = {}
+        for item in items:
+            folder_id = item.get('folderId')
+            if folder_id and folder_id in folders_by_id:
+                folders[folder_id] = folders_by_id[folder_id]
+
+        return {
+            "folders": list(folders.values()),
+            "items": items
+        }
+
+    def check_import_error(self, error: str, env: Dict):
+        """
+        Raise RuntimeError if a failed `bw import` was down to the vault, the session, the network
+        or the server rather than the items, since splitting the chunk would only fail every item.
+        """
+        if any(marker in error.lower() for marker in self.NON_ITEM_ERRORS):
+            raise RuntimeError(f"bw import failed: {error}")
+
+        status_result = subprocess.run(['bw', 'status'], capture_output=True, text=True, env=env)
+        try:
+            status = json.loads(status_result.stdout).get('status')
+        except ValueError:
+            status = None
+        if status_result.returncode != 0 or status != 'unlocked':
+            raise RuntimeError(f"Vault is {status or 'unavailable'} ({error})")
+
+    def import_chunk(self, items: List[Dict], folders_by_id: Dict[str, Dict], env: Dict,
+                     failed: List[tuple], imported: Optional[set] = None):
+        """
+        Import a chunk of items.
+        If the CLI rejects the chunk, it is split in half and each half is retried,
+        so a bad item only fails itself; (item, error) is appended to `failed` for each one.
+        Failures that aren't down to the items raise RuntimeError instead (see check_import_error).
+        The id() of every imported item is added to `imported`, if given.
+        """
+        result = self._import_payload(self.build_chunk_payload(items, folders_by_id), env)
+        if result.returncode == 0:
+            if imported is not None:
+                imported.update(id(item) for item in items)
+            return
+
+        error = result.stderr.strip() or result.stdout.strip()
+        self.check_import_error(error, env)
+        if len(items) == 1:
+            print(f"    ❌ Failed to import '{items[0].get('name', 'Unknown')}': {error}")
+            failed.append((items[0], error))
+            return
+
+        mid = len(items) // 2
+        print(f"    Chunk of {len(items)} items failed, splitting into {mid} + {len(items) - mid}...")
+        self.import_chunk(items[:mid], folders_by_id, env, failed, imported)
+        self.import_chunk(items[mid:], folders_by_id, env, failed, imported)
+
+    def save_failed_items(self, failed: List[tuple], folders_by_id: Dict[str, Dict]) -> str:
+        """Save items that could not be imported, with their errors, for manual review"""
+        failed_items = [item for item, _ in failed]
+        payload = self.build_chunk_payload(failed_items, folders_by_id)
+        payload['errors'] = [
+            {"name": item.get('name', 'Unknown'), "error": error}
+            for item, error in failed
+        ]
+
+        with tempfile.NamedTemporaryFile(mode='w', prefix='bitwarden-failed-', suffix='.json',
+                                         delete=False, encoding='utf-8') as tmp_file:
+            json.dump(payload, tmp_file, indent=2, ensure_ascii=False)
+            return tmp_file.name
+
+    def import_to_bitwarden(self, session_key: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                            workers: int = DEFAULT_WORKERS) -> bool:
         """
         Convert and import directly to Bitwarden using CLI.
-        Returns True if successful, False otherwise.
+        Items are imported in chunks of `chunk_size` so large exports stay within
+        CLI memory and request size limits.
+        Returns True if every item was imported, False otherwise.
         """
         # Convert the data
-        bitwarden_data = self.convert()
-
-        # Write to temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as tmp_file:
-            tmp_path = tmp_file.name
-            json.dump(bitwarden_data, tmp_file, indent=2, ensure_ascii=False)
+        bitwarden_data = self.convert(workers=workers)
+        items = bitwarden_data['items']
+        folders = bitwarden_data.get('folders', [])
+        folders_by_id = None  # Vault folders by ID, once items have been remapped to them
+        failed = []
+        imported = set()  # id() of items already imported
 
         try:
             # Verify vault is unlocked before importing
@@ -870,6 +1171,9 @@ class DelineaToBitwardenConverter:
             if status_result.returncode == 0:
                 status = json.loads(status_result.stdout)
                 if status['status'] != 'unlocked':
+                    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as tmp_file:
+                        tmp_path = tmp_file.name
+                        json.dump(bitwarden_data, tmp_file, indent=2, ensure_ascii=False)
                     print(f"\n⚠️  Vault is {status['status']}, not unlocked!")
                     print(f"Please unlock your vault first, then retry the import.")
                     print(f"\nThe converted data has been saved to: {tmp_path}")
@@ -879,25 +1183,28 @@ class DelineaToBitwardenConverter:
                     return False
                 print(f"Vault is unlocked ✓")
 
-            print(f"\nImporting {len(bitwarden_data['items'])} items into Bitwarden...")
+            folder_id_map = self.import_folder_structure(folders, env)
+            for item in items:
+                vault_folder = folder_id_map.get(item.get('folderId'))
+                item['folderId'] = vault_folder['id'] if vault_folder else None
+            folders_by_id = {f['id']: f for f in folder_id_map.values()}
 
-            # Run bw import command
-            result = subprocess.run(
-                ['bw', 'import', 'bitwardenjson', tmp_path],
-                capture_output=True,
-                text=True,
-                env=env
-            )
+            chunk_size = max(1, chunk_size)
+            total_chunks = (len(items) + chunk_size - 1) // chunk_size
+            print(f"\nImporting {len(items)} items into Bitwarden in {total_chunks} chunk(s) of up to {chunk_size}...")
 
-            if result.returncode != 0:
-                print(f"\nImport failed: {result.stderr}")
-                print(f"\nThe converted data has been saved to: {tmp_path}")
-                print(f"You can try importing manually with:")
-                print(f"  bw import bitwardenjson {tmp_path}")
-                return False
+            for chunk_num, start in enumerate(range(0, len(items), chunk_size), 1):
+                chunk = items[start:start + chunk_size]
+                print(f"  [{chunk_num}/{total_chunks}] Importing items {start + 1}-{start + len(chunk)}...")
+                self.import_chunk(chunk, folders_by_id, env, failed, imported)
+
+            imported = len(items) - len(failed)
+            print(f"\nImported {imported}/{len(items)} items")
 
-            print("\nImport successful!")
-            print(result.stdout)
+            if failed:
+                failed_path = self.save_failed_items(failed, folders_by_id)
+                print(f"⚠️  {len(failed)} items could not be imported.")
+                print(f"They have been saved with their errors to: {failed_path}")
 
             # Sync vault to ensure changes are reflected
             print("\nSyncing vault...")
@@ -914,17 +1221,24 @@ class DelineaToBitwardenConverter:
                 print(f"Warning: Sync failed: {sync_result.stderr}")
                 print("You may need to manually sync with: bw sync")
 
-            # Clean up temp file on success
-            try:
-                Path(tmp_path).unlink()
-            except:
-                pass
-
-            return True
+            return not failed
 
         except Exception as e:
             print(f"\nError during import: {e}")
-            print(f"The converted data has been saved to: {tmp_path}")
+            if folders_by_id is None:
+                # Nothing has been imported yet, so the converted data can be imported as-is
+                with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as tmp_file:
+                    tmp_path = tmp_file.name
+                    json.dump(bitwarden_data, tmp_file, indent=2, ensure_ascii=False)
+                print(f"The converted data has been saved to: {tmp_path}")
+                return False
+
+            # Items now reference vault folders, so save only what is still missing, with those folders
+            settled = imported | {id(item) for item, _ in failed}
+            not_imported = failed + [(item, f"Not imported: {e}") for item in items if id(item) not in settled]
+            failed_path = self.save_failed_items(not_imported, folders_by_id)
+            print(f"Imported {len(items) - len(not_imported)}/{len(items)} items before the error.")
+            print(f"The {len(not_imported)} items not imported have been saved to: {failed_path}")
             return False
 
 
@@ -986,6 +1300,18 @@ Export Instructions:
         action='store_true',
         help='Output compact JSON (single line) instead of pretty-printed. Only used with --export or --export-org'
     )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DelineaToBitwardenConverter.DEFAULT_CHUNK_SIZE,
+        help=f'Number of items per import chunk (default: {DelineaToBitwardenConverter.DEFAULT_CHUNK_SIZE}). Only used with direct import'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DelineaToBitwardenConverter.DEFAULT_WORKERS,
+        help=f'Number of processes converting secrets while the XML is parsed (default: {DelineaToBitwardenConverter.DEFAULT_WORKERS}, 1 converts inline)'
+    )
 
     args = parser.parse_args()
 
@@ -1007,7 +1333,7 @@ Export Instructions:
         else:
             print("\n=== Personal Vault Export Mode ===")
 
-        bitwarden_data = converter.convert()
+        bitwarden_data = converter.convert(workers=args.workers)
 
         # Write output (pretty-print by default)
         print(f"\nWriting output to: {args.output}")
@@ -1036,7 +1362,7 @@ Export Instructions:
         session_key = auth.authenticate()
 
         # Convert and import
-        success = converter.import_to_bitwarden(session_key)
+        success = converter.import_to_bitwarden(session_key, chunk_size=args.chunk_size, workers=args.workers)
 
         if success:
             print("\n=== Migration Complete! ===")
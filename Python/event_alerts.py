@@ -0,0 +1,304 @@
+"""
+Streaming failed-login detection for Bitwarden event logs, used by generateEventLogReport.py
+and getEventLogsLiveFeed.py while they tail the event API.
+
+FailedLoginDetector watches events 1005/1006 and raises an alert when, within a sliding window:
+- one user fails to log in `user_failures` times (password guessing against one account),
+- one IP address produces `ip_failures` failures (brute force from one source), or
+- one IP address fails against `ip_users` different users (password spraying).
+
+Each user and IP gets a fixed ring of per-bucket counts, so memory per key is constant no
+matter how many events arrive, and keys with no failures inside the window are evicted.
+Window edges are accurate to one bucket (window / buckets seconds). A key alerts at most
+once per window, so a sustained attack produces one alert per window rather than one per event.
+
+Alerts go to AlertStdoutSink (printed immediately) and/or AlertWebhookSink (posted as JSON
+from a background thread, so a slow webhook never delays the poll loop).
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterable, List
+
+import requests
+
+from event_warehouse import parse_timestamp
+
+FAILED_LOGIN_TYPES    = {1005, 1006}
+DEFAULT_WINDOW        = 600  # seconds
+DEFAULT_BUCKETS       = 10
+DEFAULT_MAX_KEYS      = 100000
+
+
+class SlidingWindowCounter:
+    """Number of events in the last `window` seconds of event time, kept in a ring of buckets."""
+
+    __slots__ = ("bucket_seconds", "counts", "head", "total")
+
+    def __init__(self, window: int, buckets: int) -> None:
+        self.bucket_seconds = max(window // buckets, 1)
+        self.counts = [0] * buckets
+        self.head = None  # absolute index (ts // bucket_seconds) of the newest bucket
+        self.total = 0
+
+    def add(self, ts: int) -> int:
+        """Count one event at epoch second ts and return the total in the window."""
+        index = ts // self.bucket_seconds
+        if self.head is None:
+            self.head = index
+        elif index > self.head:
+            self._advance(index)
+        elif index <= self.head - len(self.counts):
+            return self.total  # older than the window
+        self.counts[index % len(self.counts)] += 1
+        self.total += 1
+        return self.total
+
+    def _advance(self, index: int) -> None:
+        size = len(self.counts)
+        if index - self.head >= size:
+            for slot in range(size):
+                self.counts[slot] = 0
+            self.total = 0
+        else:
+            for absolute in range(self.head + 1, index + 1):
+                slot = absolute % size
+                self.total -= self.counts[slot]
+                self.counts[slot] = 0
+        self.head = index
+
+
+class DistinctInWindow:
+    """The most recent `limit` distinct values seen within `window` seconds; enough to test a threshold."""
+
+    __slots__ = ("window", "limit", "last_seen")
+
+    def __init__(self, window: int, limit: int) -> None:
+        self.window = window
+        self.limit = limit
+        self.last_seen = OrderedDict()  # value -> newest ts, least recently seen first
+
+    def add(self, value: Any, ts: int) -> int:
+        """Record value at ts and return how many distinct values fall in the window (at most limit)."""
+        if ts > self.last_seen.get(value, -1):
+            self.last_seen[value] = ts
+            self.last_seen.move_to_end(value)
+        cutoff = ts - self.window
+        while self.last_seen and next(iter(self.last_seen.values())) <= cutoff:
+            self.last_seen.popitem(last=False)
+        while len(self.last_seen) > self.limit:
+            self.last_seen.popitem(last=False)
+        return len(self.last_seen)
+
+    def values(self) -> List[Any]:
+        return list(self.last_seen)
+
+
+class _KeyState:
+    __slots__ = ("failures", "users", "last_ts", "alerted_until")
+
+    def __init__(self, window: int, buckets: int, distinct_limit: int = 0) -> None:
+        self.failures = SlidingWindowCounter(window, buckets)
+        self.users = DistinctInWindow(window, distinct_limit) if distinct_limit else None
+        self.last_ts = 0
+        self.alerted_until = {}  # rule -> event time before which the rule stays quiet
+
+
+class _KeyTable:
+    """Per-key state, evicted once a key has had no events for a whole window (or past max_keys)."""
+
+    def __init__(self, window: int, buckets: int, max_keys: int, distinct_limit: int = 0) -> None:
+        self.window = window
+        self.buckets = buckets
+        self.max_keys = max_keys
+        self.distinct_limit = distinct_limit
+        self.states = OrderedDict()  # least recently updated first
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def get(self, key: str, ts: int) -> _KeyState:
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = _KeyState(self.window, self.buckets, self.distinct_limit)
+        else:
+            self.states.move_to_end(key)
+        state.last_ts = max(state.last_ts, ts)
+        self._evict(ts)
+        return state
+
+    def _evict(self, now: int) -> None:
+        while self.states:
+            key, oldest = next(iter(self.states.items()))
+            if oldest.last_ts > now - self.window and len(self.states) <= self.max_keys:
+                break
+            del self.states[key]
+            self.evicted += 1
+
+
+class FailedLoginDetector:
+    """Sliding-window thresholds on failed logins per user and per IP address."""
+
+    def __init__(self, user_failures: int = 5, ip_failures: int = 20, ip_users: int = 3,
+                 window: int = DEFAULT_WINDOW, buckets: int = DEFAULT_BUCKETS,
+                 max_keys: int = DEFAULT_MAX_KEYS) -> None:
+        for name, value in (("user_failures", user_failures), ("ip_failures", ip_failures),
+                            ("ip_users", ip_users), ("window", window), ("buckets", buckets)):
+            if value < 1:
+                raise ValueError(f"Alert {name} must be at least 1 (got {value})")
+        self.user_failures = user_failures
+        self.ip_failures = ip_failures
+        self.ip_users = ip_users
+        self.window = window
+        self.users = _KeyTable(window, buckets, max_keys)
+        self.ips = _KeyTable(window, buckets, max_keys, distinct_limit=ip_users)
+        self.failed_logins = 0
+        self.alerts = 0
+
+    def process(self, event_logs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Count the failed logins in a batch of events and return any alerts they trigger."""
+        failed = [log for log in event_logs if log.get('type') in FAILED_LOGIN_TYPES]
+        # The API pages newest first; counting in time order makes thresholds trip on the right event
+        failed.sort(key=lambda log: log.get('date') or "")
+
+        alerts = []
+        for log in failed:
+            try:
+                ts = parse_timestamp(log.get('date') or "")
+            except ValueError:
+                ts = int(time.time())
+            self.failed_logins += 1
+            user_id = log.get('actingUserId') or log.get('memberId')
+            ip = log.get('ipAddress')
+
+            if user_id:
+                state = self.users.get(user_id, ts)
+                count = state.failures.add(ts)
+                if count >= self.user_failures:
+                    self._fire(alerts, state, "user_failures", log, ts, count, self.user_failures,
+                               f"{count} failed logins for {self._describe_user(log, user_id)} "
+                               f"in {self.window // 60} min (last from {ip or 'unknown IP'})")
+            if ip:
+                state = self.ips.get(ip, ts)
+                count = state.failures.add(ts)
+                if count >= self.ip_failures:
+                    self._fire(alerts, state, "ip_failures", log, ts, count, self.ip_failures,
+                               f"{count} failed logins from {ip} in {self.window // 60} min")
+                if user_id:
+                    distinct = state.users.add(user_id, ts)
+                    if distinct >= self.ip_users:
+                        self._fire(alerts, state, "ip_users", log, ts, distinct, self.ip_users,
+                                   f"Failed logins for {distinct} different users from {ip} "
+                                   f"in {self.window // 60} min", users=state.users.values())
+        return alerts
+
+    def _fire(self, alerts: List[Dict[str, Any]], state: _KeyState, rule: str, log: Dict[str, Any],
+              ts: int, count: int, threshold: int, message: str, **extra: Any) -> None:
+        if ts < state.alerted_until.get(rule, 0):
+            return
+        state.alerted_until[rule] = ts + self.window
+        self.alerts += 1
+        alerts.append(dict({
+            "rule": rule,
+            "date": log.get('date'),
+            "count": count,
+            "threshold": threshold,
+            "windowMinutes": self.window // 60,
+            "userId": log.get('actingUserId') or log.get('memberId'),
+            "userEmail": log.get('userEmail'),
+            "ipAddress": log.get('ipAddress'),
+            "message": message,
+        }, **extra))
+
+    @staticmethod
+    def _describe_user(log: Dict[str, Any], user_id: str) -> str:
+        email = log.get('userEmail')
+        return email if email and email != 'Unknown' else user_id
+
+    def summary(self) -> str:
+        return (f"Failed-login detector: {self.failed_logins} failed logins, {self.alerts} alerts, "
+                f"tracking {len(self.users)} users and {len(self.ips)} IPs")
+
+
+class AlertStdoutSink:
+    """Print each alert on one line as soon as it fires."""
+
+    def send(self, alerts: List[Dict[str, Any]]) -> None:
+        for alert in alerts:
+            print(f"ALERT [{alert['rule']}] {alert['date']} {alert['message']}", flush=True)
+
+    def close(self) -> None:
+        pass
+
+    def summary(self) -> str:
+        return "Alerts printed to stdout"
+
+
+class AlertWebhookSink:
+    """POST each alert as JSON to a webhook from a background thread, retrying briefly on failure."""
+
+    def __init__(self, url: str, timeout: float = 10, retries: int = 3) -> None:
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.session = requests.Session()
+        self.queue = deque()
+        self.lock = threading.Condition()
+        self.closing = False
+        self.counters = {"sent": 0, "failed": 0}
+        self.thread = threading.Thread(target=self._run, name="alert-webhook", daemon=True)
+        self.thread.start()
+
+    def send(self, alerts: List[Dict[str, Any]]) -> None:
+        """Queue alerts for delivery; never blocks on the network."""
+        with self.lock:
+            self.queue.extend(alerts)
+            self.lock.notify()
+
+    def _post(self, alert: Dict[str, Any]) -> bool:
+        # "text" makes the payload readable as-is by Slack/Teams-style incoming webhooks
+        payload = dict(alert, text=f"Bitwarden alert: {alert['message']}")
+        for attempt in range(self.retries):
+            try:
+                response = self.session.post(self.url, data=json.dumps(payload),
+                                             headers={'Content-Type': 'application/json'}, timeout=self.timeout)
+                response.raise_for_status()
+                return True
+            except requests.exceptions.RequestException as e:
+                logging.warning(f"Alert webhook {self.url} failed (attempt {attempt + 1}): {e}")
+                if attempt + 1 < self.retries:
+                    time.sleep(2 ** attempt)
+        return False
+
+    def _run(self) -> None:
+        while True:
+            with self.lock:
+                while not self.queue and not self.closing:
+                    self.lock.wait()
+                if not self.queue:
+                    return
+                alert = self.queue.popleft()
+            delivered = self._post(alert)
+            with self.lock:
+                self.counters["sent" if delivered else "failed"] += 1
+
+    def close(self, timeout: float = 30) -> None:
+        """Deliver queued alerts (waiting up to timeout seconds), then stop."""
+        with self.lock:
+            self.closing = True
+            self.lock.notify()
+        self.thread.join(timeout)
+        with self.lock:
+            if self.queue:
+                logging.warning(f"{len(self.queue)} alerts could not be posted to {self.url} before exit")
+                self.counters["failed"] += len(self.queue)
+                self.queue.clear()
+        self.session.close()
+
+    def summary(self) -> str:
+        with self.lock:
+            return f"Alert webhook: sent {self.counters['sent']}, failed {self.counters['failed']}"
@@ -0,0 +1,193 @@
+"""
+Prometheus metrics for the live event feed (getEventLogsLiveFeed.py).
+
+A small HTTP endpoint serves the Prometheus text exposition format (version 0.0.4) from a
+daemon thread, so a daemonised feed can be scraped and alerted on. It needs no extra
+packages. The poll loop only adds to in-memory counters, which costs a few microseconds
+per poll. Feed lag is worked out when Prometheus scrapes, so it keeps growing while the
+loop is stuck.
+
+Exposed metrics (all prefixed bitwarden_feed_):
+- polls_total, poll_errors_total{kind="http"|"other"}
+- events_total, duplicate_events_total (re-fetched in the lookback and skipped)
+- poll_duration_seconds, fetch_duration_seconds (histograms)
+- last_success_timestamp_seconds, newest_event_timestamp_seconds
+- lag_seconds: how far the end of the last successfully fetched window is behind now
+
+Events per second and error rates come from rate() over the counters, e.g.
+    rate(bitwarden_feed_events_total[5m])
+    bitwarden_feed_lag_seconds > 300
+"""
+
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+
+CONTENT_TYPE          = "text/plain; version=0.0.4; charset=utf-8"
+DURATION_BUCKETS      = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count, optionally split by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.values = {} if labelnames else {(): 0}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labelvalues: str) -> None:
+        with self.lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            items = list(self.values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class Gauge:
+    """Current value, either set from the poll loop or computed by a function at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, function: Optional[Callable[[], Optional[float]]] = None) -> None:
+        self.name = name
+        self.help = help_text
+        self.function = function
+        self.value = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self) -> List[str]:
+        value = self.function() if self.function else self.value
+        return [] if value is None else [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram:
+    """Distribution of observed values over fixed cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DURATION_BUCKETS) -> None:
+        self.name = name
+        self.help = help_text
+        self.bounds = tuple(buckets) + (float("inf"),)
+        self.counts = [0] * len(self.bounds)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self.lock:
+            for index, bound in enumerate(self.bounds):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+            self.sum += value
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            counts, total_sum = list(self.counts), self.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.bounds, counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_format_value(total_sum)}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+
+class FeedMetrics:
+    """The live feed's metrics, updated once per poll and rendered on each scrape."""
+
+    def __init__(self) -> None:
+        self.last_window_end = None  # epoch seconds
+        self.polls = Counter("bitwarden_feed_polls_total", "Polls of the event API that completed.")
+        self.poll_errors = Counter("bitwarden_feed_poll_errors_total", "Polls that failed.", ("kind",))
+        for kind in ("http", "other"):
+            self.poll_errors.inc(0, kind)  # Export zeros so rate() works before the first error
+        self.events = Counter("bitwarden_feed_events_total", "New events returned by the feed.")
+        self.duplicates = Counter("bitwarden_feed_duplicate_events_total",
+                                  "Events fetched again in the lookback window and skipped.")
+        self.poll_duration = Histogram("bitwarden_feed_poll_duration_seconds",
+                                       "Time to fetch and output one poll's events.")
+        self.fetch_duration = Histogram("bitwarden_feed_fetch_duration_seconds",
+                                        "Time to fetch all pages of one window from the event API.")
+        self.last_success = Gauge("bitwarden_feed_last_success_timestamp_seconds",
+                                  "When the last poll completed, in Unix time.")
+        self.newest_event = Gauge("bitwarden_feed_newest_event_timestamp_seconds",
+                                  "Date of the newest event seen, in Unix time.")
+        self.lag = Gauge("bitwarden_feed_lag_seconds",
+                         "How far the end of the last fetched window is behind now.", self._lag)
+        self.metrics = [self.polls, self.poll_errors, self.events, self.duplicates, self.poll_duration,
+                        self.fetch_duration, self.last_success, self.newest_event, self.lag]
+
+    def _lag(self) -> Optional[float]:
+        if self.last_window_end is None:
+            return None
+        return max(time.time() - self.last_window_end, 0.0)
+
+    def poll_succeeded(self, duration: float, events: int, duplicates: int, window_end: float,
+                       newest_event: Optional[float] = None) -> None:
+        self.polls.inc()
+        self.events.inc(events)
+        self.duplicates.inc(duplicates)
+        self.poll_duration.observe(duration)
+        self.last_success.set(time.time())
+        self.last_window_end = window_end
+        if newest_event is not None and (self.newest_event.value is None or newest_event > self.newest_event.value):
+            self.newest_event.set(newest_event)
+
+    def poll_failed(self, kind: str) -> None:
+        self.poll_errors.inc(1, kind)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(metrics: FeedMetrics, port: int, address: str = "") -> ThreadingHTTPServer:
+    """Serve metrics.render() at /metrics on a daemon thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.debug(f"Metrics request from {self.client_address[0]}: {format % args}")
+
+    server = ThreadingHTTPServer((address, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logging.info(f"Serving Prometheus metrics on http://{address or '0.0.0.0'}:{port}/metrics")
+    return server
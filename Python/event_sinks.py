@@ -0,0 +1,420 @@
+"""
+Output sinks for Bitwarden event logs, shared by generateEventLogReport.py and getEventLogsLiveFeed.py.
+
+SyslogSink forwards events straight to a syslog collector / SIEM:
+- UDP (RFC 5426, one message per datagram), TCP (RFC 6587) or TLS (RFC 5425), with
+  RFC 5424 messages and octet-counting framing on TCP/TLS.
+- Messages are handed to a background sender that writes them in batches, so a slow
+  collector never blocks the poll loop.
+- UDP messages longer than a datagram can carry are truncated. A message that still fails with
+  a permanent error is dropped and counted; only transient errors are retried.
+- The in-memory buffer is bounded. When it is full, messages spill to a file on disk
+  (if a spill directory is given) and are sent, in order, once the collector catches up;
+  otherwise they are dropped and counted.
+
+RotatingFileSink keeps one buffered CSV or JSONL file open for the whole run:
+- Rotates to a new timestamped file by size and/or age, so a long tail produces bounded files.
+- Optional streaming gzip or zstd compression (zstd needs the zstandard package).
+- Flushes every few seconds from a timer and on close, so little is lost if the process dies.
+"""
+
+import csv
+import errno
+import gzip
+import io
+import json
+import logging
+import os
+import socket
+import ssl
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+SYSLOG_FACILITY_USER  = 1
+SEVERITY_WARNING      = 4
+SEVERITY_INFO         = 6
+WARNING_EVENT_TYPES   = {1005, 1006}  # Failed logins
+STRUCTURED_DATA_ID    = "bitwarden@32473"
+DEFAULT_SYSLOG_PORTS  = {"udp": 514, "tcp": 514, "tls": 6514}
+MAX_UDP_PAYLOAD       = 65507  # Largest IPv4 UDP datagram; longer messages are truncated
+# Send errors worth retrying; any other error for a datagram means that message can never be sent
+TRANSIENT_SEND_ERRORS = {errno.ECONNREFUSED, errno.ENOBUFS, errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR,
+                         errno.ENETUNREACH, errno.EHOSTUNREACH, errno.ENETDOWN, errno.EHOSTDOWN}
+
+
+def rfc5424_timestamp(date_str: Optional[str]) -> str:
+    """Bitwarden event date (up to 7 fractional digits) as an RFC 5424 TIMESTAMP (at most 6)."""
+    if not date_str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    head, _, frac = date_str.rstrip("Z").partition(".")
+    return f"{head}.{frac[:6]}Z" if frac else f"{head}Z"
+
+
+def _sd_escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("]", "\\]")
+
+
+def format_rfc5424(log: Dict[str, Any], columns: List[str], hostname: str, app_name: str, procid: str) -> str:
+    """
+    <PRI>1 TIMESTAMP HOSTNAME APP-NAME PROCID MSGID [bitwarden@32473 col="value" ...] event
+    MSGID is the event type code; failed logins are sent with warning severity.
+    """
+    severity = SEVERITY_WARNING if log.get('type') in WARNING_EVENT_TYPES else SEVERITY_INFO
+    pri = SYSLOG_FACILITY_USER * 8 + severity
+    params = " ".join(f'{col}="{_sd_escape(log[col])}"' for col in columns if log.get(col) is not None)
+    structured_data = f"[{STRUCTURED_DATA_ID} {params}]" if params else "-"
+    msgid = log.get('type', '-')
+    return (f"<{pri}>1 {rfc5424_timestamp(log.get('date'))} {hostname} {app_name} {procid} {msgid} "
+            f"{structured_data} {log.get('event', '')}".rstrip())
+
+
+class SyslogSink:
+    """Batched, buffered syslog forwarder over UDP, TCP or TLS."""
+
+    def __init__(self, host: str, port: Optional[int] = None, protocol: str = "udp",
+                 columns: Optional[List[str]] = None, app_name: str = "bitwarden-events",
+                 ca_file: Optional[str] = None, insecure: bool = False,
+                 max_buffer: int = 10000, batch_size: int = 200,
+                 spill_dir: Optional[str] = None, max_spill_bytes: int = 256 * 1024 * 1024) -> None:
+        if protocol not in DEFAULT_SYSLOG_PORTS:
+            raise ValueError(f"Unsupported syslog protocol: {protocol}")
+        self.host = host
+        self.port = port or DEFAULT_SYSLOG_PORTS[protocol]
+        self.protocol = protocol
+        self.columns = columns or []
+        self.app_name = app_name
+        self.hostname = socket.gethostname()
+        self.procid = str(os.getpid())
+        self.ca_file = ca_file
+        self.insecure = insecure
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.max_spill_bytes = max_spill_bytes
+
+        self.buffer = deque()
+        self.lock = threading.Condition()
+        self.sock = None
+        self.closing = False
+
+        # Disk spillover: messages are appended as JSON strings, one per line, and read back from spill_offset
+        self.spill_path = None
+        self.spill_offset = 0
+        self.spilling = False
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            fd, self.spill_path = tempfile.mkstemp(prefix="syslog-spill-", suffix=".jsonl", dir=spill_dir)
+            os.close(fd)
+
+        self.started = time.monotonic()
+        self.counters = {"queued": 0, "sent": 0, "batches": 0, "spilled": 0, "dropped": 0, "truncated": 0,
+                         "errors": 0}
+
+        self.thread = threading.Thread(target=self._run, name="syslog-sender", daemon=True)
+        self.thread.start()
+
+    # ------------------------------------------------------------------ producer side
+
+    def send(self, event_logs: Iterable[Dict[str, Any]]) -> None:
+        """Queue enriched events for delivery; never blocks on the network."""
+        messages = [format_rfc5424(log, self.columns, self.hostname, self.app_name, self.procid)
+                    for log in event_logs]
+        with self.lock:
+            self.counters["queued"] += len(messages)
+            overflow = []
+            for message in messages:
+                # Once anything has spilled, new messages follow it to disk to keep the order
+                if not self.spilling and not overflow and len(self.buffer) < self.max_buffer:
+                    self.buffer.append(message)
+                else:
+                    overflow.append(message)
+            if overflow:
+                self._spill(overflow)
+            self.lock.notify()
+
+    def _spill(self, messages: List[str]) -> None:
+        # Called with the lock held
+        if not self.spill_path or os.path.getsize(self.spill_path) >= self.max_spill_bytes:
+            self.counters["dropped"] += len(messages)
+            return
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(message) + "\n" for message in messages)
+        self.spilling = True
+        self.counters["spilled"] += len(messages)
+
+    def _refill_from_spill(self) -> None:
+        # Move up to max_buffer spilled messages back into memory; called with the lock held
+        with open(self.spill_path, "r", encoding="utf-8") as f:
+            f.seek(self.spill_offset)
+            while len(self.buffer) < self.max_buffer:
+                line = f.readline()
+                if not line:
+                    break
+                self.buffer.append(json.loads(line))
+            self.spill_offset = f.tell()
+        if self.spill_offset >= os.path.getsize(self.spill_path):
+            open(self.spill_path, "w").close()
+            self.spill_offset = 0
+            self.spilling = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.counters, buffered=len(self.buffer))
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        stats["rate"] = stats["sent"] / elapsed
+        return stats
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (f"Syslog {self.protocol}://{self.host}:{self.port}: sent {s['sent']} ({s['rate']:.1f}/s) "
+                f"in {s['batches']} batches, buffered {s['buffered']}, spilled {s['spilled']}, "
+                f"dropped {s['dropped']}, truncated {s['truncated']}, errors {s['errors']}")
+
+    def close(self, timeout: float = 30) -> None:
+        """Send what is buffered (waiting up to timeout seconds), then disconnect."""
+        with self.lock:
+            self.closing = True
+            self.lock.notify()
+        self.thread.join(timeout)
+        self._disconnect()
+        with self.lock:
+            if self.buffer:
+                logging.warning(f"{len(self.buffer)} syslog messages could not be delivered before exit")
+                self.counters["dropped"] += len(self.buffer)
+                self.buffer.clear()
+        if self.spill_path and not self.spilling:
+            os.remove(self.spill_path)
+        elif self.spill_path:
+            logging.warning(f"Undelivered syslog messages left in {self.spill_path}")
+
+    # ------------------------------------------------------------------ sender side
+
+    def _connect(self) -> None:
+        if self.protocol == "udp":
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.connect((self.host, self.port))
+            return
+        sock = socket.create_connection((self.host, self.port), timeout=30)
+        if self.protocol == "tls":
+            context = ssl.create_default_context(cafile=self.ca_file)
+            if self.insecure:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            sock = context.wrap_socket(sock, server_hostname=self.host)
+        self.sock = sock
+
+    def _disconnect(self) -> None:
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def _transmit(self, batch: List[str]) -> int:
+        """Send a batch and return how many of its messages were dropped as undeliverable."""
+        if self.sock is None:
+            self._connect()
+        if self.protocol == "udp":
+            return self._send_datagrams(batch)
+        else:
+            # Octet-counting framing: "<length> <message>", the whole batch in one write
+            frames = []
+            for message in batch:
+                data = message.encode("utf-8")
+                frames.append(f"{len(data)} ".encode("ascii") + data)
+            self.sock.sendall(b"".join(frames))
+            return 0
+
+    def _send_datagrams(self, batch: List[str]) -> int:
+        # One datagram per message. On a transient error, the messages already sent are removed
+        # from batch before re-raising, so only the rest are retried.
+        dropped = 0
+        for index, message in enumerate(batch):
+            data = message.encode("utf-8")
+            if len(data) > MAX_UDP_PAYLOAD:
+                data = data[:MAX_UDP_PAYLOAD].decode("utf-8", "ignore").encode("utf-8")
+                with self.lock:
+                    self.counters["truncated"] += 1
+            try:
+                self.sock.send(data)
+            except OSError as e:
+                if e.errno in TRANSIENT_SEND_ERRORS:
+                    with self.lock:
+                        self.counters["sent"] += index - dropped
+                        self.counters["dropped"] += dropped
+                    del batch[:index]
+                    raise
+                logging.warning(f"Dropping a syslog message that can't be sent to {self.host}:{self.port}: {e}")
+                dropped += 1
+        return dropped
+
+    def _run(self) -> None:
+        backoff = 1
+        while True:
+            with self.lock:
+                while not self.buffer and not self.spilling and not self.closing:
+                    self.lock.wait()
+                if not self.buffer and self.spilling:
+                    self._refill_from_spill()
+                if not self.buffer:
+                    return  # closing and nothing left to send
+                batch = [self.buffer.popleft() for _ in range(min(self.batch_size, len(self.buffer)))]
+
+            try:
+                dropped = self._transmit(batch)
+                backoff = 1
+                with self.lock:
+                    self.counters["sent"] += len(batch) - dropped
+                    self.counters["dropped"] += dropped
+                    self.counters["batches"] += 1
+            except OSError as e:
+                logging.warning(f"Syslog send to {self.host}:{self.port} failed: {e}")
+                self._disconnect()
+                with self.lock:
+                    self.counters["errors"] += 1
+                    self.buffer.extendleft(reversed(batch))
+                    if self.closing:
+                        return
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+
+class RotatingFileSink:
+    """
+    Long-lived CSV / JSONL writer with rotation and optional compression.
+
+    Without rotation, events are appended to `path` itself (with a CSV header if the file is new).
+    With max_bytes or rotate_seconds set, each file is named after the time it was opened,
+    e.g. events.csv -> events-20240112T133700.csv.gz. max_bytes is the (compressed) size on disk;
+    compressors buffer internally, so files can end up slightly larger.
+    """
+
+    def __init__(self, path: str, columns: List[str], fmt: str = "csv", compression: Optional[str] = None,
+                 max_bytes: Optional[int] = None, rotate_seconds: Optional[int] = None,
+                 flush_seconds: float = 5, buffer_size: int = 1024 * 1024) -> None:
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError(f"Unsupported output format: {fmt}")
+        if compression not in (None, "gzip", "zstd"):
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.path = path
+        self.columns = columns
+        self.fmt = fmt
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.flush_seconds = flush_seconds
+        self.buffer_size = buffer_size
+
+        self.lock = threading.Lock()
+        self.stream = None
+        self.writer = None
+        self.current_path = None
+        self.opened_at = 0.0
+        self.events_in_file = 0
+        self.events_written = 0
+        self.files_rotated = []
+        self.raw = None
+        self._open()
+
+        self.stop = threading.Event()
+        self.flusher = threading.Thread(target=self._flush_periodically, name="file-sink-flush", daemon=True)
+        self.flusher.start()
+
+    def _file_name(self) -> str:
+        suffix = {"gzip": ".gz", "zstd": ".zst"}.get(self.compression, "")
+        if not (self.max_bytes or self.rotate_seconds):
+            return self.path if self.path.endswith(suffix) else self.path + suffix
+        base, ext = os.path.splitext(self.path)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        name = f"{base}-{stamp}{ext}{suffix}"
+        counter = 1
+        while os.path.exists(name):
+            name = f"{base}-{stamp}-{counter}{ext}{suffix}"
+            counter += 1
+        return name
+
+    def _open(self) -> None:
+        self.current_path = self._file_name()
+        is_new = not os.path.exists(self.current_path) or os.path.getsize(self.current_path) == 0
+        raw = self.raw = open(self.current_path, "ab", buffering=self.buffer_size)
+        if self.compression == "gzip":
+            binary = gzip.GzipFile(fileobj=raw, mode="ab")
+        elif self.compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raw.close()
+                raise RuntimeError("zstd compression needs the zstandard package: pip install zstandard")
+            binary = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        else:
+            binary = raw
+        self.stream = io.TextIOWrapper(binary, encoding="utf-8", newline="", write_through=False)
+        self.opened_at = time.monotonic()
+        self.events_in_file = 0
+        if self.fmt == "csv":
+            self.writer = csv.writer(self.stream)
+            if is_new:
+                self.writer.writerow(self.columns)
+
+    def _close_current(self) -> None:
+        self.stream.close()  # Also finishes the gzip / zstd stream
+        if not self.raw.closed:
+            self.raw.close()
+
+    def _rotate(self) -> None:
+        # The next file is only opened when there is something to write to it
+        self._close_current()
+        self.files_rotated.append(self.current_path)
+        self.stream = None
+
+    def _due_for_rotation(self) -> bool:
+        if not self.events_in_file:
+            return False
+        if self.max_bytes and self.raw.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.monotonic() - self.opened_at >= self.rotate_seconds
+
+    def send(self, event_logs: Iterable[Dict[str, Any]]) -> None:
+        with self.lock:
+            for log in event_logs:
+                if self.stream is None:
+                    self._open()
+                elif self._due_for_rotation():
+                    self._rotate()
+                    self._open()
+                if self.fmt == "csv":
+                    self.writer.writerow([log.get(col) for col in self.columns])
+                else:
+                    self.stream.write(json.dumps(log, default=str) + "\n")
+                self.events_in_file += 1
+                self.events_written += 1
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.stream is None:
+                return
+            if self.rotate_seconds and self._due_for_rotation():
+                self._rotate()
+            else:
+                self.stream.flush()
+
+    def _flush_periodically(self) -> None:
+        while not self.stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not flush {self.current_path}: {e}")
+
+    def close(self) -> None:
+        self.stop.set()
+        self.flusher.join()
+        with self.lock:
+            if self.stream is not None:
+                self._close_current()
+
+    def summary(self) -> str:
+        return f"{self.events_written} events written to {self.current_path} ({len(self.files_rotated)} earlier files rotated)"
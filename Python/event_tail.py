@@ -0,0 +1,101 @@
+"""
+Loss-free tailing of Bitwarden event logs.
+
+Advancing the next query to just after the newest event seen drops events that share that
+timestamp but arrive in a later page or poll, and events that reach the API late because of
+clock skew. EventTailer instead re-queries a short lookback before the end of the previous
+window on every poll, and remembers the fingerprints of recently returned events so that
+each event is returned exactly once.
+
+The fingerprint memory is bounded: entries are dropped once they fall out of the lookback
+window, and a size cap protects against runaway growth at extreme event rates.
+"""
+
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from event_warehouse import canonical_event, parse_timestamp
+
+DATE_FORMAT          = "%Y-%m-%dT%H:%M:%S.%fZ"
+DEFAULT_LOOKBACK     = timedelta(minutes=2)
+DEFAULT_MAX_SEEN     = 200000
+
+
+class SeenEvents:
+    """Bounded set of event fingerprints, evicted oldest event time first."""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SEEN) -> None:
+        self.max_size = max_size
+        self.fingerprints = set()
+        self.order = deque()  # (event time in epoch seconds, fingerprint), in insertion order
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self.fingerprints
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def add(self, fingerprint: str, ts: int) -> None:
+        self.fingerprints.add(fingerprint)
+        self.order.append((ts, fingerprint))
+        if len(self.order) > self.max_size:
+            _, oldest = self.order.popleft()
+            self.fingerprints.discard(oldest)
+
+    def forget_before(self, ts: int) -> None:
+        """Drop fingerprints of events older than ts; they can no longer be returned by the API."""
+        # Events usually arrive roughly in time order, so older entries are found at the left.
+        # An out-of-order entry stays until the entries before it expire or the size cap removes it.
+        while self.order and self.order[0][0] < ts:
+            _, fingerprint = self.order.popleft()
+            self.fingerprints.discard(fingerprint)
+
+
+class EventTailer:
+    """
+    Polls `fetch(start, end)` for overlapping windows and returns each event once.
+
+    fetch receives the window as DATE_FORMAT strings and must return every event in it
+    (all pages). The events returned by poll() are the API's own dicts, untouched.
+    """
+
+    def __init__(self, fetch: Callable[[str, str], List[Dict[str, Any]]],
+                 start: Optional[datetime] = None,
+                 lookback: timedelta = DEFAULT_LOOKBACK,
+                 max_seen: int = DEFAULT_MAX_SEEN) -> None:
+        self.fetch = fetch
+        self.lookback = lookback
+        self.seen = SeenEvents(max_size=max_seen)
+        self.window_end = start or datetime.now(timezone.utc)
+        self.duplicates = 0
+
+    def poll(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Fetch events since the previous window's end minus the lookback, without repeats."""
+        end = now or datetime.now(timezone.utc)
+        start = self.window_end - self.lookback
+        event_logs = self.fetch(start.strftime(DATE_FORMAT), end.strftime(DATE_FORMAT))
+
+        # Anything older than this poll's window start can't be fetched again
+        self.seen.forget_before(int(start.timestamp()))
+
+        new_logs = []
+        for log in event_logs:
+            fingerprint, _ = canonical_event(log)
+            if fingerprint in self.seen:
+                self.duplicates += 1
+                continue
+            try:
+                ts = parse_timestamp(log.get('date') or "")
+            except ValueError:
+                ts = int(end.timestamp())
+            self.seen.add(fingerprint, ts)
+            new_logs.append(log)
+
+        if len(self.seen) >= self.seen.max_size:
+            logging.warning(f"Seen-event buffer is full ({self.seen.max_size}); "
+                            "shorten the interval or lookback to keep the feed exactly-once")
+
+        self.window_end = end
+        return new_logs
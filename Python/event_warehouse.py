@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+
+"""
+Bitwarden Event Warehouse
+=========================
+
+Keeps a local SQLite copy of an organization's event logs so reports and ad-hoc questions
+don't have to download the same history from the API again.
+
+- sync  : fetch only the events since the end of the last completed sync (high-watermark) and store them.
+          Re-fetches a short overlap before the watermark; events already stored are skipped.
+          The watermark only moves once a whole sync window is stored, so an interrupted sync, or live
+          events written by generateEventLogReport.py, never make later syncs skip older events.
+- query : answer questions from the local store, without calling the API.
+
+generateEventLogReport.py can also write into the same store while it runs (--event_store).
+
+Usage:
+------
+python event_warehouse.py sync --client_id $CLIENT_ID --client_secret $CLIENT_SECRET --days 90
+python event_warehouse.py query --type failed_login --user alice@example.com --days 30
+python event_warehouse.py query --item 5f3c2a1b --count
+python event_warehouse.py query --ip 203.0.113.7 --since 2024-01-01 --output_csv ip.csv
+
+Optional Arguments:
+-------------------
+--db                : SQLite database file (default: bitwarden_events.db).
+
+sync:
+  --vault_uri, --api_url : Adjust Bitwarden endpoints (defaults shown).
+  --days                 : History to fetch on the first sync (default: 90).
+
+query:
+  --user        : Member email, name or ID (matches the acting user and the member acted on).
+  --item        : Item ID, or the start of one.
+  --type        : Event type codes or names (failed_login, login, view, autofill, export, ...).
+  --days        : Only events from the last N days.
+  --since/until : Only events from/before this date (YYYY-MM-DD or ISO 8601).
+  --ip          : Only events from this IP address.
+  --count       : Print the number of matching events only.
+  --limit       : Maximum number of events to print (default: 1000).
+  --output_csv  : Write the matching events to CSV instead of printing them.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+DEFAULT_VAULT_URI = "https://vault.bitwarden.com"
+DEFAULT_API_URL   = "https://api.bitwarden.com"
+DEFAULT_DB_PATH   = "bitwarden_events.db"
+DATE_FORMAT       = "%Y-%m-%dT%H:%M:%S.%fZ"
+SYNC_LOOKBACK     = timedelta(minutes=10)  # Overlap re-fetched before the watermark to catch late events
+
+# Names accepted by `query --type`
+EVENT_TYPE_ALIASES = {
+    "login": [1000],
+    "failed_login": [1005, 1006],
+    "password_change": [1001],
+    "export": [1007, 1602],
+    "create": [1100],
+    "edit": [1101],
+    "delete": [1102, 1115],
+    "view": [1107, 1108, 1109, 1110, 1117],
+    "copy": [1111, 1112, 1113],
+    "autofill": [1114],
+}
+
+EVENT_COLUMNS = ["type", "actingUserId", "memberId", "itemId", "collectionId", "groupId",
+                 "policyId", "device", "ipAddress"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    fingerprint  TEXT PRIMARY KEY,
+    ts           INTEGER NOT NULL,
+    date         TEXT NOT NULL,
+    type         INTEGER,
+    actingUserId TEXT,
+    memberId     TEXT,
+    itemId       TEXT,
+    collectionId TEXT,
+    groupId      TEXT,
+    policyId     TEXT,
+    device       INTEGER,
+    ipAddress    TEXT,
+    raw          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_type_ts ON events (type, ts);
+CREATE INDEX IF NOT EXISTS events_acting_user_ts ON events (actingUserId, ts);
+CREATE INDEX IF NOT EXISTS events_member_ts ON events (memberId, ts);
+CREATE INDEX IF NOT EXISTS events_item_ts ON events (itemId, ts);
+CREATE TABLE IF NOT EXISTS members (
+    id     TEXT PRIMARY KEY,
+    userId TEXT,
+    email  TEXT,
+    name   TEXT
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+# adoption-report/adoption_report.py carries an identical copy of parse_timestamp, duplicated on
+# purpose because that script doesn't depend on anything outside its folder. Change both together;
+# benchmarks/bench_parse_timestamp.py checks that they agree.
+_DAY_EPOCHS: Dict[str, int] = {}  # "2024-05-01T" -> epoch of that midnight, one entry per day seen
+_DAY_SECONDS: Dict[str, int] = {}  # "12:34:56" -> seconds into the day, at most 86400 entries
+
+
+def parse_timestamp(date_str: str) -> int:
+    """
+    Return a Bitwarden event timestamp (2024-05-01T12:34:56.1234567Z) as epoch seconds (UTC).
+
+    Called for every event, so instead of parsing each string with datetime, its date and its time
+    of day are looked up in caches that nearly always hit. Raises ValueError if unparseable.
+    """
+    day = _DAY_EPOCHS.get(date_str[:11])
+    seconds = _DAY_SECONDS.get(date_str[11:19])
+    if day is None or seconds is None:
+        return _parse_timestamp_uncached(date_str)
+    return day + seconds
+
+
+def _parse_timestamp_uncached(date_str: str) -> int:
+    dt = datetime.fromisoformat(date_str[:19]).replace(tzinfo=timezone.utc)
+    if date_str[4:5] + date_str[7:8] + date_str[10:11] + date_str[13:14] + date_str[16:17] in ('--T::', '-- ::'):
+        _DAY_EPOCHS[date_str[:11]] = int(dt.replace(hour=0, minute=0, second=0).timestamp())
+        _DAY_SECONDS[date_str[11:19]] = dt.hour * 3600 + dt.minute * 60 + dt.second
+    return int(dt.timestamp())
+
+
+def canonical_event(event: Dict[str, Any]) -> Tuple[str, str]:
+    """Return (fingerprint, JSON) of an event. Events have no ID, so they are identified by content."""
+    raw = json.dumps(event, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest(), raw
+
+
+class EventWarehouse:
+    """SQLite store of raw event logs, indexed on date, type, user and item."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH) -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def add_events(self, event_logs: Iterable[Dict[str, Any]]) -> int:
+        """Store events, skipping ones already stored. Returns the number of new events."""
+        rows = []
+        for log in event_logs:
+            date_str = log.get('date')
+            if not date_str:
+                continue
+            try:
+                ts = parse_timestamp(date_str)
+            except ValueError:
+                continue
+            fingerprint, raw = canonical_event(log)
+            rows.append((fingerprint, ts, date_str, *(log.get(c) for c in EVENT_COLUMNS), raw))
+
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO events (fingerprint, ts, date, {', '.join(EVENT_COLUMNS)}, raw) "
+                f"VALUES ({', '.join('?' * (len(EVENT_COLUMNS) + 4))})",
+                rows)
+            added = self.conn.total_changes - before
+        return added
+
+    def set_members(self, members: Dict[str, Any]) -> None:
+        """Replace the stored members with the `/public/members` response."""
+        with self.conn:
+            self.conn.execute("DELETE FROM members")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO members (id, userId, email, name) VALUES (?, ?, ?, ?)",
+                [(m.get('id'), m.get('userId'), m.get('email'), m.get('name')) for m in members.get('data', [])])
+
+    def get_watermark(self) -> Optional[datetime]:
+        """Return the end of the last sync window that was stored completely."""
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = 'synced_until'").fetchone()
+        return datetime.fromtimestamp(int(row[0]), tz=timezone.utc) if row else None
+
+    def set_watermark(self, synced_until: datetime) -> None:
+        """Record that every event up to synced_until is stored. Never moves the watermark back."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO sync_state (key, value) VALUES ('synced_until', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = MAX(CAST(value AS INTEGER), CAST(excluded.value AS INTEGER))",
+                (int(synced_until.timestamp()),))
+
+    def resolve_user_ids(self, user: str) -> List[str]:
+        """Return the member and user IDs for a member email, name or ID."""
+        rows = self.conn.execute(
+            "SELECT id, userId FROM members WHERE id = ?1 OR userId = ?1 "
+            "OR email = ?1 COLLATE NOCASE OR name = ?1 COLLATE NOCASE",
+            (user,)).fetchall()
+        return [i for row in rows for i in row if i] or [user]
+
+    def query(self, types: Optional[List[int]] = None, user: Optional[str] = None, item: Optional[str] = None,
+              ip: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None,
+              limit: Optional[int] = None, count: bool = False):
+        """Return matching events (newest first) as dicts, or their number when count is set."""
+        where, params = [], []
+        if types:
+            where.append(f"type IN ({', '.join('?' * len(types))})")
+            params.extend(types)
+        if item:
+            if len(item) == 36:
+                where.append("itemId = ?")
+                params.append(item)
+            else:
+                where.append("itemId >= ? AND itemId < ?")
+                params.extend([item, item + "\uffff"])
+        if ip:
+            where.append("ipAddress = ?")
+            params.append(ip)
+        if since:
+            where.append("ts >= ?")
+            params.append(int(since.timestamp()))
+        if until:
+            where.append("ts < ?")
+            params.append(int(until.timestamp()))
+
+        if user:
+            # One indexed lookup for each user column, instead of an OR that SQLite can't index
+            ids = self.resolve_user_ids(user)
+            marks = ', '.join('?' * len(ids))
+            source = " UNION ".join(
+                f"SELECT fingerprint, ts, raw FROM events WHERE {' AND '.join([f'{column} IN ({marks})'] + where)}"
+                for column in ("actingUserId", "memberId"))
+            source, params = f"({source})", ids + params + ids + params
+            clause = ""
+        else:
+            source = "events"
+            clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+        if count:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {source}{clause}", params).fetchone()[0]
+
+        sql = f"SELECT raw FROM {source}{clause} ORDER BY ts DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [json.loads(raw) for (raw,) in self.conn.execute(sql, params)]
+
+    def member_names(self) -> Dict[str, Tuple[str, str]]:
+        """Return {member or user ID: (email, name)}."""
+        names = {}
+        for member_id, user_id, email, name in self.conn.execute("SELECT id, userId, email, name FROM members"):
+            names[member_id] = (email or "", name or "")
+            if user_id:
+                names[user_id] = (email or "", name or "")
+        return names
+
+
+def get_access_token(client_id: str, client_secret: str, vault_uri: str) -> str:
+    """Obtain an OAuth2 access token from Bitwarden."""
+    url = f"{vault_uri}/identity/connect/token"
+    payload = {
+        'grant_type': 'client_credentials',
+        'client_id': client_id,
+        'client_secret': client_secret,
+        'scope': 'api.organization'
+    }
+    resp = requests.post(url, data=payload)
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+def sync(warehouse: EventWarehouse, session: requests.Session, api_url: str, days: int) -> int:
+    """
+    Fetch events since the watermark (or the last `days` days) into the warehouse. The API pages
+    newest first, so the watermark only moves to the window's end once every page is stored.
+    """
+    members = session.get(f"{api_url}/public/members")
+    members.raise_for_status()
+    warehouse.set_members(members.json())
+
+    end = datetime.now(timezone.utc)
+    watermark = warehouse.get_watermark()
+    start = watermark - SYNC_LOOKBACK if watermark else end - timedelta(days=days)
+    logging.info(f"Syncing events from {start.strftime(DATE_FORMAT)} to {end.strftime(DATE_FORMAT)}...")
+
+    params = {'start': start.strftime(DATE_FORMAT), 'end': end.strftime(DATE_FORMAT)}
+    fetched = added = 0
+    while True:
+        resp = session.get(f"{api_url}/public/events", params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        page = data.get("data", [])
+        fetched += len(page)
+        added += warehouse.add_events(page)
+        if not data.get("continuationToken"):
+            break
+        params['continuationToken'] = data["continuationToken"]
+
+    warehouse.set_watermark(end)
+    logging.info(f"Fetched {fetched} events, {added} new")
+    return added
+
+
+def parse_date_arg(value: str) -> datetime:
+    dt = datetime.fromisoformat(value.rstrip('Z'))
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def parse_types(values: Optional[List[str]]) -> Optional[List[int]]:
+    if not values:
+        return None
+    types = []
+    for value in values:
+        for part in value.split(','):
+            part = part.strip().lower()
+            if part in EVENT_TYPE_ALIASES:
+                types.extend(EVENT_TYPE_ALIASES[part])
+            else:
+                types.append(int(part))
+    return types
+
+
+def print_events(warehouse: EventWarehouse, events: List[Dict[str, Any]], output_csv: Optional[str]) -> None:
+    names = warehouse.member_names()
+    columns = ["date", "type", "userEmail", "memberEmail", "device", "ipAddress", "itemId", "collectionId"]
+    rows = []
+    for event in events:
+        rows.append({
+            "date": event.get("date", ""),
+            "type": event.get("type", ""),
+            "userEmail": names.get(event.get("actingUserId"), ("", ""))[0],
+            "memberEmail": names.get(event.get("memberId"), ("", ""))[0],
+            "device": event.get("device", ""),
+            "ipAddress": event.get("ipAddress") or "",
+            "itemId": event.get("itemId") or "",
+            "collectionId": event.get("collectionId") or "",
+        })
+
+    if output_csv:
+        with open(output_csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+        logging.info(f"{len(rows)} events saved to {output_csv}")
+        return
+
+    widths = {c: max([len(c)] + [len(str(r[c])) for r in rows]) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local store of Bitwarden event logs.")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help=f"SQLite database file (default: {DEFAULT_DB_PATH})")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sync_parser = subparsers.add_parser('sync', help="Fetch new events from the API into the local store")
+    sync_parser.add_argument('--client_id', required=True, help="Bitwarden Client ID")
+    sync_parser.add_argument('--client_secret', required=True, help="Bitwarden Client Secret")
+    sync_parser.add_argument('--vault_uri', default=DEFAULT_VAULT_URI, help="Bitwarden Vault URI")
+    sync_parser.add_argument('--api_url', default=DEFAULT_API_URL, help="Bitwarden API URL")
+    sync_parser.add_argument('--days', type=int, default=90, help="History to fetch on the first sync (default: 90)")
+
+    query_parser = subparsers.add_parser('query', help="Query the local store")
+    query_parser.add_argument('--user', help="Member email, name or ID")
+    query_parser.add_argument('--item', help="Item ID, or the start of one")
+    query_parser.add_argument('--type', nargs='+', help="Event type codes or names (e.g. failed_login, view, 1107)")
+    query_parser.add_argument('--days', type=int, help="Only events from the last N days")
+    query_parser.add_argument('--since', type=parse_date_arg, help="Only events from this date")
+    query_parser.add_argument('--until', type=parse_date_arg, help="Only events before this date")
+    query_parser.add_argument('--ip', help="Only events from this IP address")
+    query_parser.add_argument('--count', action='store_true', help="Print the number of matching events only")
+    query_parser.add_argument('--limit', type=int, default=1000, help="Maximum number of events to print (default: 1000)")
+    query_parser.add_argument('--output_csv', help="Write the matching events to CSV")
+
+    args = parser.parse_args()
+    warehouse = EventWarehouse(args.db)
+
+    try:
+        if args.command == 'sync':
+            session = requests.Session()
+            session.headers["Authorization"] = f"Bearer {get_access_token(args.client_id, args.client_secret, args.vault_uri)}"
+            sync(warehouse, session, args.api_url, args.days)
+            return
+
+        try:
+            types = parse_types(args.type)
+        except ValueError:
+            parser.error(f"Unknown event type in {args.type}. Use a number or one of: {', '.join(EVENT_TYPE_ALIASES)}")
+        since = args.since
+        if args.days is not None:
+            since = datetime.now(timezone.utc) - timedelta(days=args.days)
+
+        started = time.perf_counter()
+        result = warehouse.query(types=types, user=args.user, item=args.item, ip=args.ip, since=since,
+                                 until=args.until, limit=None if args.output_csv else args.limit, count=args.count)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if args.count:
+            print(result)
+        else:
+            print_events(warehouse, result, args.output_csv)
+        logging.info(f"Query took {elapsed_ms:.1f} ms")
+
+    except requests.exceptions.RequestException as e:
+        logging.error(f"HTTP request failed: {e}")
+        sys.exit(1)
+    finally:
+        warehouse.close()
+
+
+if __name__ == "__main__":
+    main()
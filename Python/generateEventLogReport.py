@@ -10,8 +10,8 @@ This script can fetch event logs from the Bitwarden API:
 
 Changes: 
 --------
-1. Uses `dateutil.parser.parse` to handle all inbound timestamps from the Bitwarden API,
-   ensuring the script can handle fractional seconds, offsets, and other ISO-8601 variants.
+1. Live mode re-queries a short lookback on every fetch and skips events it already returned
+   (see event_tail.py), so events sharing a timestamp or arriving late are not dropped.
 
 Arguments:
 ----------
@@ -23,11 +23,21 @@ Optional:
 --start_date, --end_date     : For single-run mode. ISO8601 timestamps.
 --columns                    : Columns to display (default: event, device, date, userName, userEmail, ipAddress).
 --failed_login_attempt       : Show only events 1005/1006 (invalid login attempts).
+--alert_failed_logins        : Print an alert when failed logins cross a threshold (see event_alerts.py):
+  --alert_user_failures (5 per user), --alert_ip_failures (20 per IP), --alert_ip_users (3 users per IP),
+  --alert_window (minutes, default 10), --alert_webhook (also POST alerts as JSON to this URL)
 --syslog                     : Print logs in a syslog format.
---output_csv                 : Save logs to CSV at this path.
+--syslog_host                : Forward logs to this syslog collector (RFC 5424), see also:
+  --syslog_port, --syslog_protocol (udp/tcp/tls), --syslog_ca_file, --syslog_insecure, --syslog_spill_dir
+--output_csv                 : Save logs to CSV at this path (the file stays open and is flushed every few seconds).
+--output_jsonl               : Save logs as JSON lines at this path.
+--rotate_mb, --rotate_minutes: Start a new timestamped output file after this much data / time.
+--compress                   : Compress output files with gzip or zstd (zstd needs the zstandard package).
 --cache_members              : Cache the members in /tmp/bitwarden_members_cache.json for faster reruns.
 --live                       : Run continuously, fetching only new logs since the last retrieved event time.
 --interval                   : Seconds to wait between fetches in live mode (default: 60).
+--lookback                   : Seconds of overlap re-queried on every fetch to catch late events (default: 120).
+--event_store                : Also keep every fetched event in this local SQLite store (see event_warehouse.py).
 """
 
 import argparse
@@ -38,10 +48,15 @@ import json
 import os
 import socket
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any
 
 import pandas as pd
-from dateutil import parser as date_parser
+
+from event_alerts import AlertStdoutSink, AlertWebhookSink, FailedLoginDetector
+from event_enrich import EventEnricher
+from event_sinks import RotatingFileSink, SyslogSink
+from event_tail import EventTailer
+from event_warehouse import EventWarehouse
 
 # Constants
 DEFAULT_VAULT_URI = "https://vault.bitwarden.com"
@@ -152,6 +167,18 @@ DEVICE_TYPE_MAPPING = {
     -1: "Unknown Device Type"
 }
 
+def device_label(device_name: str) -> str:
+    """Label shown for a device type, e.g. "Safari" -> "Web vault - Safari"."""
+    if 'CLI' in device_name:
+        # e.g., "CLI - 1.29.0"
+        return f"CLI - {device_name.split()[-1]}"
+    if ('Extension' not in device_name) and ('Unknown' not in device_name):
+        return f"Web vault - {device_name}"
+    return device_name
+
+# Labels for every known device code, worked out once instead of for every event
+DEVICE_LABELS = {code: device_label(name) for code, name in DEVICE_TYPE_MAPPING.items()}
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def load_member_cache(cache_file: str) -> Dict[str, Any]:
@@ -219,50 +246,6 @@ def get_event_logs(api_url: str, access_token: str, start_date: str, end_date: s
 
     return all_event_logs
 
-def enrich_event_logs(event_logs: List[Dict[str, Any]], members: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Enrich logs using member data and known mappings."""
-    member_lookup = {m.get('id'): m for m in members.get('data', [])}
-    member_lookup.update({m.get('userId'): m for m in members.get('data', []) if m.get('userId')})
-
-    for log in event_logs:
-        user_id = log.get('actingUserId') or log.get('memberId')
-        member_info = member_lookup.get(user_id, {})
-
-        user_name = member_info.get('name')  or 'Unknown'
-        user_email = member_info.get('email') or 'Unknown'
-        user_display_name = user_name.split()[0] if user_name != 'Unknown' else (
-            user_email.split('@')[0] if user_email != 'Unknown' else 'Unknown'
-        )
-
-        event_type  = EVENT_TYPE_MAPPING.get(log.get('type'), "Unknown event type")
-        device_name = DEVICE_TYPE_MAPPING.get(log.get('device'), f"Unknown Device ({log.get('device')})")
-
-        # Optional partial ID context
-        if log.get('itemId'):
-            event_type += f" {log['itemId'][:8]}."
-        if log.get('collectionId'):
-            event_type += f" (Collection: {log['collectionId'][:8]})"
-        if log.get('policyId'):
-            event_type += f" (Policy: {log['policyId'][:8]})"
-        if log.get('memberId') and 'Member ID' not in event_type:
-            event_type += f" {log['memberId'][:8]}."
-
-        # Tweak the device name
-        if 'CLI' in device_name:
-            # e.g., "CLI - 1.29.0"
-            device_name = f"CLI - {device_name.split()[-1]}"
-        elif ('Extension' not in device_name) and ('Unknown' not in device_name):
-            # e.g., "Web vault - Safari"
-            device_name = f"Web vault - {device_name}"
-
-        log.update({
-            "userName":  user_display_name,
-            "userEmail": user_email,
-            "event":     event_type,
-            "device":    device_name
-        })
-    return event_logs
-
 def filter_failed_login_attempts(event_logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Return only logs for events 1005 or 1006."""
     return [log for log in event_logs if log.get('type') in [1005, 1006]]
@@ -324,38 +307,6 @@ def display_syslog_logs(event_logs: List[Dict[str, Any]], columns: List[str]) ->
         msg_str = " ".join(msg_parts)
         print(f"<{PRI}>{row['syslog_date']} {hostname} {script_name}[{pid}]: {msg_str}")
 
-def save_to_csv(event_logs: List[Dict[str, Any]], columns: List[str], output_file: str) -> None:
-    """Save logs to CSV."""
-    df = pd.DataFrame(event_logs)
-    df.to_csv(output_file, columns=columns, index=False)
-    logging.info(f"Logs saved to {output_file}")
-
-
-# ------------------- FIXED: Use dateutil parser to handle all formats. -------------------
-def get_max_event_time(event_logs: List[Dict[str, Any]]) -> Optional[datetime]:
-    """
-    Parse the 'date' field from logs and return the maximum timestamp found.
-    Using dateutil.parser.parse to handle offsets, nanosecond precision, etc.
-    """
-    max_dt = None
-    for log in event_logs:
-        log_date_str = log.get('date')
-        if not log_date_str:
-            continue
-        try:
-            # date_parser.parse can handle 9-digit fractional seconds, +00:00 offset, etc.
-            parsed_dt = date_parser.parse(log_date_str)
-            # Convert to UTC and remove tzinfo if you want a naive datetime
-            # e.g.: parsed_dt = parsed_dt.astimezone(timezone.utc).replace(tzinfo=None)
-        except (ValueError, TypeError):
-            continue  # skip unrecognized dates
-
-        if max_dt is None or parsed_dt > max_dt:
-            max_dt = parsed_dt
-
-    return max_dt
-
-
 def main():
     parser = argparse.ArgumentParser(description="Fetch Bitwarden event logs.")
     parser.add_argument('--client_id', required=True, help="Bitwarden Client ID")
@@ -365,12 +316,59 @@ def main():
     parser.add_argument('--columns', nargs='+', default=["event", "device", "date", "userName", "userEmail", "ipAddress"],
                         help="Columns to display (default: event, device, date, userName, userEmail, ipAddress)")
     parser.add_argument('--failed_login_attempt', action='store_true', help="Display only events 1005 and 1006")
+    parser.add_argument('--alert_failed_logins', action='store_true', help="Alert on bursts of failed logins")
+    parser.add_argument('--alert_user_failures', type=int, default=5, help="Failed logins for one user that raise an alert (default: 5)")
+    parser.add_argument('--alert_ip_failures', type=int, default=20, help="Failed logins from one IP that raise an alert (default: 20)")
+    parser.add_argument('--alert_ip_users', type=int, default=3, help="Users failing from one IP that raise an alert (default: 3)")
+    parser.add_argument('--alert_window', type=int, default=10, help="Sliding window for the alert thresholds, in minutes (default: 10)")
+    parser.add_argument('--alert_webhook', help="Also POST alerts as JSON to this URL")
     parser.add_argument('--syslog', action='store_true', help="Display logs in syslog format")
+    parser.add_argument('--syslog_host', help="Forward logs to this syslog collector")
+    parser.add_argument('--syslog_port', type=int, help="Syslog collector port (default: 514, or 6514 for TLS)")
+    parser.add_argument('--syslog_protocol', choices=['udp', 'tcp', 'tls'], default='udp', help="Syslog transport (default: udp)")
+    parser.add_argument('--syslog_ca_file', help="CA bundle to verify the syslog collector's TLS certificate")
+    parser.add_argument('--syslog_insecure', action='store_true', help="Don't verify the syslog collector's TLS certificate")
+    parser.add_argument('--syslog_spill_dir', help="Directory to buffer syslog messages on disk while the collector is slow")
     parser.add_argument('--output_csv', help="Path to CSV file to save logs")
+    parser.add_argument('--output_jsonl', help="Path to JSON lines file to save logs")
+    parser.add_argument('--rotate_mb', type=int, help="Start a new output file once it reaches this many MB on disk")
+    parser.add_argument('--rotate_minutes', type=int, help="Start a new output file after this many minutes")
+    parser.add_argument('--compress', choices=['gzip', 'zstd'], help="Compress output files")
     parser.add_argument('--cache_members', action='store_true', help="Use local cache file instead of fetching from the API.")
     parser.add_argument('--interval', type=int, default=60, help="Seconds between fetches in live mode (default: 60).")
+    parser.add_argument('--lookback', type=int, default=120,
+                        help="Seconds before the previous fetch re-queried each time to catch late events (default: 120).")
+    parser.add_argument('--event_store', help="SQLite file to keep every fetched event in, for event_warehouse.py queries")
 
     args = parser.parse_args()
+    warehouse = EventWarehouse(args.event_store) if args.event_store else None
+
+    detector = None
+    alert_sinks = []
+    if args.alert_failed_logins or args.alert_webhook:
+        for flag in ('alert_user_failures', 'alert_ip_failures', 'alert_ip_users', 'alert_window'):
+            if getattr(args, flag) < 1:
+                parser.error(f"--{flag} must be at least 1 (got {getattr(args, flag)})")
+        detector = FailedLoginDetector(args.alert_user_failures, args.alert_ip_failures, args.alert_ip_users,
+                                       window=args.alert_window * 60)
+        alert_sinks.append(AlertStdoutSink())
+        if args.alert_webhook:
+            alert_sinks.append(AlertWebhookSink(args.alert_webhook))
+
+    sink = None
+    if args.syslog_host:
+        sink = SyslogSink(args.syslog_host, args.syslog_port, args.syslog_protocol, columns=args.columns,
+                          ca_file=args.syslog_ca_file, insecure=args.syslog_insecure, spill_dir=args.syslog_spill_dir)
+
+    file_sink = None
+    if args.output_csv or args.output_jsonl:
+        try:
+            file_sink = RotatingFileSink(args.output_csv or args.output_jsonl, args.columns,
+                                         fmt='csv' if args.output_csv else 'jsonl', compression=args.compress,
+                                         max_bytes=args.rotate_mb * 1024 * 1024 if args.rotate_mb else None,
+                                         rotate_seconds=args.rotate_minutes * 60 if args.rotate_minutes else None)
+        except (RuntimeError, OSError) as e:
+            parser.error(str(e))
 
     try:
         logging.info("Fetching access token...")
@@ -390,40 +388,54 @@ def main():
             logging.info("Caching disabled; fetching members from API...")
             members = get_members(args.api_url, access_token)
 
+        if warehouse is not None:
+            warehouse.set_members(members)
+        enricher = EventEnricher(members, EVENT_TYPE_MAPPING, DEVICE_LABELS)
+
         logging.info(f"Live mode: pulling only new logs. Interval = {args.interval} seconds.")
         logging.info("Press Ctrl+C to stop.")
 
-        latest_event_time = datetime.utcnow() - timedelta(seconds=args.interval)
+        # Each poll re-queries a short lookback and skips events already returned,
+        # so events sharing a timestamp or arriving late are neither lost nor repeated
+        def fetch(start_str: str, end_str: str) -> List[Dict[str, Any]]:
+            logging.info(f"Fetching logs from {start_str} to {end_str}...")
+            return get_event_logs(args.api_url, access_token, start_str, end_str)
+
+        tailer = EventTailer(fetch,
+                             start=datetime.now(timezone.utc) - timedelta(seconds=args.interval),
+                             lookback=timedelta(seconds=args.lookback))
 
         while True:
             try:
-                start_str = latest_event_time.strftime(DATE_FORMAT)
-                end_time  = datetime.utcnow()
-                end_str   = end_time.strftime(DATE_FORMAT)
-
-                logging.info(f"Fetching logs from {start_str} to {end_str}...")
-                event_logs = get_event_logs(args.api_url, access_token, start_str, end_str)
+                event_logs = tailer.poll()
                 if not event_logs:
                     logging.info("No new logs found.")
                 else:
-                    enriched_logs = enrich_event_logs(event_logs, members)
+                    if warehouse is not None:
+                        added = warehouse.add_events(event_logs)
+                        logging.info(f"{added} new events stored in {args.event_store}")
+
+                    enriched_logs = enricher.enrich(event_logs)
+                    # Alerts go out first, before the slower table/file output
+                    if detector is not None:
+                        alerts = detector.process(enriched_logs)
+                        for alert_sink in alert_sinks:
+                            alert_sink.send(alerts)
                     # Output or store
                     if args.failed_login_attempt:
                         display_failed_login_attempts(enriched_logs)
                     elif args.syslog:
                         display_syslog_logs(enriched_logs, args.columns)
-                    elif args.output_csv:
-                        save_to_csv(enriched_logs, args.columns, args.output_csv)
+                    elif file_sink is not None:
+                        file_sink.send(enriched_logs)
                     else:
                         display_logs(enriched_logs, args.columns)
 
-                    logging.info(f"Total logs fetched: {len(event_logs)}")
+                    if sink is not None:
+                        sink.send(enriched_logs)
+                        logging.info(sink.summary())
 
-                    # Update the "latest_event_time" to the max timestamp
-                    max_dt = get_max_event_time(event_logs)
-                    if max_dt:
-                        # Add offset of 1 microsecond to avoid duplicates at boundary
-                        latest_event_time = max_dt + timedelta(microseconds=1)
+                    logging.info(f"New logs fetched: {len(event_logs)}")
 
                 time.sleep(args.interval)
 
@@ -441,6 +453,19 @@ def main():
         logging.error(f"HTTP request failed: {e}")
     except Exception as e:
         logging.error(f"An error occurred: {e}")
+    finally:
+        for alert_sink in alert_sinks:
+            alert_sink.close()
+        if detector is not None:
+            logging.info(detector.summary())
+            if args.alert_webhook:
+                logging.info(alert_sinks[-1].summary())
+        if sink is not None:
+            sink.close()
+            logging.info(sink.summary())
+        if file_sink is not None:
+            file_sink.close()
+            logging.info(file_sink.summary())
 
 if __name__ == "__main__":
     main()
@@ -4,17 +4,32 @@
 Bitwarden Password Audit Report Script
 =====================================
 
-This script starts a local Bitwarden server, unlocks the vault using the provided master password, and retrieves the list of items in the vault for a specified organization. It then checks the passwords of these items against the PwnedPasswords API to generate an "Exposed Passwords" report, a "Reused Passwords" report, and an "Unsecure Websites" report, displaying the results in tabular format.
+This script starts a local Bitwarden server (or reuses one already running on the port), unlocks the vault using the provided master password, and retrieves the list of items in the vault for a specified organization. Alternatively, it can read the items from an unencrypted Bitwarden JSON export, which skips the CLI entirely. It then makes a single pass over the items to generate "Exposed Passwords" (checked against the PwnedPasswords API), "Reused Passwords", "Weak Passwords", "Old Passwords" and "Unsecure Websites" reports, displaying the results in tabular format and optionally writing them to CSV/JSON files.
 
 Usage:
 ------
 python3 generatePasswordAuditReport.py --master_password <YOUR_MASTER_PASSWORD> --email <YOUR_EMAIL> --organization_id <YOUR_ORG_ID>
+python3 generatePasswordAuditReport.py --export_file <EXPORT.json> [--organization_id <YOUR_ORG_ID>]
 
 Optional Arguments:
 -------------------
 --bw_exec            : Path to the Bitwarden CLI executable (default: './bw').
 --port               : Port on which to run the local API server (default: 8087).
 --server_uri         : Bitwarden server URI to configure the CLI (default: 'https://vault.bitwarden.com').
+--export_file        : Unencrypted Bitwarden JSON export to audit instead of using the CLI.
+--serve_timeout      : Seconds to wait for the local API server to become ready (default: 60).
+--hibp_url           : Pwned Passwords API base URL (default: 'https://api.pwnedpasswords.com').
+--hibp_cache_dir     : Directory for cached Pwned Passwords ranges (default: '.hibp_cache', '' disables caching).
+--hibp_cache_ttl     : Hours a cached range stays valid (default: 24).
+--hibp_workers       : Number of concurrent Pwned Passwords range requests (default: 8).
+--hibp_index         : Offline Pwned Passwords index to check against instead of the live API.
+--build_hibp_index   : Build the --hibp_index file from a downloaded Pwned Passwords SHA-1 corpus, then exit.
+--reports            : Comma-separated reports to generate (default: 'exposed,reused,weak,old,unsecure').
+--old_password_days  : Age in days at which a password is reported as old (default: 365).
+--strength_backend   : Password strength estimator for the weak passwords report: 'fast' or 'zxcvbn' (default: 'fast').
+--strength_workers   : Processes used to score passwords in large vaults (default: up to 4).
+--output_dir         : Directory to also write each report to as a file.
+--output_format      : Comma-separated file formats for --output_dir: csv, json (default: csv).
 
 Examples:
 ---------
@@ -23,6 +38,13 @@ Examples:
 
 2. Specify a different Bitwarden CLI executable and port:
    python3 generatePasswordAuditReport.py --bw_exec /path/to/bw --port 8088 --master_password YOUR_MASTER_PASSWORD --email YOUR_EMAIL --organization_id YOUR_ORG_ID
+
+3. Audit an existing export (bw export --format json) without the CLI:
+   python3 generatePasswordAuditReport.py --export_file bitwarden_export.json --organization_id YOUR_ORG_ID
+
+4. Air-gapped audit against a local Pwned Passwords corpus (HASH:COUNT lines, SHA-1):
+   python3 generatePasswordAuditReport.py --build_hibp_index pwnedpasswords.txt --hibp_index pwned.bin
+   python3 generatePasswordAuditReport.py --export_file bitwarden_export.json --hibp_index pwned.bin
 """
 
 import subprocess
@@ -33,8 +55,20 @@ import sys
 import argparse
 import logging
 import hashlib
+import importlib.util
+import binascii
+import math
+import mmap
+import os
+import struct
+import tempfile
 import pandas as pd
+from abc import ABC, abstractmethod
 from collections import Counter
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -43,6 +77,40 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 DEFAULT_BW_EXEC = "./bw"
 DEFAULT_PORT = 8087
 DEFAULT_SERVER_URI = "https://vault.bitwarden.com"
+DEFAULT_SERVE_TIMEOUT = 60
+DEFAULT_HIBP_URL = "https://api.pwnedpasswords.com"
+DEFAULT_HIBP_CACHE_DIR = ".hibp_cache"
+DEFAULT_HIBP_CACHE_TTL_HOURS = 24
+DEFAULT_HIBP_WORKERS = 8
+DEFAULT_REPORTS = "exposed,reused,weak,old,unsecure"
+DEFAULT_OLD_PASSWORD_DAYS = 365
+DEFAULT_STRENGTH_BACKEND = "fast"
+DEFAULT_STRENGTH_WORKERS = min(4, os.cpu_count() or 1)
+
+# Password strength: a score of 2 or lower is weak, as in the vault health reports
+WEAK_PASSWORD_MAX_SCORE = 2
+STRENGTH_SCORE_BITS = (20, 28, 40, 60)  # Upper entropy bound for scores 0-3
+COMMON_PASSWORDS = frozenset("""
+password passw0rd qwerty qwertyuiop asdfgh asdfghjkl zxcvbnm letmein welcome admin administrator login
+master monkey dragon football baseball soccer hockey iloveyou princess sunshine shadow superman batman
+trustno1 starwars whatever freedom secret access changeme default guest root toor test abc abcdef
+abcdefg 123456 1234567 12345678 123456789 1234567890 111111 000000 654321 987654321 qazwsx
+michael jennifer jordan hunter ranger harley charlie summer winter spring autumn company bitwarden
+""".split())
+LEET_TABLE = str.maketrans("4@3105$7", "aaeiosst")
+KEYBOARD_RUNS = frozenset(
+    text[i:i + 2]
+    for row in ("qwertyuiop", "asdfghjkl", "zxcvbnm", "1234567890")
+    for text in (row, row[::-1])
+    for i in range(len(text) - 1)
+)
+
+# Offline index: magic header followed by sorted fixed-width records of SHA-1 digest + exposed count
+HIBP_INDEX_MAGIC = b"PWNDSHA1"
+HIBP_INDEX_RECORD = struct.Struct(">20sI")
+
+# One pooled HTTP session for all calls to the local API server
+http = requests.Session()
 
 # Configure the Bitwarden CLI
 def configure_bitwarden_cli(bw_exec, server_uri):
@@ -61,12 +129,38 @@ def login_to_bitwarden(bw_exec, email, master_password):
         sys.exit(1)
     logging.info("🔒 Successfully logged in to Bitwarden CLI.")
 
-# Start the local server
-def start_local_server(bw_exec, port):
+# Get the vault status from a local server, or None if no server is answering on the port
+def get_server_status(port):
+    try:
+        response = http.get(f"http://localhost:{port}/status", timeout=2)
+        if response.status_code == 200:
+            return response.json().get('data', {}).get('template', {}).get('status')
+    except (requests.RequestException, ValueError):
+        pass
+    return None
+
+# Start the local server and wait until it answers
+def start_local_server(bw_exec, port, timeout=DEFAULT_SERVE_TIMEOUT):
     logging.info(f"🚀 Starting Bitwarden local API server on port {port}...")
-    process = subprocess.Popen([bw_exec, "serve", "--port", str(port)], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    time.sleep(5)  # Allow time for server to start
-    return process
+    # stderr goes to a file rather than a pipe nobody reads, which would stall the server once full;
+    # it is only read if the server fails to start
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen([bw_exec, "serve", "--port", str(port)], stdout=subprocess.DEVNULL, stderr=stderr)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                stderr.seek(0)
+                logging.error(f"❌ Local API server exited. Error: {stderr.read().decode().strip()}")
+                sys.exit(1)
+            if get_server_status(port) is not None:
+                logging.info("✅ Local API server is ready.")
+                return process
+            time.sleep(0.25)
+
+    process.kill()
+    logging.error(f"❌ Local API server did not become ready within {timeout} seconds.")
+    sys.exit(1)
 
 # Unlock the vault using the local server
 def unlock_vault(port, master_password):
@@ -75,7 +169,7 @@ def unlock_vault(port, master_password):
     headers = {"Content-Type": "application/json"}
     body = json.dumps({"password": master_password})
     try:
-        response = requests.post(url, headers=headers, data=body)
+        response = http.post(url, headers=headers, data=body)
         if response.status_code == 200 and response.json().get("success", False):
             logging.info("🔒 Vault unlocked successfully.")
             return response.json()
@@ -91,7 +185,7 @@ def list_items(port, organization_id):
     logging.info("📋 Retrieving items from the vault...")
     url = f"http://localhost:{port}/list/object/items?organizationId={organization_id}"
     try:
-        response = requests.get(url)
+        response = http.get(url)
         if response.status_code == 200:
             items = response.json()
             if items.get("success"):
@@ -107,106 +201,534 @@ def list_items(port, organization_id):
         logging.error(f"❌ Failed to retrieve items. Error: {e}")
         sys.exit(1)
 
-# Check if a password has been exposed using the PwnedPasswords API
-def check_pwned_password(password):
-    sha1_hash = hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
-    prefix = sha1_hash[:5]
-    suffix = sha1_hash[5:]
-
-    url = f"https://api.pwnedpasswords.com/range/{prefix}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        logging.error(f"❌ Error fetching data from PwnedPasswords API: {response.status_code}")
+# List collection names of the organization as {collection ID: name}
+def list_collections(port, organization_id):
+    url = f"http://localhost:{port}/list/object/collections?organizationId={organization_id}"
+    try:
+        response = http.get(url)
+        if response.status_code == 200 and response.json().get("success"):
+            return {c['id']: c['name'] for c in response.json().get('data', {}).get('data', [])}
+        logging.warning(f"⚠️ Could not retrieve collections. Message: {response.text}")
+    except requests.RequestException as e:
+        logging.warning(f"⚠️ Could not retrieve collections. Error: {e}")
+    return {}
+
+# Load items, and collection names as {collection ID: name}, from an unencrypted Bitwarden JSON export
+def load_export(export_file, organization_id=None):
+    logging.info(f"📂 Loading items from export file: {export_file}")
+    try:
+        with open(export_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.error(f"❌ Failed to read export file. Error: {e}")
+        sys.exit(1)
+
+    if data.get('encrypted'):
+        logging.error("❌ Encrypted exports are not supported. Export the vault with --format json.")
+        sys.exit(1)
+
+    items = data.get('items', [])
+    if organization_id:
+        items = [item for item in items if item.get('organizationId') == organization_id]
+    logging.info(f"✅ Loaded {len(items)} items.")
+    return items, {c['id']: c['name'] for c in data.get('collections', [])}
+
+# Look up passwords against the PwnedPasswords k-anonymity range API
+class PwnedPasswordsClient:
+    def __init__(self, api_url=DEFAULT_HIBP_URL, cache_dir=DEFAULT_HIBP_CACHE_DIR,
+                 cache_ttl_hours=DEFAULT_HIBP_CACHE_TTL_HOURS, workers=DEFAULT_HIBP_WORKERS):
+        self.api_url = api_url.rstrip('/')
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl_hours * 3600
+        self.workers = workers
+
+        self.session = requests.Session()
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        self.session.mount(self.api_url, HTTPAdapter(max_retries=retries, pool_maxsize=workers))
+        # Padded responses hide which range was asked for by its size; padding entries have a count of 0
+        self.session.headers['Add-Padding'] = 'true'
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    # Read a range from the on-disk cache if it is still fresh
+    def _read_cached_range(self, prefix):
+        if not self.cache_dir:
+            return None
+        path = os.path.join(self.cache_dir, f"{prefix}.txt")
+        try:
+            if time.time() - os.path.getmtime(path) < self.cache_ttl:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return f.read()
+        except OSError:
+            pass
         return None
 
-    hash_suffixes = response.text.splitlines()
-    for line in hash_suffixes:
-        hash_suffix, count = line.split(':')
-        if hash_suffix == suffix:
-            return int(count)
-    return 0
+    def _write_cached_range(self, prefix, text):
+        if not self.cache_dir:
+            return
+        path = os.path.join(self.cache_dir, f"{prefix}.txt")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
 
-# Generate exposed passwords report
-def generate_exposed_passwords_report(items):
-    logging.info("📊 Generating Exposed Passwords Report...")
-    report_data = []
-    for item in items:
-        if 'login' in item and 'password' in item['login'] and item['login']['password']:
-            password = item['login']['password']
-            count = check_pwned_password(password)
-            if count > 0:
-                report_data.append({
-                    'Item Name': item['name'],
-                    'Exposed Count': count
-                })
+    # Fetch one 5-character prefix range as {suffix: count}, or None if it could not be fetched
+    def get_range(self, prefix):
+        text = self._read_cached_range(prefix)
+        if text is None:
+            try:
+                response = self.session.get(f"{self.api_url}/range/{prefix}", timeout=30)
+            except requests.RequestException as e:
+                logging.error(f"❌ Error fetching data from PwnedPasswords API: {e}")
+                return None
+            if response.status_code != 200:
+                logging.error(f"❌ Error fetching data from PwnedPasswords API: {response.status_code}")
+                return None
+            text = response.text
+            self._write_cached_range(prefix, text)
+
+        hash_suffixes = {}
+        for line in text.splitlines():
+            hash_suffix, _, count = line.partition(':')
+            if count.strip() and int(count):  # Skip padding entries and blank lines
+                hash_suffixes[hash_suffix] = int(count)
+        return hash_suffixes
+
+    # Check many passwords at once. Each password is hashed once, each prefix range is
+    # fetched once and concurrently. Returns {password: exposed count, or None on error}
+    def check_passwords(self, passwords):
+        hashes = {password: hashlib.sha1(password.encode('utf-8')).hexdigest().upper() for password in set(passwords)}
+        prefixes = sorted({sha1_hash[:5] for sha1_hash in hashes.values()})
+        logging.info(f"🔎 Checking {len(hashes)} unique passwords across {len(prefixes)} PwnedPasswords ranges...")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            ranges = dict(zip(prefixes, executor.map(self.get_range, prefixes)))
+
+        results = {}
+        for password, sha1_hash in hashes.items():
+            hash_suffixes = ranges[sha1_hash[:5]]
+            results[password] = None if hash_suffixes is None else hash_suffixes.get(sha1_hash[5:], 0)
+        return results
+
+# Convert a downloaded PwnedPasswords SHA-1 corpus (HASH:COUNT lines) into a sorted binary index.
+# Records are spread over 256 bucket files by first digest byte, so only one bucket is sorted in memory at a time.
+def build_offline_hibp_index(corpus_path, index_path):
+    logging.info(f"🏗️ Building offline PwnedPasswords index {index_path} from {corpus_path}...")
+    record_size = HIBP_INDEX_RECORD.size
+    total = 0
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(index_path))) as bucket_dir:
+        buckets = [open(os.path.join(bucket_dir, f"{i:02x}"), 'wb', buffering=1 << 20) for i in range(256)]
+        try:
+            with open(corpus_path, 'rb') as corpus:
+                for line in corpus:
+                    sha1_hex, _, count = line.strip().partition(b':')
+                    if len(sha1_hex) != 40:
+                        continue
+                    try:
+                        digest = binascii.unhexlify(sha1_hex)
+                    except binascii.Error:
+                        continue
+                    buckets[digest[0]].write(HIBP_INDEX_RECORD.pack(digest, min(int(count or 0), 0xFFFFFFFF)))
+                    total += 1
+        finally:
+            for bucket in buckets:
+                bucket.close()
+
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, 'wb') as index:
+            index.write(HIBP_INDEX_MAGIC)
+            for i in range(256):
+                with open(os.path.join(bucket_dir, f"{i:02x}"), 'rb') as bucket:
+                    data = bucket.read()
+                records = sorted(data[j:j + record_size] for j in range(0, len(data), record_size))
+                index.write(b''.join(records))
+        os.replace(tmp_path, index_path)
+
+    logging.info(f"✅ Indexed {total} hashes ({os.path.getsize(index_path) // (1024 * 1024)} MB).")
+
+# Look up passwords in an offline index built by build_offline_hibp_index, using binary search over an mmap
+class OfflinePwnedPasswords:
+    def __init__(self, index_path):
+        try:
+            self.file = open(index_path, 'rb')
+            self.index = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logging.error(f"❌ Failed to open offline PwnedPasswords index. Error: {e}")
+            sys.exit(1)
+        if self.index[:len(HIBP_INDEX_MAGIC)] != HIBP_INDEX_MAGIC:
+            logging.error(f"❌ {index_path} is not an offline PwnedPasswords index. Build one with --build_hibp_index.")
+            sys.exit(1)
+        self.count = (len(self.index) - len(HIBP_INDEX_MAGIC)) // HIBP_INDEX_RECORD.size
+        logging.info(f"📚 Using offline PwnedPasswords index with {self.count} hashes.")
+
+    def _record_offset(self, position):
+        return len(HIBP_INDEX_MAGIC) + position * HIBP_INDEX_RECORD.size
+
+    # Exposed count for a SHA-1 digest, 0 if it is not in the corpus
+    def lookup(self, digest):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = self._record_offset(middle)
+            if self.index[offset:offset + 20] < digest:
+                low = middle + 1
             else:
-                report_data.append({
+                high = middle
+        if low < self.count:
+            found_digest, count = HIBP_INDEX_RECORD.unpack_from(self.index, self._record_offset(low))
+            if found_digest == digest:
+                return count
+        return 0
+
+    # Same interface as PwnedPasswordsClient.check_passwords
+    def check_passwords(self, passwords):
+        unique_passwords = set(passwords)
+        logging.info(f"🔎 Checking {len(unique_passwords)} unique passwords against the offline index...")
+        return {password: self.lookup(hashlib.sha1(password.encode('utf-8')).digest()) for password in unique_passwords}
+
+# Check if a password has been exposed using the PwnedPasswords API
+def check_pwned_password(password, client=None):
+    return (client or PwnedPasswordsClient()).check_passwords([password])[password]
+
+# Estimate password strength as (score 0-4, entropy bits), zxcvbn-style: 0-2 is weak.
+# Charset entropy per character, except that characters repeating the previous one or continuing
+# a sequence (abc, 321) or keyboard run (qwer) add one bit. Common passwords score 0,
+# also with leetspeak or a digit/symbol suffix.
+def estimate_password_strength(password):
+    lower = password.lower()
+    base = lower.rstrip("0123456789!@#$%^&*.?_-").translate(LEET_TABLE)
+    if lower in COMMON_PASSWORDS or base in COMMON_PASSWORDS:
+        return 0, 0.0
+
+    charset = 0
+    if any(c.islower() for c in password):
+        charset += 26
+    if any(c.isupper() for c in password):
+        charset += 26
+    if any(c.isdigit() for c in password):
+        charset += 10
+    if any(not c.isalnum() for c in password):
+        charset += 33
+    # Letters without case (CJK, Arabic, Hebrew, ...) and other numerals; a conservative pool size
+    if any(c.isalnum() and not (c.islower() or c.isupper() or c.isdigit()) for c in password):
+        charset += 100
+    if not charset:
+        return 0, 0.0
+    bits_per_char = math.log2(charset)
+
+    entropy = bits_per_char
+    previous_step = previous_keyboard = None
+    for i in range(1, len(lower)):
+        step = ord(lower[i]) - ord(lower[i - 1])
+        keyboard = lower[i - 1:i + 1] in KEYBOARD_RUNS
+        if step == 0 or (abs(step) == 1 and step == previous_step) or (keyboard and previous_keyboard):
+            entropy += 1
+        else:
+            entropy += bits_per_char
+        previous_step, previous_keyboard = step, keyboard
+
+    for score, max_bits in enumerate(STRENGTH_SCORE_BITS):
+        if entropy < max_bits:
+            return score, entropy
+    return 4, entropy
+
+# Score one password with the chosen backend. Module level so it can run in worker processes.
+def score_password_strength(password, backend=DEFAULT_STRENGTH_BACKEND):
+    if backend == "zxcvbn":
+        from zxcvbn import zxcvbn
+        result = zxcvbn(password[:100])  # zxcvbn gets slow on very long inputs
+        return result['score'], math.log2(max(float(result['guesses']), 1))
+    return estimate_password_strength(password)
+
+# Audit analyzers. The audit engine makes one pass over the items and hands every login
+# to each analyzer's observe(); finish() then returns the report rows.
+class AuditAnalyzer(ABC):
+    key = ""          # Report name used for --reports
+    file_name = ""    # Output file name, without extension
+    title = ""        # Table heading
+    empty_message = ""
+    advice = ""
+
+    @abstractmethod
+    def observe(self, item, login):
+        """Look at one login item."""
+
+    @abstractmethod
+    def finish(self):
+        """Return the report rows once every item has been observed."""
+
+    # Extra tables as (title, file name, rows), available after finish()
+    def summaries(self):
+        return []
+
+# Exposed passwords: all login passwords are checked in one batch when the pass is done
+class ExposedPasswordsAnalyzer(AuditAnalyzer):
+    key = "exposed"
+    file_name = "exposed_passwords"
+    title = "Exposed Passwords Report"
+    empty_message = "No items found for the Exposed Passwords Report."
+
+    def __init__(self, client=None):
+        self.client = client
+        self.logins = []
+
+    def observe(self, item, login):
+        if login.get('password'):
+            self.logins.append((item['name'], login['password']))
+
+    def finish(self):
+        if not self.logins:
+            return []
+        exposed_counts = (self.client or PwnedPasswordsClient()).check_passwords(password for _, password in self.logins)
+        return [{'Item Name': name, 'Exposed Count': exposed_counts[password]} for name, password in self.logins]
+
+# Reused passwords, counted by password hash so lookups stay O(1)
+class ReusedPasswordsAnalyzer(AuditAnalyzer):
+    key = "reused"
+    file_name = "reused_passwords"
+    title = "Reused Passwords Report"
+    empty_message = "No items found for the Reused Passwords Report."
+    advice = "Reusing passwords makes it easier for attackers to break into multiple accounts. You should change reused passwords to unique values."
+
+    def __init__(self):
+        self.counts = Counter()
+        self.logins = []
+
+    def observe(self, item, login):
+        if login.get('password'):
+            password_hash = hashlib.sha256(login['password'].encode('utf-8')).digest()
+            self.counts[password_hash] += 1
+            self.logins.append((item['name'], login.get('username', 'N/A'), password_hash))
+
+    def finish(self):
+        return [
+            {'Item Name': name, 'Username': username, 'Reused Count': self.counts[password_hash]}
+            for name, username, password_hash in self.logins
+            if self.counts[password_hash] > 1
+        ]
+
+# Login URIs that use http://
+class UnsecureWebsitesAnalyzer(AuditAnalyzer):
+    key = "unsecure"
+    file_name = "unsecure_websites"
+    title = "Unsecure Websites Report"
+    empty_message = "No unsecured websites found for the Unsecure Websites Report."
+    advice = "URLs that start with http:// don’t use the best available encryption. Change the login URIs for these accounts to https:// for safer browsing."
+
+    def __init__(self):
+        self.rows = []
+
+    def observe(self, item, login):
+        for uri in login.get('uris') or []:
+            if (uri.get('uri') or '').startswith('http://'):
+                self.rows.append({
                     'Item Name': item['name'],
-                    'Exposed Count': 0
+                    'Username': login.get('username', 'N/A'),
+                    'URI': uri['uri']
                 })
-    # Convert the report to a DataFrame and display it
-    df = pd.DataFrame(report_data)
-    if not df.empty:
-        print("\nExposed Passwords Report:\n")
-        print(df.to_string(index=False))
-    else:
-        logging.info("No items found for the Exposed Passwords Report.")
 
-# Generate reused passwords report
-def generate_reused_passwords_report(items):
-    logging.info("📊 Generating Reused Passwords Report...")
-    passwords = [item['login']['password'] for item in items if 'login' in item and 'password' in item['login'] and item['login']['password']]
-    password_counts = Counter(passwords)
-    reused_passwords = [pw for pw, count in password_counts.items() if count > 1]
+    def finish(self):
+        return self.rows
 
-    report_data = []
-    for item in items:
-        if 'login' in item and 'password' in item['login'] and item['login']['password'] in reused_passwords:
-            report_data.append({
+# Passwords that are easy to guess. Each unique password is scored once (memoized by hash),
+# across a process pool for large vaults, with either the fast estimator or zxcvbn.
+# Reported per item and summarized per collection.
+class WeakPasswordsAnalyzer(AuditAnalyzer):
+    key = "weak"
+    file_name = "weak_passwords"
+    title = "Weak Passwords Report"
+    empty_message = "No weak passwords found for the Weak Passwords Report."
+    advice = "Weak passwords can be easily guessed by attackers. Change these passwords to strong ones using the password generator."
+    POOL_THRESHOLD = 5000  # Unique passwords needed before scoring in a process pool
+
+    def __init__(self, backend=DEFAULT_STRENGTH_BACKEND, workers=DEFAULT_STRENGTH_WORKERS, collections=None):
+        self.backend = backend
+        self.workers = workers
+        self.collections = collections or {}  # Collection ID -> name
+        self.scores = {}    # Password hash -> (score, entropy bits), shared by duplicate passwords
+        self.pending = {}   # Password hash -> password, still to be scored
+        self.logins = []
+        self.collection_rows = []
+
+        if backend == "zxcvbn" and importlib.util.find_spec("zxcvbn") is None:
+            logging.error("❌ The zxcvbn backend needs the zxcvbn package: pip install zxcvbn")
+            sys.exit(1)
+
+    def observe(self, item, login):
+        password = login.get('password')
+        if not password:
+            return
+        password_hash = hashlib.sha256(password.encode('utf-8')).digest()
+        if password_hash not in self.scores:
+            self.pending[password_hash] = password
+        self.logins.append((item['name'], login.get('username', 'N/A'), password_hash, item.get('collectionIds') or []))
+
+    def _score_pending(self):
+        pending, self.pending = self.pending, {}
+        passwords = list(pending.values())
+        if len(passwords) >= self.POOL_THRESHOLD and self.workers > 1:
+            logging.info(f"🧮 Scoring {len(passwords)} unique passwords with {self.workers} processes...")
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = executor.map(score_password_strength, passwords, [self.backend] * len(passwords), chunksize=512)
+                self.scores.update(zip(pending.keys(), results))
+        else:
+            for password_hash, password in pending.items():
+                self.scores[password_hash] = score_password_strength(password, self.backend)
+
+    def finish(self):
+        self._score_pending()
+
+        rows = []
+        per_collection = {}
+        for name, username, password_hash, collection_ids in self.logins:
+            score, entropy = self.scores[password_hash]
+            weak = score <= WEAK_PASSWORD_MAX_SCORE
+            collection_names = [self.collections.get(cid, cid) for cid in collection_ids] or ["(no collection)"]
+            for collection_name in collection_names:
+                totals = per_collection.setdefault(collection_name, [0, 0])
+                totals[0] += 1
+                totals[1] += weak
+            if weak:
+                rows.append({
+                    'Item Name': name,
+                    'Username': username,
+                    'Score': score,
+                    'Entropy (bits)': round(entropy, 1),
+                    'Collections': ", ".join(collection_names)
+                })
+
+        self.collection_rows = [
+            {'Collection': collection_name, 'Logins': logins, 'Weak': weak, 'Weak %': round(100 * weak / logins, 1)}
+            for collection_name, (logins, weak) in sorted(per_collection.items(), key=lambda c: (-c[1][1], c[0]))
+        ]
+        return rows
+
+    def summaries(self):
+        return [("Weak Passwords by Collection", "weak_passwords_by_collection", self.collection_rows)]
+
+# Passwords that have not been changed for a number of days
+class OldPasswordsAnalyzer(AuditAnalyzer):
+    key = "old"
+    file_name = "old_passwords"
+    title = "Old Passwords Report"
+    empty_message = "No old passwords found for the Old Passwords Report."
+    advice = "Passwords that have not been changed for a long time are more likely to have been exposed. Consider rotating them."
+
+    def __init__(self, max_age_days=DEFAULT_OLD_PASSWORD_DAYS):
+        self.max_age_days = max_age_days
+        self.now = datetime.now(timezone.utc)
+        self.rows = []
+
+    def observe(self, item, login):
+        if not login.get('password'):
+            return
+        changed = login.get('passwordRevisionDate') or item.get('creationDate') or item.get('revisionDate')
+        if not changed:
+            return
+        try:
+            changed_at = datetime.fromisoformat(changed.replace('Z', '+00:00'))
+        except ValueError:
+            return
+        age_days = (self.now - changed_at).days
+        if age_days >= self.max_age_days:
+            self.rows.append({
                 'Item Name': item['name'],
-                'Username': item['login'].get('username', 'N/A'),
-                'Reused Count': password_counts[item['login']['password']]
+                'Username': login.get('username', 'N/A'),
+                'Last Changed': changed_at.date().isoformat(),
+                'Age (days)': age_days
             })
 
-    # Convert the report to a DataFrame and display it
-    df = pd.DataFrame(report_data)
+    def finish(self):
+        return self.rows
+
+# Run all analyzers over the items in a single pass. Returns {analyzer: rows}
+def run_password_audit(items, analyzers):
+    logging.info(f"🔍 Auditing {len(items)} items ({', '.join(a.key for a in analyzers)})...")
+    for item in items:
+        login = item.get('login')
+        if not login:
+            continue
+        for analyzer in analyzers:
+            analyzer.observe(item, login)
+
+    results = {}
+    for analyzer in analyzers:
+        logging.info(f"📊 Generating {analyzer.title}...")
+        results[analyzer] = analyzer.finish()
+    return results
+
+# Display a report as a table and optionally write it to CSV/JSON files
+def output_report(analyzer, rows, output_dir=None, output_formats=()):
+    df = pd.DataFrame(rows)
     if not df.empty:
-        print("\nReused Passwords Report:\n")
+        print(f"\n{analyzer.title}:\n")
         print(df.to_string(index=False))
-        print("\nReusing passwords makes it easier for attackers to break into multiple accounts. You should change reused passwords to unique values.")
+        if analyzer.advice:
+            print(f"\n{analyzer.advice}")
     else:
-        logging.info("No items found for the Reused Passwords Report.")
+        logging.info(analyzer.empty_message)
+
+    save_report(df, analyzer.file_name, output_dir, output_formats)
+
+    for title, file_name, summary_rows in analyzer.summaries():
+        summary_df = pd.DataFrame(summary_rows)
+        if not summary_df.empty:
+            print(f"\n{title}:\n")
+            print(summary_df.to_string(index=False))
+        save_report(summary_df, file_name, output_dir, output_formats)
+
+# Write a report table to CSV/JSON files in output_dir
+def save_report(df, file_name, output_dir=None, output_formats=()):
+    if not output_dir:
+        return
+    os.makedirs(output_dir, exist_ok=True)
+    base_path = os.path.join(output_dir, file_name)
+    if 'csv' in output_formats:
+        df.to_csv(f"{base_path}.csv", index=False)
+        logging.info(f"💾 Saved {base_path}.csv")
+    if 'json' in output_formats:
+        df.to_json(f"{base_path}.json", orient='records', indent=2, force_ascii=False)
+        logging.info(f"💾 Saved {base_path}.json")
+
+# Generate exposed passwords report
+def generate_exposed_passwords_report(items, client=None):
+    analyzer = ExposedPasswordsAnalyzer(client)
+    output_report(analyzer, run_password_audit(items, [analyzer])[analyzer])
+
+# Generate reused passwords report
+def generate_reused_passwords_report(items):
+    analyzer = ReusedPasswordsAnalyzer()
+    output_report(analyzer, run_password_audit(items, [analyzer])[analyzer])
 
 # Generate unsecured websites report
 def generate_unsecure_websites_report(items):
-    logging.info("📊 Generating Unsecure Websites Report...")
-    report_data = []
-    for item in items:
-        if 'login' in item and 'uris' in item['login'] and item['login']['uris']:
-            for uri in item['login']['uris']:
-                if uri['uri'].startswith('http://'):
-                    report_data.append({
-                        'Item Name': item['name'],
-                        'Username': item['login'].get('username', 'N/A'),
-                        'URI': uri['uri']
-                    })
-    # Convert the report to a DataFrame and display it
-    df = pd.DataFrame(report_data)
-    if not df.empty:
-        print("\nUnsecure Websites Report:\n")
-        print(df.to_string(index=False))
-        print("\nURLs that start with http:// don’t use the best available encryption. Change the login URIs for these accounts to https:// for safer browsing.")
-    else:
-        logging.info("No unsecured websites found for the Unsecure Websites Report.")
+    analyzer = UnsecureWebsitesAnalyzer()
+    output_report(analyzer, run_password_audit(items, [analyzer])[analyzer])
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Start Bitwarden local server and unlock vault.")
-    parser.add_argument('--master_password', required=True, help="Master password for Bitwarden vault")
+    parser.add_argument('--master_password', help="Master password for Bitwarden vault")
     parser.add_argument('--bw_exec', default=DEFAULT_BW_EXEC, help="Path to the Bitwarden CLI executable")
     parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to run the local API server on")
-    parser.add_argument('--email', required=True, help="Email of the Bitwarden user for CLI login")
+    parser.add_argument('--email', help="Email of the Bitwarden user for CLI login")
     parser.add_argument('--server_uri', default=DEFAULT_SERVER_URI, help="Bitwarden server URI to configure the CLI")
-    parser.add_argument('--organization_id', required=True, help="Organization ID to list items from")
+    parser.add_argument('--organization_id', help="Organization ID to list items from")
+    parser.add_argument('--export_file', help="Unencrypted Bitwarden JSON export to audit instead of using the CLI")
+    parser.add_argument('--serve_timeout', type=int, default=DEFAULT_SERVE_TIMEOUT, help="Seconds to wait for the local API server to become ready")
+    parser.add_argument('--hibp_url', default=DEFAULT_HIBP_URL, help="PwnedPasswords API base URL")
+    parser.add_argument('--hibp_cache_dir', default=DEFAULT_HIBP_CACHE_DIR, help="Directory for cached PwnedPasswords ranges ('' disables caching)")
+    parser.add_argument('--hibp_cache_ttl', type=float, default=DEFAULT_HIBP_CACHE_TTL_HOURS, help="Hours a cached PwnedPasswords range stays valid")
+    parser.add_argument('--hibp_workers', type=int, default=DEFAULT_HIBP_WORKERS, help="Number of concurrent PwnedPasswords range requests")
+    parser.add_argument('--hibp_index', help="Offline PwnedPasswords index to check against instead of the live API")
+    parser.add_argument('--reports', default=DEFAULT_REPORTS, help=f"Comma-separated reports to generate (default: {DEFAULT_REPORTS})")
+    parser.add_argument('--old_password_days', type=int, default=DEFAULT_OLD_PASSWORD_DAYS, help="Age in days at which a password is reported as old")
+    parser.add_argument('--strength_backend', choices=["fast", "zxcvbn"], default=DEFAULT_STRENGTH_BACKEND, help="Password strength estimator for the weak passwords report (zxcvbn needs: pip install zxcvbn)")
+    parser.add_argument('--strength_workers', type=int, default=DEFAULT_STRENGTH_WORKERS, help="Processes used to score passwords in large vaults")
+    parser.add_argument('--output_dir', help="Directory to also write each report to as a file")
+    parser.add_argument('--output_format', default="csv", help="Comma-separated file formats for --output_dir: csv, json (default: csv)")
+    parser.add_argument('--build_hibp_index', metavar='CORPUS', help="Build --hibp_index from a downloaded PwnedPasswords SHA-1 corpus, then exit")
     
     args = parser.parse_args()
 
@@ -216,37 +738,77 @@ if __name__ == "__main__":
     EMAIL = args.email
     SERVER_URI = args.server_uri
     ORGANIZATION_ID = args.organization_id
+    server_process = None
+
+    if args.build_hibp_index:
+        if not args.hibp_index:
+            parser.error("--build_hibp_index requires --hibp_index for the output file")
+        build_offline_hibp_index(args.build_hibp_index, args.hibp_index)
+        sys.exit(0)
+
+    if args.export_file:
+        # Read items straight from the export, no CLI needed
+        items, collections = load_export(args.export_file, ORGANIZATION_ID)
+    else:
+        if not (MASTER_PASSWORD and EMAIL and ORGANIZATION_ID):
+            parser.error("--master_password, --email and --organization_id are required unless --export_file is used")
+
+        server_status = get_server_status(PORT)
+        if server_status is not None:
+            # Reuse the local API server that is already running on this port
+            logging.info(f"♻️ Reusing Bitwarden local API server already running on port {PORT} (vault {server_status}).")
+        else:
+            # Ensure Bitwarden CLI is available
+            if subprocess.call(["which", BW_EXEC], stdout=subprocess.PIPE, stderr=subprocess.PIPE) != 0:
+                logging.error(f"❌ Bitwarden CLI ({BW_EXEC}) is not available. Please install it and try again.")
+                sys.exit(1)
+
+            # Configure the Bitwarden server
+            configure_bitwarden_cli(BW_EXEC, SERVER_URI)
+
+            # Log in to Bitwarden
+            login_to_bitwarden(BW_EXEC, EMAIL, MASTER_PASSWORD)
+
+            # Start the server
+            server_process = start_local_server(BW_EXEC, PORT, args.serve_timeout)
+            server_status = get_server_status(PORT)
+
+        # Unlock the vault
+        if server_status != "unlocked":
+            unlock_response = unlock_vault(PORT, MASTER_PASSWORD)
+
+        # List items from the organization vault
+        items = list_items(PORT, ORGANIZATION_ID)
+        collections = list_collections(PORT, ORGANIZATION_ID) if "weak" in args.reports else {}
     
-    # Ensure Bitwarden CLI is available
-    if subprocess.call(["which", BW_EXEC], stdout=subprocess.PIPE, stderr=subprocess.PIPE) != 0:
-        logging.error(f"❌ Bitwarden CLI ({BW_EXEC}) is not available. Please install it and try again.")
-        sys.exit(1)
-    
-    # Configure the Bitwarden server
-    configure_bitwarden_cli(BW_EXEC, SERVER_URI)
-    
-    # Log in to Bitwarden
-    login_to_bitwarden(BW_EXEC, EMAIL, MASTER_PASSWORD)
-    
-    # Start the server
-    server_process = start_local_server(BW_EXEC, PORT)
-    
-    # Unlock the vault
-    unlock_response = unlock_vault(PORT, MASTER_PASSWORD)
-    
-    # List items from the organization vault
-    items = list_items(PORT, ORGANIZATION_ID)
-    
-    # Generate Exposed Passwords Report
-    generate_exposed_passwords_report(items)
-    
-    # Generate Reused Passwords Report
-    generate_reused_passwords_report(items)
-    
-    # Generate Unsecure Websites Report
-    generate_unsecure_websites_report(items)
+    # Set up the requested analyzers
+    reports = [r.strip() for r in args.reports.split(',') if r.strip()]
+    analyzers = []
+    for report in reports:
+        if report == "exposed":
+            if args.hibp_index:
+                pwned_client = OfflinePwnedPasswords(args.hibp_index)
+            else:
+                pwned_client = PwnedPasswordsClient(args.hibp_url, args.hibp_cache_dir, args.hibp_cache_ttl, args.hibp_workers)
+            analyzers.append(ExposedPasswordsAnalyzer(pwned_client))
+        elif report == "reused":
+            analyzers.append(ReusedPasswordsAnalyzer())
+        elif report == "weak":
+            analyzers.append(WeakPasswordsAnalyzer(args.strength_backend, args.strength_workers, collections))
+        elif report == "old":
+            analyzers.append(OldPasswordsAnalyzer(args.old_password_days))
+        elif report == "unsecure":
+            analyzers.append(UnsecureWebsitesAnalyzer())
+        else:
+            parser.error(f"Unknown report '{report}'. Choose from: {DEFAULT_REPORTS}")
+
+    # Generate all reports in a single pass over the items
+    output_formats = [f.strip() for f in args.output_format.split(',') if f.strip()]
+    for analyzer, rows in run_password_audit(items, analyzers).items():
+        output_report(analyzer, rows, args.output_dir, output_formats)
     
-    # Stop the server at the end (optional, for a graceful shutdown)
-    logging.info("🚩 Stopping the local API server...")
-    server_process.kill()
-    logging.info("🚀 Server stopped and script completed.")
+    # Stop the server at the end if this script started it
+    if server_process is not None:
+        logging.info("🚩 Stopping the local API server...")
+        server_process.kill()
+        logging.info("🚀 Server stopped and script completed.")
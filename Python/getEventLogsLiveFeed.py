@@ -11,10 +11,21 @@ Optional:
 ---------
 --vault_uri, --api_url       : Adjust Bitwarden endpoints (defaults shown).
 --columns                    : Columns to display (default: event, device, date, userName, userEmail, ipAddress).
+--alert_failed_logins        : Print an alert when failed logins cross a threshold (see event_alerts.py):
+  --alert_user_failures (5 per user), --alert_ip_failures (20 per IP), --alert_ip_users (3 users per IP),
+  --alert_window (minutes, default 10), --alert_webhook (also POST alerts as JSON to this URL)
 --syslog                     : Print logs in a syslog format.
---output_csv                 : Save logs to CSV at this path.
+--syslog_host                : Forward logs to this syslog collector (RFC 5424), see also:
+  --syslog_port, --syslog_protocol (udp/tcp/tls), --syslog_ca_file, --syslog_insecure, --syslog_spill_dir
+--output_csv                 : Save logs to CSV at this path (the file stays open and is flushed every few seconds).
+--output_jsonl               : Save logs as JSON lines at this path.
+--rotate_mb, --rotate_minutes: Start a new timestamped output file after this much data / time.
+--compress                   : Compress output files with gzip or zstd (zstd needs the zstandard package).
 --cache_members              : Cache the members in /tmp/bitwarden_members_cache.json for faster reruns.
 --interval                   : Seconds to wait between fetches in live mode (default: 60).
+--lookback                   : Seconds of overlap re-queried on every fetch to catch late events (default: 120).
+--metrics_port               : Serve Prometheus metrics (poll latency, events, errors, lag) on this port at /metrics.
+--metrics_address            : Address to bind the metrics endpoint to (default: all interfaces).
 --disable_logging            : Disable all logging info.
 
 Examples:
@@ -38,8 +49,14 @@ import warnings
 import pandas as pd
 import sys
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
-from dateutil.parser import parse as date_parser
+from typing import List, Dict, Any
+
+from event_alerts import AlertStdoutSink, AlertWebhookSink, FailedLoginDetector
+from event_enrich import EventEnricher
+from event_metrics import FeedMetrics, start_metrics_server
+from event_sinks import RotatingFileSink, SyslogSink
+from event_tail import EventTailer
+from event_warehouse import parse_timestamp
 
 # Suppress specific urllib3 warning
 warnings.filterwarnings("ignore", category=UserWarning, module='urllib3', message='urllib3 v2 only supports OpenSSL 1.1.1+')
@@ -155,7 +172,7 @@ def get_members(api_url: str, access_token: str) -> Dict[str, Any]:
     return response.json()
 
 def get_event_logs(api_url: str, access_token: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
-    """Fetch event logs from the Bitwarden API."""
+    """Fetch all pages of event logs from the Bitwarden API."""
     url = f"{api_url}/public/events"
     headers = {
         'Authorization': f"Bearer {access_token}"
@@ -164,59 +181,15 @@ def get_event_logs(api_url: str, access_token: str, start_date: str, end_date: s
         'start': start_date,
         'end': end_date
     }
-    response = requests.get(url, headers=headers, params=params)
-    response.raise_for_status()
-    return response.json().get('data', [])
-
-def enrich_event_logs(event_logs: List[Dict[str, Any]], members: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Enrich logs using member data and known mappings."""
-    member_lookup = {m.get('id'): m for m in members.get('data', [])}
-    member_lookup.update({m.get('userId'): m for m in members.get('data', []) if m.get('userId')})
-
-    event_type_mapping = get_event_type_mapping()
-    device_type_mapping = get_device_type_mapping()
-
-    for log in event_logs:
-        user_id = log.get('actingUserId') or log.get('memberId')
-        member_info = member_lookup.get(user_id, {})
-
-        user_name = member_info.get('name')  or 'Unknown'
-        user_email = member_info.get('email') or 'Unknown'
-        user_display_name = user_name.split()[0] if user_name != 'Unknown' else (
-            user_email.split('@')[0] if user_email != 'Unknown' else 'Unknown'
-        )
-
-        event_type  = event_type_mapping.get(log.get('type'), "Unknown event type")
-        device_type = device_type_mapping.get(log.get('deviceType'), "Unknown Device")
-
-        # Optional partial ID context
-        if log.get('itemId'):
-            event_type += f" {log['itemId'][:8]}."
-        if log.get('collectionId'):
-            event_type += f" (Collection: {log['collectionId'][:8]})"
-        if log.get('policyId'):
-            event_type += f" (Policy: {log['policyId'][:8]})"
-        if log.get('memberId') and 'Member ID' not in event_type:
-            event_type += f" {log['memberId'][:8]}."
-
-        log.update({
-            "userName":  user_display_name,
-            "userEmail": user_email,
-            "event":     event_type,
-            "device":    device_type
-        })
-    return event_logs
-
-def save_to_csv(event_logs: List[Dict[str, Any]], columns: List[str], output_file: str) -> None:
-    """Append logs to CSV and add headers if the file is empty."""
-    df = pd.DataFrame(event_logs)
-    # Check if the file exists and if it is empty
-    file_exists = os.path.isfile(output_file)
-    if file_exists and os.path.getsize(output_file) == 0:
-        file_exists = False  # Treat as if the file does not exist to write headers
-
-    df.to_csv(output_file, columns=columns, index=False, mode='a', header=not file_exists)
-    logging.info(f"Logs appended to {output_file}")
+    event_logs = []
+    while True:
+        response = requests.get(url, headers=headers, params=params)
+        response.raise_for_status()
+        data = response.json()
+        event_logs.extend(data.get('data', []))
+        if not data.get('continuationToken'):
+            return event_logs
+        params['continuationToken'] = data['continuationToken']
 
 def display_syslog_logs(event_logs: List[Dict[str, Any]], columns: List[str]) -> None:
     """
@@ -258,12 +231,6 @@ def display_logs(event_logs: List[Dict[str, Any]], columns: List[str]) -> None:
     df = pd.DataFrame(event_logs)
     print(df[columns].to_string(index=False))
 
-def get_max_event_time(event_logs: List[Dict[str, Any]]) -> Optional[datetime]:
-    """Get the maximum event time from the logs."""
-    if not event_logs:
-        return None
-    return max(date_parser(log['date']) for log in event_logs)
-
 def main():
     parser = argparse.ArgumentParser(description="Fetch Bitwarden event logs.")
     parser.add_argument('--client_id', required=True, help="Bitwarden Client ID")
@@ -272,10 +239,30 @@ def main():
     parser.add_argument('--api_url', default=DEFAULT_API_URL, help="Bitwarden API URL")
     parser.add_argument('--columns', nargs='+', default=["event", "device", "date", "userName", "userEmail", "ipAddress"],
                         help="Columns to display (default: event, device, date, userName, userEmail, ipAddress)")
+    parser.add_argument('--alert_failed_logins', action='store_true', help="Alert on bursts of failed logins")
+    parser.add_argument('--alert_user_failures', type=int, default=5, help="Failed logins for one user that raise an alert (default: 5)")
+    parser.add_argument('--alert_ip_failures', type=int, default=20, help="Failed logins from one IP that raise an alert (default: 20)")
+    parser.add_argument('--alert_ip_users', type=int, default=3, help="Users failing from one IP that raise an alert (default: 3)")
+    parser.add_argument('--alert_window', type=int, default=10, help="Sliding window for the alert thresholds, in minutes (default: 10)")
+    parser.add_argument('--alert_webhook', help="Also POST alerts as JSON to this URL")
     parser.add_argument('--syslog', action='store_true', help="Display logs in syslog format")
+    parser.add_argument('--syslog_host', help="Forward logs to this syslog collector")
+    parser.add_argument('--syslog_port', type=int, help="Syslog collector port (default: 514, or 6514 for TLS)")
+    parser.add_argument('--syslog_protocol', choices=['udp', 'tcp', 'tls'], default='udp', help="Syslog transport (default: udp)")
+    parser.add_argument('--syslog_ca_file', help="CA bundle to verify the syslog collector's TLS certificate")
+    parser.add_argument('--syslog_insecure', action='store_true', help="Don't verify the syslog collector's TLS certificate")
+    parser.add_argument('--syslog_spill_dir', help="Directory to buffer syslog messages on disk while the collector is slow")
     parser.add_argument('--output_csv', help="Path to CSV file to save logs")
+    parser.add_argument('--output_jsonl', help="Path to JSON lines file to save logs")
+    parser.add_argument('--rotate_mb', type=int, help="Start a new output file once it reaches this many MB on disk")
+    parser.add_argument('--rotate_minutes', type=int, help="Start a new output file after this many minutes")
+    parser.add_argument('--compress', choices=['gzip', 'zstd'], help="Compress output files")
     parser.add_argument('--cache_members', action='store_true', help="Use local cache file instead of fetching from the API.")
     parser.add_argument('--interval', type=int, default=60, help="Seconds between fetches in live mode (default: 60).")
+    parser.add_argument('--lookback', type=int, default=120,
+                        help="Seconds before the previous fetch re-queried each time to catch late events (default: 120).")
+    parser.add_argument('--metrics_port', type=int, help="Serve Prometheus metrics on this port")
+    parser.add_argument('--metrics_address', default="", help="Address for the metrics endpoint (default: all interfaces)")
     parser.add_argument('--disable_logging', action='store_true', help="Disable all logging info")
 
     args = parser.parse_args()
@@ -287,6 +274,41 @@ def main():
     else:
         logging.basicConfig(level=logging.INFO, format=log_format)
 
+    detector = None
+    alert_sinks = []
+    if args.alert_failed_logins or args.alert_webhook:
+        for flag in ('alert_user_failures', 'alert_ip_failures', 'alert_ip_users', 'alert_window'):
+            if getattr(args, flag) < 1:
+                parser.error(f"--{flag} must be at least 1 (got {getattr(args, flag)})")
+        detector = FailedLoginDetector(args.alert_user_failures, args.alert_ip_failures, args.alert_ip_users,
+                                       window=args.alert_window * 60)
+        alert_sinks.append(AlertStdoutSink())
+        if args.alert_webhook:
+            alert_sinks.append(AlertWebhookSink(args.alert_webhook))
+
+    metrics = None
+    if args.metrics_port:
+        metrics = FeedMetrics()
+        try:
+            start_metrics_server(metrics, args.metrics_port, args.metrics_address)
+        except OSError as e:
+            parser.error(f"Can't serve metrics on port {args.metrics_port}: {e}")
+
+    sink = None
+    if args.syslog_host:
+        sink = SyslogSink(args.syslog_host, args.syslog_port, args.syslog_protocol, columns=args.columns,
+                          ca_file=args.syslog_ca_file, insecure=args.syslog_insecure, spill_dir=args.syslog_spill_dir)
+
+    file_sink = None
+    if args.output_csv or args.output_jsonl:
+        try:
+            file_sink = RotatingFileSink(args.output_csv or args.output_jsonl, args.columns,
+                                         fmt='csv' if args.output_csv else 'jsonl', compression=args.compress,
+                                         max_bytes=args.rotate_mb * 1024 * 1024 if args.rotate_mb else None,
+                                         rotate_seconds=args.rotate_minutes * 60 if args.rotate_minutes else None)
+        except (RuntimeError, OSError) as e:
+            parser.error(str(e))
+
     try:
         logging.info("Fetching access token...")
         access_token = get_access_token(args.client_id, args.client_secret, args.vault_uri)
@@ -304,39 +326,61 @@ def main():
         else:
             logging.info("Caching disabled; fetching members from API...")
             members = get_members(args.api_url, access_token)
+        enricher = EventEnricher(members, get_event_type_mapping(), get_device_type_mapping(),
+                                 device_field='deviceType', unknown_device="Unknown Device")
 
         logging.info(f"Live mode: pulling only new logs. Interval = {args.interval} seconds.")
         logging.info("Press Ctrl+C to stop.")
 
-        latest_event_time = datetime.utcnow() - timedelta(seconds=args.interval)
+        # Each poll re-queries a short lookback and skips events already returned,
+        # so events sharing a timestamp or arriving late are neither lost nor repeated
+        def fetch(start_str: str, end_str: str) -> List[Dict[str, Any]]:
+            logging.info(f"Fetching logs from {start_str} to {end_str}...")
+            if metrics is None:
+                return get_event_logs(args.api_url, access_token, start_str, end_str)
+            fetch_started = time.monotonic()
+            try:
+                return get_event_logs(args.api_url, access_token, start_str, end_str)
+            finally:
+                metrics.fetch_duration.observe(time.monotonic() - fetch_started)
+
+        tailer = EventTailer(fetch,
+                             start=datetime.now(timezone.utc) - timedelta(seconds=args.interval),
+                             lookback=timedelta(seconds=args.lookback))
 
         while True:
             try:
-                start_str = latest_event_time.strftime(DATE_FORMAT)
-                end_time  = datetime.utcnow()
-                end_str   = end_time.strftime(DATE_FORMAT)
-
-                logging.info(f"Fetching logs from {start_str} to {end_str}...")
-                event_logs = get_event_logs(args.api_url, access_token, start_str, end_str)
+                poll_started = time.monotonic()
+                duplicates_before = tailer.duplicates
+                event_logs = tailer.poll()
                 if not event_logs:
                     logging.info("No new logs found.")
                 else:
-                    enriched_logs = enrich_event_logs(event_logs, members)
+                    enriched_logs = enricher.enrich(event_logs)
+                    # Alerts go out first, before the slower table/file output
+                    if detector is not None:
+                        alerts = detector.process(enriched_logs)
+                        for alert_sink in alert_sinks:
+                            alert_sink.send(alerts)
                     # Output or store
                     if args.syslog:
                         display_syslog_logs(enriched_logs, args.columns)
-                    if args.output_csv:
-                        save_to_csv(enriched_logs, args.columns, args.output_csv)
+                    if file_sink is not None:
+                        file_sink.send(enriched_logs)
                     if not args.syslog:
                         display_logs(enriched_logs, args.columns)
 
-                    logging.info(f"Total logs fetched: {len(event_logs)}")
+                    if sink is not None:
+                        sink.send(enriched_logs)
+                        logging.info(sink.summary())
+
+                    logging.info(f"New logs fetched: {len(event_logs)}")
 
-                    # Update the "latest_event_time" to the max timestamp
-                    max_dt = get_max_event_time(enriched_logs)
-                    if max_dt:
-                        # Add offset of 1 microsecond to avoid duplicates at boundary
-                        latest_event_time = max_dt + timedelta(microseconds=1)
+                if metrics is not None:
+                    newest = max((log.get('date') or "" for log in event_logs), default="")
+                    metrics.poll_succeeded(time.monotonic() - poll_started, len(event_logs),
+                                           tailer.duplicates - duplicates_before, tailer.window_end.timestamp(),
+                                           parse_timestamp(newest) if newest else None)
 
                 time.sleep(args.interval)
 
@@ -345,15 +389,32 @@ def main():
                 break
             except requests.exceptions.RequestException as e:
                 logging.error(f"HTTP request failed: {e}")
+                if metrics is not None:
+                    metrics.poll_failed("http")
                 time.sleep(args.interval)
             except Exception as e:
                 logging.error(f"Unexpected error: {e}")
+                if metrics is not None:
+                    metrics.poll_failed("other")
                 time.sleep(args.interval)
 
     except requests.exceptions.RequestException as e:
         logging.error(f"HTTP request failed: {e}")
     except Exception as e:
         logging.error(f"An error occurred: {e}")
+    finally:
+        for alert_sink in alert_sinks:
+            alert_sink.close()
+        if detector is not None:
+            logging.info(detector.summary())
+            if args.alert_webhook:
+                logging.info(alert_sinks[-1].summary())
+        if sink is not None:
+            sink.close()
+            logging.info(sink.summary())
+        if file_sink is not None:
+            file_sink.close()
+            logging.info(file_sink.summary())
 
 if __name__ == "__main__":
     main()
@@ -364,5 +425,4 @@ TODO: Check syslog RFC5424 format
 TODO: add requirements.txt with:
 - requests
 - pandas
-- python-dateutil
 """
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+
+"""
+Bitwarden Password Age Report
+=============================
+
+Reports how long ago the password of every login item was last changed, bucketed by age and
+summarized per collection. Replaces bwOldPasswords.py and changedPasswordsReport.py.
+
+Items are read from one of:
+  - serve  : a running, unlocked `bw serve` (https://bitwarden.com/help/cli/#serve)
+  - cli    : `bw list items` with a session key
+  - export : an unencrypted Bitwarden JSON export
+
+Items are streamed one at a time and every row is written to the CSV as soon as it is read,
+so memory stays flat even for vaults with a million items. The CSV is in vault order; the
+per-collection summary printed at the end is sorted.
+
+Usage:
+------
+python3 passwordAgeReport.py --source serve --serve-url http://localhost:8087
+python3 passwordAgeReport.py --source cli --session <BW_SESSION> --organization-id <ORG_ID>
+python3 passwordAgeReport.py --source export --export-file bitwarden_export.json
+
+Optional Arguments:
+-------------------
+--collections     : Only report items in these collections (names or IDs, comma separated). Env: BW_COLLECTIONS.
+--changed-before  : Only report passwords last changed before this date (YYYY-MM-DD).
+--older-than      : Only report passwords older than this many days.
+--base-url        : Vault URL used for item links (default: https://vault.bitwarden.com). Env: BW_BASE_URL.
+-o, --output      : CSV output file (default: passwordAgeReport.csv).
+
+Examples:
+---------
+1. Passwords in two collections not changed since an incident (what bwOldPasswords.py did):
+   python3 passwordAgeReport.py --source serve --collections "Finance,IT" --changed-before 2022-11-10
+
+2. Revision dates of every item in an organization (what changedPasswordsReport.py did):
+   python3 passwordAgeReport.py --source cli --session $BW_SESSION --organization-id <ORG_ID>
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import urllib.request
+from datetime import datetime, timedelta, timezone
+
+DEFAULT_SERVE_URL = "http://localhost:8087"
+DEFAULT_BASE_URL = "https://vault.bitwarden.com"
+DEFAULT_BW_EXEC = "bw"
+DEFAULT_OUTPUT = "passwordAgeReport.csv"
+READ_CHUNK_SIZE = 1 << 20
+
+# (upper bound in days, label); None means no upper bound
+AGE_BUCKETS = [
+    (30, "< 30 days"),
+    (90, "30-89 days"),
+    (180, "90-179 days"),
+    (365, "180-364 days"),
+    (730, "1-2 years"),
+    (None, "2+ years"),
+]
+
+CSV_HEADER = ['Item_Name', 'Item_ID', 'Username', 'Collections', 'Password_Revision_Date',
+              'Password_Creation_Date', 'Age_Days', 'Age_Bucket', 'Link']
+
+_SEPARATORS = re.compile(r'[\s,]*')
+
+
+def iter_json_array(stream, key=None):
+    """
+    Yield the elements of a JSON array one at a time, without loading the whole document.
+    With key=None the document must be an array; otherwise the first array under "key" is used.
+    """
+    decoder = json.JSONDecoder()
+    start = re.compile(r'\[' if key is None else r'"%s"\s*:\s*\[' % re.escape(key))
+    buffer = ""
+    eof = False
+
+    # Find the start of the array
+    while True:
+        match = start.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        if eof:
+            return
+        buffer = buffer[-256:]
+        chunk = stream.read(READ_CHUNK_SIZE)
+        eof = not chunk
+        buffer += chunk
+
+    pos = 0
+    while True:
+        pos = _SEPARATORS.match(buffer, pos).end()
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            if pos == len(buffer):
+                raise json.JSONDecodeError("Incomplete element", buffer, pos)
+            element, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The next element continues past the end of the buffer, read more
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            buffer = buffer[pos:]
+            pos = 0
+            chunk = stream.read(READ_CHUNK_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield element
+
+
+def open_serve(serve_url, path):
+    """Open a `bw serve` endpoint as a text stream"""
+    response = urllib.request.urlopen(serve_url.rstrip('/') + path)
+    return io.TextIOWrapper(response, encoding='utf-8')
+
+
+def run_bw(bw_exec, session, args):
+    """Start a bw CLI command and return the process, with stdout as a text stream"""
+    env = {**os.environ, 'BW_SESSION': session} if session else None
+    return subprocess.Popen([bw_exec] + args, stdout=subprocess.PIPE, text=True, encoding='utf-8', env=env)
+
+
+def iter_bw_list(args, object_type):
+    """
+    Stream the JSON array printed by `bw list <object_type>`. Raises RuntimeError if bw fails
+    (a locked vault, an expired session); bw is stopped if the caller stops reading early.
+    """
+    command = ['list', object_type] + (['--organizationid', args.organization_id] if args.organization_id else [])
+    process = run_bw(args.bw_exec, args.session, command)
+    try:
+        yield from iter_json_array(process.stdout)
+        process.wait()
+    except ValueError:
+        # When bw fails its output isn't the JSON array, report the exit code instead
+        if process.wait() == 0:
+            raise
+    finally:
+        if process.poll() is None:
+            process.terminate()
+            process.wait()
+        process.stdout.close()
+    if process.returncode != 0:
+        raise RuntimeError(f"bw list {object_type} failed with exit code {process.returncode}")
+
+
+def load_collections(args):
+    """Return {collection ID: name} from the chosen source"""
+    if args.source == 'serve':
+        query = f"?organizationId={args.organization_id}" if args.organization_id else ""
+        with open_serve(args.serve_url, f"/list/object/collections{query}") as stream:
+            return {c['id']: c['name'] for c in iter_json_array(stream, 'data')}
+    if args.source == 'cli':
+        return {c['id']: c['name'] for c in iter_bw_list(args, 'collections')}
+    with open(args.export_file, 'r', encoding='utf-8') as stream:
+        return {c['id']: c['name'] for c in iter_json_array(stream, 'collections')}
+
+
+def iter_items(args):
+    """Stream items from the chosen source"""
+    if args.source == 'serve':
+        query = f"?organizationId={args.organization_id}" if args.organization_id else ""
+        with open_serve(args.serve_url, f"/list/object/items{query}") as stream:
+            yield from iter_json_array(stream, 'data')
+    elif args.source == 'cli':
+        yield from iter_bw_list(args, 'items')
+    else:
+        with open(args.export_file, 'r', encoding='utf-8') as stream:
+            yield from iter_json_array(stream, 'items')
+
+
+def parse_date(value):
+    """Parse a Bitwarden timestamp to a UTC datetime, to the second"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value[:19]).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def age_bucket(age_days):
+    """Return the index of the age bucket for an age in days"""
+    for index, (max_days, _) in enumerate(AGE_BUCKETS):
+        if max_days is None or age_days < max_days:
+            return index
+    return len(AGE_BUCKETS) - 1
+
+
+def build_report(args, writer, collection_names, collection_filter, cutoff):
+    """
+    Stream all login items into the CSV writer and return the per-collection
+    bucket counts as {collection name: [count per bucket]}.
+    """
+    now = datetime.now(timezone.utc)
+    base_url = args.base_url.rstrip('/')
+    summary = {}
+    reported = 0
+
+    for item in iter_items(args):
+        if item.get('type') != 1:  # type 1 = logins
+            continue
+        collection_ids = item.get('collectionIds') or []
+        if collection_filter is not None and collection_filter.isdisjoint(collection_ids):
+            continue
+
+        login = item.get('login') or {}
+        revision_date = login.get('passwordRevisionDate')
+        changed_at = parse_date(revision_date) or parse_date(item.get('creationDate'))
+        if changed_at is None:
+            continue
+        if cutoff is not None and changed_at >= cutoff:
+            continue
+
+        age_days = (now - changed_at).days
+        bucket = age_bucket(age_days)
+        names = [collection_names.get(cid, cid) for cid in collection_ids] or ["(no collection)"]
+        for name in names:
+            summary.setdefault(name, [0] * len(AGE_BUCKETS))[bucket] += 1
+
+        link = ""
+        if item.get('organizationId') and collection_ids:
+            link = (f"{base_url}/#/organizations/{item['organizationId']}"
+                    f"/vault?collectionId={collection_ids[0]}&itemId={item.get('id')}")
+
+        writer.writerow([
+            item.get('name', ''), item.get('id', ''), login.get('username') or '', '; '.join(names),
+            revision_date or 'N/A', item.get('creationDate', ''), age_days, AGE_BUCKETS[bucket][1], link
+        ])
+        reported += 1
+
+    return summary, reported
+
+
+def print_summary(summary):
+    """Print the per-collection age buckets, sorted by collection name"""
+    labels = [label for _, label in AGE_BUCKETS]
+    name_width = max([len("Collection")] + [len(name) for name in summary])
+    widths = [max(len(label), 6) for label in labels]
+
+    print("\nPassword Age by Collection:\n")
+    print("  ".join([f"{'Collection':<{name_width}}"] + [f"{label:>{w}}" for label, w in zip(labels, widths)]))
+    totals = [0] * len(AGE_BUCKETS)
+    for name in sorted(summary):
+        counts = summary[name]
+        totals = [t + c for t, c in zip(totals, counts)]
+        print("  ".join([f"{name:<{name_width}}"] + [f"{c:>{w}}" for c, w in zip(counts, widths)]))
+    print("  ".join([f"{'Total':<{name_width}}"] + [f"{c:>{w}}" for c, w in zip(totals, widths)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report password age per item and per collection.")
+    parser.add_argument('--source', choices=['serve', 'cli', 'export'], default='serve', help="Where to read items from (default: serve)")
+    parser.add_argument('--serve-url', default=os.environ.get("BW_SERVE_URL", DEFAULT_SERVE_URL), help=f"bw serve URL (default: {DEFAULT_SERVE_URL})")
+    parser.add_argument('--bw-exec', default=DEFAULT_BW_EXEC, help=f"Path to the Bitwarden CLI (default: {DEFAULT_BW_EXEC})")
+    parser.add_argument('--session', default=os.environ.get("BW_SESSION"), help="bw session key for --source cli. Env: BW_SESSION")
+    parser.add_argument('--organization-id', help="Only report items of this organization")
+    parser.add_argument('--export-file', help="Unencrypted Bitwarden JSON export for --source export")
+    parser.add_argument('--collections', default=os.environ.get("BW_COLLECTIONS"), help="Only report items in these collections (names or IDs, comma separated)")
+    parser.add_argument('--changed-before', help="Only report passwords last changed before this date (YYYY-MM-DD)")
+    parser.add_argument('--older-than', type=int, help="Only report passwords older than this many days")
+    parser.add_argument('--base-url', default=os.environ.get("BW_BASE_URL", DEFAULT_BASE_URL), help=f"Vault URL for item links (default: {DEFAULT_BASE_URL})")
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT, help=f"CSV output file (default: {DEFAULT_OUTPUT})")
+    args = parser.parse_args()
+
+    if args.source == 'export' and not args.export_file:
+        parser.error("--source export requires --export-file")
+    if args.changed_before and args.older_than is not None:
+        parser.error("--changed-before and --older-than are mutually exclusive")
+
+    cutoff = None
+    if args.changed_before:
+        try:
+            cutoff = datetime.strptime(args.changed_before, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        except ValueError:
+            parser.error("--changed-before must be a date in YYYY-MM-DD format")
+    elif args.older_than is not None:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=args.older_than)
+
+    try:
+        collection_names = load_collections(args)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: could not load collections: {e}")
+        sys.exit(1)
+
+    collection_filter = None
+    if args.collections:
+        ids_by_name = {name: cid for cid, name in collection_names.items()}
+        collection_filter = set()
+        for collection in (c.strip() for c in args.collections.split(',')):
+            if collection in collection_names:
+                collection_filter.add(collection)
+            elif collection in ids_by_name:
+                collection_filter.add(ids_by_name[collection])
+            elif collection:
+                print(f"Warning: collection '{collection}' not found")
+
+    try:
+        with open(args.output, 'w', newline='', encoding='utf-8', buffering=READ_CHUNK_SIZE) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_HEADER)
+            summary, reported = build_report(args, writer, collection_names, collection_filter, cutoff)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print_summary(summary)
+    print(f"\n{reported} items written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
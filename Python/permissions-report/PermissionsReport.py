@@ -2,10 +2,11 @@ import getopt
 import sys
 import os
 from libs import constants
-from libs.utils import check_dependencies, initial_setup, load_configfile, encrypt_pass, write_csv_file
+from libs.utils import check_dependencies, initial_setup, load_configfile, encrypt_pass, migrate_secrets, write_csv_file
 from libs.bwutils import *
 #from libs.bwutils import login_on_cli, load_collection_list_cli, login_to_bw_public_api, load_groups_api, load_collection_details_cli, convert_perms_to_text
 from libs.bwutils import get_members_list
+from libs.mailer import EmailDeliveryQueue, build_attachment
 
 def convert_collection_list_to_dict(coll_list):
     coll_dict = {}
@@ -69,12 +70,20 @@ def save_to_csv(coll_dict):
         for each_acc in coll_value["accounts"]:            
             csv_data.append( [ coll_value["name"], each_acc["email"], each_acc["perms"]  ] )
     
-    write_csv_file("permission_report.csv", csv_data ,"w")
+    write_csv_file(constants.REPORT_FILE, csv_data ,"w")
 
 def genreport():
     bw_path = check_dependencies()
     config_vars = load_configfile(constants.CONFIG_FILE)
 
+    # Connect to the mail server in the background while the report is generated
+    mailer = None
+    smtp = config_vars['smtp']
+    if smtp is not None:
+        mailer = EmailDeliveryQueue(smtp['host'], smtp.get('port', 587), smtp.get('username', ""),
+                                    smtp['password'], smtp.get('use_tls', "yes") != "no")
+        mailer.connect()
+
     cli_session = login_on_cli(bw_path, config_vars['vault_url'], config_vars['account_client_id'], config_vars['account_api_secret'], config_vars['account_password'] )
 
     coll_list = load_collection_list_cli(bw_path, config_vars['org_id'], cli_session)
@@ -103,6 +112,13 @@ def genreport():
 
     save_to_csv(coll_dict)
 
+    if mailer is not None:
+        mailer.send(smtp['sender'], smtp['recipients'], smtp.get('subject') or "Bitwarden Collection Permissions Report",
+                    "<p>The Bitwarden collection permissions report is attached.</p>",
+                    [build_attachment(constants.REPORT_FILE)])
+        if not mailer.close(constants.EMAIL_DELIVERY_TIMEOUT):
+            print("Email delivery did not finish in time")
+
 def print_help():
     script_name = os.path.basename(__file__)
     print(f"usage: {script_name} <options>")
@@ -115,6 +131,7 @@ def print_help():
     sys.stdout.write("%-18s %-50s\n" % ("setup","To setup the environment"))
     sys.stdout.write("%-18s %-50s\n" % ("genreport","To generate report"))
     sys.stdout.write("%-18s %-50s\n" % ("encrypt","To encrypt a single secret"))
+    sys.stdout.write("%-18s %-50s\n" % ("migrate","To move secrets from an older config file to the secrets file"))
     print("")
     print("Examples:")
     print(f"python3 {script_name} -c setup")
@@ -142,6 +159,8 @@ def main(argv):
         genreport()        
     elif command == "encrypt":
         encrypt_pass()        
+    elif command == "migrate":
+        migrate_secrets()
     else:
         print("Invalid Command!")
         print_help()
@@ -1,4 +1,9 @@
 #Constants
 CONFIG_FILE = "config.cfg"
+SECRETS_FILE = "secrets.enc"
+SECRET_OPTIONS = ["account_password", "account_api_secret", "org_api_secret"]
 DEFAULT_ROTATION_DAYS = 365
-THRESHOLDS = [14,30]
\ No newline at end of file
+THRESHOLDS = [14,30]
+REPORT_FILE = "permission_report.csv"
+ATTACHMENT_COMPRESS_BYTES = 1024 * 1024  # Larger attachments are sent zipped
+EMAIL_DELIVERY_TIMEOUT = 300
\ No newline at end of file
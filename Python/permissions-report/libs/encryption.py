@@ -6,8 +6,15 @@ from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives import padding
 
 from base64 import b64decode
+import json
 import os
 
+KDF_ITERATIONS = 100000
+
+# Keys derived during this run, by (password, salt). Every PBKDF2 derivation costs
+# tens of milliseconds, so each password/salt pair is only derived once per process.
+_derived_keys = {}
+
 
 def ensure_bytes(input_data):
     # Check if input_data is already a byte string
@@ -22,6 +29,22 @@ def ensure_bytes(input_data):
         # This is a simple fallback and may not be suitable for all data types
         return str(input_data).encode('utf-8')
 
+def derive_key(password, salt):
+    password = ensure_bytes(password)
+    cache_key = (password, salt)
+    key = _derived_keys.get(cache_key)
+    if key is None:
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA512(),
+            length=32,
+            salt=salt,
+            iterations=KDF_ITERATIONS,
+            backend=default_backend()
+        )
+        key = kdf.derive(password)
+        _derived_keys[cache_key] = key
+    return key
+
 def decrypt_aes_256_cbc(encrypted_data_with_salt_iv, password):
     # Your existing setup code for extracting salt, IV, deriving the key, etc.
 
@@ -37,15 +60,7 @@ def decrypt_aes_256_cbc(encrypted_data_with_salt_iv, password):
     encrypted_data = encrypted_data_with_salt_iv[40:]
 
     # Derive key using the same parameters as for encryption
-    backend = default_backend()
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA512(),
-        length=32,
-        salt=salt,
-        iterations=100000,
-        backend=backend
-    )
-    key = kdf.derive(password)
+    key = derive_key(password, salt)
 
     # Initialize cipher with the key and IV for decryption
     cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
@@ -71,14 +86,7 @@ def encrypt_aes_256_cbc(data, password):
     
     # Key derivation
     backend = default_backend()
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA512(),
-        length=32,
-        salt=salt,
-        iterations=100000,
-        backend=backend
-    )
-    key = kdf.derive(password)
+    key = derive_key(password, salt)
     
     # Generate a random IV
     iv = os.urandom(16)
@@ -98,3 +106,12 @@ def encrypt_aes_256_cbc(data, password):
     encrypted_data_with_salt_iv = b'Salted__' + salt + iv + encrypted
     
     return encrypted_data_with_salt_iv
+
+
+def encrypt_secrets_bundle(secrets, password):
+    # All secrets are encrypted together as one JSON document, so reading them back
+    # needs a single key derivation instead of one per secret
+    return encrypt_aes_256_cbc(json.dumps(secrets), password)
+
+def decrypt_secrets_bundle(encrypted_bundle, password):
+    return json.loads(decrypt_aes_256_cbc(encrypted_bundle, password).decode('utf-8'))
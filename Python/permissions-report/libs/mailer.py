@@ -0,0 +1,141 @@
+import os
+import queue
+import smtplib
+import threading
+import zipfile
+from io import BytesIO
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from libs import constants
+
+
+def build_attachment(file_path, compress_over=constants.ATTACHMENT_COMPRESS_BYTES):
+    # Attach a file as is, or zipped when it is larger than compress_over bytes
+    file_name = os.path.basename(file_path)
+    with open(file_path, 'rb') as file:
+        data = file.read()
+
+    if len(data) > compress_over:
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(file_name, data)
+        data = buffer.getvalue()
+        file_name += ".zip"
+
+    part = MIMEApplication(data, Name=file_name)
+    part['Content-Disposition'] = f'attachment; filename="{file_name}"'
+    return part
+
+
+def build_message(sender_email, receiver_email, subject, html_content, attachments=()):
+    msg = MIMEMultipart('mixed')
+    msg['Subject'] = subject
+    msg['From'] = sender_email
+    msg['To'] = receiver_email
+    msg.attach(MIMEText(html_content, 'html'))
+    for part in attachments:
+        msg.attach(part)
+    return msg
+
+
+class EmailDeliveryQueue:
+    """
+    Delivers emails from a background thread so a slow mail relay does not hold up
+    the report. The thread opens one SMTP connection, authenticates once and reuses it
+    for every message, reconnecting only if the server drops it.
+
+    :param host: SMTP server host (e.g., 'smtp.gmail.com')
+    :param port: SMTP server port (e.g., 587 for TLS)
+    :param username: Username for SMTP server authentication (leave empty for no auth)
+    :param password: Password for SMTP server authentication
+    :param use_tls: Whether to upgrade the connection with STARTTLS
+    """
+
+    def __init__(self, host, port, username="", password="", use_tls=True, timeout=60):
+        self.host = host
+        self.port = int(port)
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.server = None
+        self.sent = 0
+        self.failed = []
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="email-delivery", daemon=True)
+        self.thread.start()
+
+    def connect(self):
+        # Ask the delivery thread to connect now, so the SMTP handshake overlaps with report generation
+        self.queue.put(None)
+
+    def send(self, sender_email, receiver_emails, subject, html_content, attachments=()):
+        # Queue one message per recipient; returns immediately
+        if isinstance(receiver_emails, str):
+            receiver_emails = receiver_emails.split(',')
+        for receiver_email in (r.strip() for r in receiver_emails):
+            if receiver_email:
+                msg = build_message(sender_email, receiver_email, subject, html_content, attachments)
+                self.queue.put((sender_email, receiver_email, msg.as_string()))
+
+    def close(self, timeout=None):
+        # Wait until every queued message was handled, then disconnect.
+        # Returns False if delivery did not finish within timeout seconds.
+        self.queue.put(StopIteration)
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+    def _open(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        server.ehlo()
+        if self.use_tls:
+            server.starttls()
+            server.ehlo()
+        if self.username:
+            server.login(self.username, self.password)
+        self.server = server
+
+    def _disconnect(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except OSError:
+                pass
+            self.server = None
+
+    def _deliver(self, sender_email, receiver_email, message):
+        for attempt in range(2):
+            if self.server is None:
+                self._open()
+            try:
+                self.server.sendmail(sender_email, [receiver_email], message)
+                return
+            except smtplib.SMTPServerDisconnected:
+                # The relay closed the idle connection, reconnect once
+                self.server = None
+                if attempt:
+                    raise
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is StopIteration:
+                self._disconnect()
+                return
+            try:
+                if job is None:
+                    if self.server is None:
+                        self._open()
+                    continue
+                self._deliver(*job)
+                self.sent += 1
+                print(f"Email sent to {job[1]}")
+            except Exception as e:
+                if job is None:
+                    print(f"Failed to connect to the SMTP server: {e}")
+                else:
+                    self.failed.append(job[1])
+                    print(f"Failed to send email to {job[1]}: {e}")
+                self._disconnect()
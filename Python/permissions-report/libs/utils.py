@@ -2,16 +2,14 @@ import shutil
 import os
 from libs import constants
 import sys
-from libs.encryption import encrypt_aes_256_cbc, decrypt_aes_256_cbc
+from libs.encryption import encrypt_aes_256_cbc, decrypt_aes_256_cbc, encrypt_secrets_bundle, decrypt_secrets_bundle
 import random
 import string
 import getpass
 import base64
 import configparser
-import smtplib
 import platform
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+from libs.mailer import EmailDeliveryQueue
 import csv
 
 
@@ -112,9 +110,10 @@ def load_configfile(configfile):
         config_vars['org_id'] = config.get('config', 'org_id')
         config_vars['account_client_id'] = config.get('config', 'account_client_id')
         config_vars['vault_url'] = config.get('config', 'vault_url')
-        config_vars['account_password'] = config.get('config', 'account_password')
-        config_vars['account_api_secret'] = config.get('config', 'account_api_secret')
-        config_vars['org_api_secret'] = config.get('config', 'org_api_secret')
+        # Older setups keep each secret encrypted separately in the config file
+        if not check_file_exists(constants.SECRETS_FILE):
+            for option in constants.SECRET_OPTIONS:
+                config_vars[option] = config.get('config', option)
 
     except configparser.NoSectionError as e:
         print(f"Missing 'config' section in the config file. Error: {str(e)}")
@@ -126,6 +125,9 @@ def load_configfile(configfile):
         print(f"An unknown error occurred. Error: {str(e)}")
         sys.exit(1)
 
+    # Emailing the report is optional
+    config_vars['smtp'] = dict(config.items('smtp')) if config.has_section('smtp') else None
+
     config_vars['org_client_id'] = "organization." + config_vars['org_id']
 
     if "vault.bitwarden.com" in config_vars['vault_url']:
@@ -141,18 +143,53 @@ def load_configfile(configfile):
     #decrypt all secrets
     bw_passphrase = os.environ.get('BW_PASSPHRASE')
 
-    decrypted_secret = decrypt_aes_256_cbc(base64.b64decode(config_vars['account_password']), bw_passphrase)
-    #Decode the decrypted byte string back to a string
-    config_vars['account_password'] = decrypted_secret.decode('utf-8')
+    if check_file_exists(constants.SECRETS_FILE):
+        # One bundle holding every secret, decrypted with a single key derivation
+        config_vars.update(load_secrets_bundle(bw_passphrase))
+    else:
+        for option in constants.SECRET_OPTIONS:
+            decrypted_secret = decrypt_aes_256_cbc(base64.b64decode(config_vars[option]), bw_passphrase)
+            #Decode the decrypted byte string back to a string
+            config_vars[option] = decrypted_secret.decode('utf-8')
 
-    decrypted_secret = decrypt_aes_256_cbc(base64.b64decode(config_vars['account_api_secret']), bw_passphrase)
-    config_vars['account_api_secret'] = decrypted_secret.decode('utf-8')
+    if config_vars['smtp'] is not None:
+        config_vars['smtp']['password'] = config_vars.pop('smtp_password', "")
 
-    decrypted_secret = decrypt_aes_256_cbc(base64.b64decode(config_vars['org_api_secret']), bw_passphrase)
-    config_vars['org_api_secret'] = decrypted_secret.decode('utf-8')
-   
     return config_vars
 
+def load_secrets_bundle(secret_pass):
+    file_path = os.path.join(get_main_program_dir(), constants.SECRETS_FILE)
+    encrypted_bundle_base64 = read_file(file_path)
+    try:
+        return decrypt_secrets_bundle(base64.b64decode(encrypted_bundle_base64), secret_pass)
+    except ValueError:
+        print(f"Unable to decrypt '{constants.SECRETS_FILE}'. Please check the BW_PASSPHRASE env. variable")
+        sys.exit(1)
+
+def save_secrets_bundle(secrets, secret_pass):
+    file_path = os.path.join(get_main_program_dir(), constants.SECRETS_FILE)
+    encrypted_bundle = encrypt_secrets_bundle(secrets, secret_pass)
+    write_file(file_path, base64.b64encode(encrypted_bundle).decode('utf-8'), "w")
+
+def migrate_secrets():
+    # Move the separately encrypted secrets of an older config file into the secrets bundle
+    if check_file_exists(constants.SECRETS_FILE):
+        print(f"'{constants.SECRETS_FILE}' already exists. Nothing to migrate")
+        return
+
+    config_vars = load_configfile(constants.CONFIG_FILE)
+    secrets = {option: config_vars[option] for option in constants.SECRET_OPTIONS}
+    save_secrets_bundle(secrets, os.environ.get('BW_PASSPHRASE'))
+
+    file_path = os.path.join(get_main_program_dir(), constants.CONFIG_FILE)
+    config = configparser.ConfigParser()
+    config.read(file_path)
+    for option in constants.SECRET_OPTIONS:
+        config.remove_option('config', option)
+    with open(file_path, 'w') as configfile:
+        config.write(configfile)
+    print(f"Secrets moved to '{constants.SECRETS_FILE}'")
+
 def encrypt_pass():
     bw_passprahse = getpass.getpass("Please enter the pass phrase:")
     bw_plain_secret = getpass.getpass("Please enter the string to encrypt:")
@@ -211,16 +248,29 @@ def initial_setup():
     org_id = input("Enter your Bitwarden Organization ID:")
     org_api_client_secret = getpass.getpass("Enter your Bitwarden Organization API Secret:")
 
-    #writing secrets to files
+    smtp_settings = None
+    smtp_password = ""
+    if input("Send the report by email? (y/n): ").strip().lower() == 'y':
+        smtp_settings = {
+            'host': input("Enter the SMTP Server/Hostname:"),
+            'port': input("Enter the SMTP Port (e.g. 587):") or "587",
+            'use_tls': "no" if input("Use STARTTLS? (y/n): ").strip().lower() == 'n' else "yes",
+            'username': input("Enter the SMTP Username (leave empty if no auth is required):"),
+            'sender': input("Enter the Email Sender:"),
+            'recipients': input("Enter the Email Recipients (comma separated):"),
+            'subject': input("Enter the Email Subject:"),
+        }
+        if smtp_settings['username']:
+            smtp_password = getpass.getpass("Enter the SMTP Password:")
 
-    encrypted_account_password = encrypt_aes_256_cbc(account_password, secret_pass)
-    encrypted_account_password_base64 = base64.b64encode(encrypted_account_password).decode('utf-8')
-    
-    encrypted_account_client_secret = encrypt_aes_256_cbc(account_client_secret, secret_pass)
-    encrypted_account_client_secret_base64 = base64.b64encode(encrypted_account_client_secret).decode('utf-8')
+    #writing secrets to files
 
-    encrypted_api_client_secret = encrypt_aes_256_cbc(org_api_client_secret, secret_pass)
-    encrypted_api_client_secret_base64 = base64.b64encode(encrypted_api_client_secret).decode('utf-8')
+    save_secrets_bundle({
+        'account_password': account_password,
+        'account_api_secret': account_client_secret,
+        'org_api_secret': org_api_client_secret,
+        'smtp_password': smtp_password,
+    }, secret_pass)
 
     # writing config file
     config = configparser.ConfigParser()
@@ -233,9 +283,10 @@ def initial_setup():
     config.set(section, 'org_id', org_id)
     config.set(section, 'account_client_id', account_client_id)
     config.set(section, 'vault_url', vault_url)
-    config.set(section, 'account_password', encrypted_account_password_base64)
-    config.set(section, 'account_api_secret', encrypted_account_client_secret_base64)
-    config.set(section, 'org_api_secret', encrypted_api_client_secret_base64)
+    if smtp_settings is not None:
+        config.add_section('smtp')
+        for option, value in smtp_settings.items():
+            config.set('smtp', option, value)
 
     # Write the configuration to a file
     file_path = os.path.join(main_program_dir, constants.CONFIG_FILE)
@@ -305,43 +356,24 @@ def write_csv_file(file_path, data, writemode):
         print(f"Error: An error occurred while writing to the file '{file_path}': {e}")
 
 
-def send_html_email(host, port, username, password, sender_email, receiver_emails, subject, html_content):
+def send_html_email(host, port, username, password, sender_email, receiver_emails, subject, html_content, attachments=()):
     """
-    Send an HTML email.
+    Send an HTML email to each receiver over a single SMTP connection and wait until it is sent.
+    Use libs.mailer.EmailDeliveryQueue directly to send in the background instead.
 
     :param host: SMTP server host (e.g., 'smtp.gmail.com')
     :param port: SMTP server port (e.g., 587 for TLS)
     :param username: Username for SMTP server authentication (leave empty for no auth)
     :param password: Password for SMTP server authentication
     :param sender_email: Email address of the sender
-    :param receiver_email: Email address of the receiver
+    :param receiver_emails: Email addresses of the receivers, as a list or comma separated
     :param subject: Subject of the email
     :param html_content: HTML content of the email
+    :param attachments: Attachments built with libs.mailer.build_attachment
     """
 
-    if isinstance(receiver_emails, str):
-        receiver_emails = receiver_emails.split(',')
-    # Create a MIMEMultipart message
-    msg = MIMEMultipart('alternative')
-    msg['Subject'] = subject
-    msg['From'] = sender_email
-    msg['To'] = ", ".join(receiver_emails)  # Join all receiver addresses into a single string for the header
-
-    # Attach the HTML content
-    part = MIMEText(html_content, 'html')
-    msg.attach(part)
-
-    try:
-        # Connect to the SMTP server
-        with smtplib.SMTP(host, port) as server:
-            server.ehlo()  # Can be omitted
-            server.starttls()  # Secure the connection
-            server.ehlo()  # Can be omitted
-            # If username is provided, authenticate
-            if username:
-                server.login(username, password)
-            # Send email
-            server.sendmail(sender_email, receiver_emails, msg.as_string())
+    mailer = EmailDeliveryQueue(host, port, username, password)
+    mailer.send(sender_email, receiver_emails, subject, html_content, attachments)
+    mailer.close()
+    if mailer.sent and not mailer.failed:
         print("Email sent successfully!")
-    except Exception as e:
-        print(f"Failed to send email: {e}")
\ No newline at end of file
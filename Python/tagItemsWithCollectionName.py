@@ -1,109 +1,174 @@
 # Script to tag each vault item with its Collection Name to aid vault searchability
 # The Bitwarden CLI tool should be available, and its location defined below (https://bitwarden.com/help/cli/)
 # Run 'bw unlock' from the same terminal used to run this script in order to obtain a session key before starting
-
-import json
+#
+# Items are read and written through `bw serve` (https://bitwarden.com/help/cli/#serve). If no server is
+# running at --serve-url, one is started with the session key and stopped when the script finishes.
+# The tag is the last block of the notes ("Collections:" followed by one collection name per line).
+# Re-running the script replaces an outdated tag, including one naming a renamed collection, and
+# skips items whose tag is already correct.
+#
+# Usage:
+#   python3 tagItemsWithCollectionName.py --org-id <ORG_ID> --dry-run   # Count items that would change
+#   python3 tagItemsWithCollectionName.py --org-id <ORG_ID> --workers 8
+
+import argparse
+import os
 import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TAG_HEADER = "Collections:"
+DEFAULT_SERVE_URL = "http://localhost:8087"
+DEFAULT_WORKERS = 8
 
 # setup
-session_key = input(
-    "Input session key: "
-)  # bw session key - https://bitwarden.com/help/cli/#using-a-session-key
+bw_path = "/Users/adambramley/.nvm/versions/node/v19.9.0/bin/bw"
+http = requests.Session()
+
+
+def serve_is_running(serve_url):
+    try:
+        http.get(f"{serve_url}/status", timeout=2)
+        return True
+    except requests.RequestException:
+        return False
+
+
+# Start `bw serve` with the session key and wait until it answers
+def start_serve(serve_url, session_key):
+    port = serve_url.rsplit(":", 1)[-1]
+    print(f"Starting bw serve on port {port}...")
+    process = subprocess.Popen(
+        [bw_path, "serve", "--port", port],
+        env={**os.environ, "BW_SESSION": session_key},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(240):
+        if process.poll() is not None:
+            print("Error: bw serve exited unexpectedly")
+            sys.exit(1)
+        if serve_is_running(serve_url):
+            return process
+        time.sleep(0.25)
+    process.kill()
+    print("Error: bw serve did not start")
+    sys.exit(1)
+
+
+def serve_list(serve_url, object_type, org_id):
+    response = http.get(f"{serve_url}/list/object/{object_type}", params={"organizationId": org_id})
+    result = response.json()
+    if not result.get("success"):
+        print(f"Error: Unable to obtain {object_type} from vault: {result.get('message')}")
+        return None
+    return result["data"]["data"]
 
-# The org_id can be obtained with `bw list organizations --pretty` run from the bw CLI tool (https://bitwarden.com/help/cli/#list)
-# org_id = "" # For use with a hardcoded Org ID
-org_id = input("Input Org ID: ")  # To input the Org ID interactively
-bw = ["/Users/adambramley/.nvm/versions/node/v19.9.0/bin/bw", "--session", session_key]
 
+# Obtain collection data as {collection id: name}
+def get_collection_data(serve_url, org_id):
+    collections = serve_list(serve_url, "collections", org_id)
+    if collections is None:
+        return None
+    return {collection["id"]: collection["name"] for collection in collections}
 
-# Obtain collection data
-def get_collection_data():
-    collections = subprocess.run(
-        bw + ["list", "collections"], capture_output=True, text=True
-    )
 
-    if collections.returncode == 0:
+# Return the notes without the collections tag(s) at the end. A tag is the last TAG_HEADER line
+# and the non-empty lines after it, whatever the names are, so tags of renamed collections go too.
+def strip_collection_tag(notes):
+    lines = notes.split("\n")
+    while TAG_HEADER in lines:
+        start = len(lines) - 1 - lines[::-1].index(TAG_HEADER)
+        names = lines[start + 1:]
+        if "" in names and names != [""]:  # [""] is an empty tag written by older versions
+            break
+        lines = lines[:start]
+    return "\n".join(lines).rstrip("\n")
 
-        try:
-            collections = json.loads(collections.stdout)
 
-            org_collections = [
-                {"id": item["id"], "name": item["name"]} for item in collections
-            ]
-            return org_collections
+# Notes as they should be for the item, with the collections tag replacing any previous one
+def tagged_notes(item, org_collections):
+    notes = item.get("notes") or ""
+    body = strip_collection_tag(notes)
+    names = [org_collections[cid] for cid in item.get("collectionIds") or [] if cid in org_collections]
+    if not names:
+        return body or None
+    tag = TAG_HEADER + "\n" + "\n".join(names)
+    return f"{body}\n{tag}" if body else tag
 
-        except json.JSONDecodeError:
-            print("Error: Unable to decode Org Collections data")
-            return None
 
-    else:
-        print("Error: Unable to obtain item list from vault")
-        return None
+def write_item(serve_url, item):
+    response = http.put(f"{serve_url}/object/item/{item['id']}", json=item)
+    result = response.json()
+    if not result.get("success"):
+        raise RuntimeError(result.get("message"))
+    return item["name"]
 
 
 # Add each collection item is present in to item notes field
-def update_items_notes(org_collections):
-    # Get all Vault Items
-    items_output = subprocess.run(
-        bw + ["list", "items"], capture_output=True, text=True
-    )
-
-    if items_output.returncode == 0:
-        try:
-            items_data = json.loads(items_output.stdout)
-
-            for item in items_data:
-
-                item_id = item.get("id")
-                item_collections = item.get("collectionIds", [])
-                collection_names = []
-
-                # Map Collection Names against IDs
-                for collection_id in item_collections:
-                    for org_collection in org_collections:
-                        if org_collection["id"] == collection_id:
-                            collection_names.append(org_collection["name"])
-
-                # Append collections if notes exist, write collections if notes are empty
-                item_notes = item.get("notes", "")
-                if item_notes is not None:
-                    item_notes += "\nCollections:\n" + "\n".join(collection_names)
-
-                else:
-                    item_notes = "Collections:\n" + "\n".join(collection_names)
-
-                # Write new notes to item
-                item["notes"] = item_notes
-                item_json = json.dumps(item)
-
-                # Produce encoded json of modified item
-                encodedJson = subprocess.run(
-                    bw + ["encode"], input=item_json, capture_output=True, text=True
-                )
-                if encodedJson.returncode == 0:
-                    encodedJson = encodedJson.stdout.strip()
-                else:
-                    print("Error encoding JSON:", encodedJson.stderr)
-
-                # Write modified item back to vault
-                edit_item = subprocess.run(
-                    bw + ["edit", "item", item_id, encodedJson],
-                    capture_output=True,
-                    text=True,
-                )
-                if edit_item.returncode == 0:
-                    print(f"Updated {item['name']}")
-                else:
-                    print(f"Error editing {item['name']}:", edit_item.stderr)
-
-        except json.JSONDecodeError:
-            print("Error: Unable to process items data")
-            return None
-
-    else:
-        print("Error: Unable to decode items data")
+def update_items_notes(serve_url, org_id, org_collections, workers, dry_run):
+    items_data = serve_list(serve_url, "items", org_id)
+    if items_data is None:
         return None
 
-
-org_collections = get_collection_data()
-org_items_processed = update_items_notes(org_collections)
+    changed = []
+    for item in items_data:
+        notes = tagged_notes(item, org_collections)
+        if notes != (item.get("notes") or None):
+            item["notes"] = notes
+            changed.append(item)
+
+    print(f"{len(changed)} of {len(items_data)} items need their collections tag updated")
+    if dry_run or not changed:
+        return len(changed)
+
+    updated = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(write_item, serve_url, item): item for item in changed}
+        for done, future in enumerate(as_completed(futures), 1):
+            item = futures[future]
+            try:
+                future.result()
+                updated += 1
+                print(f"[{done}/{len(changed)}] Updated {item['name']}")
+            except Exception as e:
+                print(f"[{done}/{len(changed)}] Error editing {item['name']}: {e}")
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tag each vault item with its collection names")
+    # The org_id can be obtained with `bw list organizations --pretty` run from the bw CLI tool (https://bitwarden.com/help/cli/#list)
+    parser.add_argument("--org-id", help="Organization ID (prompted for if not given)")
+    parser.add_argument("--serve-url", default=DEFAULT_SERVE_URL, help=f"bw serve URL (default: {DEFAULT_SERVE_URL})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Concurrent item updates (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the items that would be updated")
+    args = parser.parse_args()
+
+    org_id = args.org_id or input("Input Org ID: ")  # To input the Org ID interactively
+    serve_url = args.serve_url.rstrip("/")
+    http.mount(serve_url, HTTPAdapter(pool_maxsize=args.workers))
+
+    serve_process = None
+    if not serve_is_running(serve_url):
+        session_key = input(
+            "Input session key: "
+        )  # bw session key - https://bitwarden.com/help/cli/#using-a-session-key
+        serve_process = start_serve(serve_url, session_key)
+
+    try:
+        org_collections = get_collection_data(serve_url, org_id)
+        if org_collections is not None:
+            update_items_notes(serve_url, org_id, org_collections, args.workers, args.dry_run)
+    finally:
+        if serve_process is not None:
+            serve_process.kill()
+
+
+if __name__ == "__main__":
+    main()
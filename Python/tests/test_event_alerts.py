@@ -0,0 +1,32 @@
+"""FailedLoginDetector thresholds."""
+
+import pytest
+
+from event_alerts import FailedLoginDetector
+
+
+def failed_login(second, user="u1", ip="203.0.113.7"):
+    return {"type": 1005, "date": f"2024-05-01T12:00:{second:02d}.0000000Z", "actingUserId": user, "ipAddress": ip}
+
+
+def test_user_failures_alert_once_per_window():
+    detector = FailedLoginDetector(user_failures=3, ip_failures=100, ip_users=100)
+
+    alerts = detector.process([failed_login(s) for s in range(6)])
+
+    assert [a["rule"] for a in alerts] == ["user_failures"]
+    assert alerts[0]["count"] == 3
+
+
+def test_ip_users_alerts_on_distinct_users():
+    detector = FailedLoginDetector(user_failures=100, ip_failures=100, ip_users=2)
+
+    alerts = detector.process([failed_login(0, "u1"), failed_login(1, "u1"), failed_login(2, "u2")])
+
+    assert [a["rule"] for a in alerts] == ["ip_users"]
+
+
+@pytest.mark.parametrize("threshold", ["user_failures", "ip_failures", "ip_users", "window"])
+def test_thresholds_below_one_are_rejected(threshold):
+    with pytest.raises(ValueError):
+        FailedLoginDetector(**{threshold: 0})
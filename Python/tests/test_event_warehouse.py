@@ -0,0 +1,93 @@
+"""EventWarehouse sync watermark."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+
+from event_warehouse import DATE_FORMAT, EventWarehouse, sync
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class FakeEventAPI:
+    """Pages events newest first, like /public/events; can fail on a given page."""
+
+    def __init__(self, events, page_size=2, fail_on_page=None):
+        self.events = sorted(events, key=lambda e: e['date'], reverse=True)
+        self.page_size = page_size
+        self.fail_on_page = fail_on_page
+        self.windows = []
+
+    def get(self, url, params=None):
+        if url.endswith("/public/members"):
+            return FakeResponse({"data": []})
+        page = int(params.get('continuationToken') or 0)
+        if page == 0:
+            self.windows.append((params['start'], params['end']))
+        if page == self.fail_on_page:
+            raise requests.ConnectionError("connection reset")
+        window = [e for e in self.events if params['start'] <= e['date'] <= params['end']]
+        chunk = window[page * self.page_size:(page + 1) * self.page_size]
+        more = (page + 1) * self.page_size < len(window)
+        return FakeResponse({"data": chunk, "continuationToken": str(page + 1) if more else None})
+
+
+def event(hours_ago, type_=1000):
+    date = (datetime.now(timezone.utc) - timedelta(hours=hours_ago)).strftime(DATE_FORMAT)
+    return {"type": type_, "date": date, "actingUserId": f"u{hours_ago}"}
+
+
+@pytest.fixture
+def warehouse():
+    store = EventWarehouse(":memory:")
+    yield store
+    store.close()
+
+
+def test_interrupted_sync_keeps_the_watermark(warehouse):
+    events = [event(h) for h in range(1, 9)]
+    api = FakeEventAPI(events, page_size=2, fail_on_page=2)
+
+    with pytest.raises(requests.ConnectionError):
+        sync(warehouse, api, "http://api", days=1)
+    assert warehouse.get_watermark() is None  # The newest pages were stored, the oldest were not
+
+    api.fail_on_page = None
+    sync(warehouse, api, "http://api", days=1)
+    assert warehouse.query(count=True) == 8
+    assert warehouse.get_watermark() is not None
+
+
+def test_live_writes_do_not_move_the_watermark(warehouse):
+    api = FakeEventAPI([event(30)])
+    sync(warehouse, api, "http://api", days=2)
+    watermark = warehouse.get_watermark()
+
+    # generateEventLogReport --event_store writes a newer event between syncs
+    live = event(0)
+    warehouse.add_events([live])
+    assert warehouse.get_watermark() == watermark
+
+    api.events = [live] + api.events
+    sync(warehouse, api, "http://api", days=2)
+    start, _ = api.windows[-1]
+    assert start <= (watermark - timedelta(minutes=1)).strftime(DATE_FORMAT)  # Resumes from the last sync
+    assert warehouse.query(count=True) == 2
+
+
+def test_watermark_never_moves_back(warehouse):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    warehouse.set_watermark(now)
+    warehouse.set_watermark(now - timedelta(days=1))
+
+    assert warehouse.get_watermark() == now
@@ -0,0 +1,134 @@
+"""permissions-report's EmailDeliveryQueue against a local stand-in SMTP server."""
+
+import email
+import os
+import socket
+import socketserver
+import sys
+import threading
+import zipfile
+from io import BytesIO
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'permissions-report'))
+
+from libs.mailer import EmailDeliveryQueue, build_attachment  # noqa: E402
+
+
+class SMTPStandIn:
+    """Accepts any mail over plain SMTP and keeps it; can drop the connection after each message."""
+
+    def __init__(self, drop_after_message=False):
+        self.messages = []  # (sender, recipients, email.message.Message)
+        self.connections = 0
+        stand_in = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, text):
+                self.wfile.write(f"{text}\r\n".encode('ascii'))
+
+            def handle(self):
+                stand_in.connections += 1
+                self.reply("220 stand-in ESMTP")
+                sender, recipients = None, []
+                for line in self.rfile:
+                    command = line.decode('utf-8').strip()
+                    verb = command[:4].upper()
+                    if verb in ("EHLO", "HELO"):
+                        self.reply("250 stand-in")
+                    elif verb == "MAIL":
+                        sender, recipients = command.split(':', 1)[1].strip(' <>'), []
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        recipients.append(command.split(':', 1)[1].strip(' <>'))
+                        self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        data = []
+                        for data_line in self.rfile:
+                            if data_line == b".\r\n":
+                                break
+                            data.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                        stand_in.messages.append((sender, recipients, email.message_from_bytes(b"".join(data))))
+                        self.reply("250 OK")
+                        if stand_in.drop_after_message:
+                            return
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    elif verb in ("RSET", "NOOP"):
+                        self.reply("250 OK")
+                    else:
+                        self.reply("502 Command not implemented")
+
+        self.drop_after_message = drop_after_message
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def smtp():
+    server = SMTPStandIn()
+    yield server
+    server.close()
+
+
+def test_one_connection_for_all_recipients(smtp):
+    mailer = EmailDeliveryQueue('127.0.0.1', smtp.port, use_tls=False, timeout=10)
+    mailer.send("reports@example.com", "a@example.com, b@example.com,c@example.com", "Report", "<p>Hi</p>")
+
+    assert mailer.close(timeout=10)
+    assert mailer.sent == 3 and mailer.failed == []
+    assert smtp.connections == 1
+    assert [recipients for _, recipients, _ in smtp.messages] == [["a@example.com"], ["b@example.com"], ["c@example.com"]]
+    assert all(message['Subject'] == "Report" for _, _, message in smtp.messages)
+
+
+def test_reconnects_when_the_server_drops_the_connection(smtp):
+    smtp.drop_after_message = True
+    mailer = EmailDeliveryQueue('127.0.0.1', smtp.port, use_tls=False, timeout=10)
+    mailer.send("reports@example.com", ["a@example.com", "b@example.com"], "Report", "<p>Hi</p>")
+
+    assert mailer.close(timeout=10)
+    assert mailer.sent == 2 and mailer.failed == []
+    assert smtp.connections == 2
+
+
+def test_large_attachments_are_zipped(smtp, tmp_path):
+    small = tmp_path / "small.csv"
+    small.write_text("a,b\n1,2\n")
+    large = tmp_path / "large.csv"
+    large.write_text("collection,member,permission\n" * 1000)
+
+    mailer = EmailDeliveryQueue('127.0.0.1', smtp.port, use_tls=False, timeout=10)
+    attachments = [build_attachment(str(small), compress_over=1024), build_attachment(str(large), compress_over=1024)]
+    mailer.send("reports@example.com", "a@example.com", "Report", "<p>Hi</p>", attachments)
+    assert mailer.close(timeout=10)
+
+    parts = {part.get_filename(): part.get_payload(decode=True)
+             for part in smtp.messages[0][2].walk() if part.get_filename()}
+    assert set(parts) == {"small.csv", "large.csv.zip"}
+    assert parts["small.csv"] == small.read_bytes()
+    with zipfile.ZipFile(BytesIO(parts["large.csv.zip"])) as archive:
+        assert archive.read("large.csv") == large.read_bytes()
+    assert len(parts["large.csv.zip"]) < large.stat().st_size
+
+
+def test_unreachable_server_marks_recipients_failed():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        closed_port = probe.getsockname()[1]
+
+    mailer = EmailDeliveryQueue('127.0.0.1', closed_port, use_tls=False, timeout=5)
+    mailer.send("reports@example.com", ["a@example.com", "b@example.com"], "Report", "<p>Hi</p>")
+
+    assert mailer.close(timeout=20)
+    assert mailer.sent == 0
+    assert mailer.failed == ["a@example.com", "b@example.com"]
@@ -0,0 +1,24 @@
+"""estimate_password_strength on passwords outside plain ASCII."""
+
+import pytest
+
+from generatePasswordAuditReport import estimate_password_strength
+
+
+@pytest.mark.parametrize("password", ["日本語パスワード", "كلمةالسر", "סיסמה", "½¾", "密码123"])
+def test_letters_without_case_are_scored(password):
+    score, entropy = estimate_password_strength(password)
+
+    assert 0 <= score <= 4
+    assert entropy > 0
+
+
+def test_empty_password_scores_zero():
+    assert estimate_password_strength("") == (0, 0.0)
+
+
+def test_caseless_letters_widen_the_charset():
+    _, digits_only = estimate_password_strength("73918264")
+    _, with_cjk = estimate_password_strength("7391826語")
+
+    assert with_cjk > digits_only
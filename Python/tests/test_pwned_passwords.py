@@ -0,0 +1,129 @@
+"""PwnedPasswordsClient against a local stand-in for the HIBP range API."""
+
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from generatePasswordAuditReport import PwnedPasswordsClient
+
+PWNED = {"password": 3861493, "letmein": 512, "hunter2": 24}
+PADDING_ENTRIES = 20
+
+
+def sha1(password):
+    return hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
+
+
+class RangeStandIn:
+    """Serves /range/<prefix> like api.pwnedpasswords.com, counting requests per prefix."""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.padding_requested = []
+        self.ranges = {}
+        for password, count in PWNED.items():
+            digest = sha1(password)
+            self.ranges.setdefault(digest[:5], []).append(f"{digest[5:]}:{count}")
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                prefix = self.path.rsplit('/', 1)[-1]
+                if not self.path.startswith('/range/') or len(prefix) != 5:
+                    self.send_error(400)
+                    return
+                stand_in.requests[prefix] += 1
+                padded = self.headers.get('Add-Padding') == 'true'
+                stand_in.padding_requested.append(padded)
+                lines = list(stand_in.ranges.get(prefix, []))
+                if padded:
+                    lines += [f"{i:035X}:0" for i in range(PADDING_ENTRIES)]
+                body = "\r\n".join(lines).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stand_in():
+    server = RangeStandIn()
+    yield server
+    server.close()
+
+
+def test_returns_counts_and_fetches_each_range_once(stand_in, tmp_path):
+    client = PwnedPasswordsClient(api_url=stand_in.url, cache_dir=str(tmp_path), workers=4)
+    passwords = ["password", "letmein", "hunter2", "password", "not-pwned-8c1f"]
+
+    results = client.check_passwords(passwords)
+
+    assert results == {"password": 3861493, "letmein": 512, "hunter2": 24, "not-pwned-8c1f": 0}
+    expected_prefixes = {sha1(p)[:5] for p in set(passwords)}
+    assert set(stand_in.requests) == expected_prefixes
+    assert all(count == 1 for count in stand_in.requests.values())
+
+
+def test_requests_padding_and_ignores_padding_entries(stand_in, tmp_path):
+    client = PwnedPasswordsClient(api_url=stand_in.url, cache_dir=str(tmp_path))
+
+    hash_suffixes = client.get_range(sha1("password")[:5])
+
+    assert stand_in.padding_requested == [True]
+    assert hash_suffixes == {sha1("password")[5:]: 3861493}
+    assert client.get_range("00000") == {}  # A range of padding only holds nothing pwned
+
+
+def test_cached_ranges_are_not_fetched_again(stand_in, tmp_path):
+    PwnedPasswordsClient(api_url=stand_in.url, cache_dir=str(tmp_path)).check_passwords(["password"])
+    assert sum(stand_in.requests.values()) == 1
+
+    # A new client (a later run) reads the range from the on-disk cache
+    results = PwnedPasswordsClient(api_url=stand_in.url, cache_dir=str(tmp_path)).check_passwords(["password"])
+
+    assert results == {"password": 3861493}
+    assert sum(stand_in.requests.values()) == 1
+
+
+def test_expired_cache_entries_are_refetched(stand_in, tmp_path):
+    client = PwnedPasswordsClient(api_url=stand_in.url, cache_dir=str(tmp_path), cache_ttl_hours=1)
+    client.check_passwords(["letmein"])
+    cached = tmp_path / f"{sha1('letmein')[:5]}.txt"
+    two_hours_ago = time.time() - 2 * 3600
+    os.utime(cached, (two_hours_ago, two_hours_ago))
+
+    assert client.check_passwords(["letmein"]) == {"letmein": 512}
+    assert stand_in.requests[sha1("letmein")[:5]] == 2
+    assert cached.stat().st_mtime > two_hours_ago + 3600  # Rewritten with the fresh range
+
+
+def test_without_cache_dir_every_run_fetches(stand_in):
+    client = PwnedPasswordsClient(api_url=stand_in.url, cache_dir=None)
+    client.check_passwords(["hunter2"])
+    client.check_passwords(["hunter2"])
+
+    assert stand_in.requests[sha1("hunter2")[:5]] == 2
+
+
+def test_failed_range_reports_none(stand_in, tmp_path):
+    client = PwnedPasswordsClient(api_url=stand_in.url + "/missing", cache_dir=str(tmp_path))
+
+    assert client.check_passwords(["password"]) == {"password": None}
+    assert not list(tmp_path.iterdir())  # Errors are not cached
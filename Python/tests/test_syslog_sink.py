@@ -0,0 +1,221 @@
+"""SyslogSink against local UDP, TCP and TLS listeners."""
+
+import errno
+import re
+import shutil
+import socket
+import socketserver
+import ssl
+import subprocess
+import threading
+import time
+
+import pytest
+
+from event_sinks import MAX_UDP_PAYLOAD, SyslogSink
+
+COLUMNS = ["userEmail", "ipAddress"]
+RFC5424 = re.compile(r'^<(\d+)>1 (\S+) (\S+) bitwarden-events (\d+) (\S+) (\[.*?\]|-) ?(.*)$')
+
+
+def make_events(count, start=0):
+    return [{"type": 1000, "date": f"2024-05-01T12:00:{i % 60:02d}.1234567Z", "userEmail": f"u{i}@example.com",
+             "ipAddress": "203.0.113.7", "event": f"Logged in #{i}"} for i in range(start, start + count)]
+
+
+def wait_for(condition, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+
+def free_port(kind=socket.SOCK_STREAM):
+    with socket.socket(socket.AF_INET, kind) as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+class Listener:
+    """Collects syslog messages: one per datagram over UDP, octet-counted frames over TCP/TLS."""
+
+    def __init__(self, protocol, port=0, certfile=None):
+        self.messages = []
+        self.connections = 0
+        listener = self
+
+        class UDPHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                listener.messages.append(self.request[0].decode('utf-8'))
+
+        class StreamHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                listener.connections += 1
+                while True:
+                    length = b""
+                    while not length.endswith(b" "):
+                        char = self.rfile.read(1)
+                        if not char:
+                            return
+                        length += char
+                    listener.messages.append(self.rfile.read(int(length)).decode('utf-8'))
+
+        if protocol == "udp":
+            self.server = socketserver.ThreadingUDPServer(('127.0.0.1', port), UDPHandler)
+        else:
+            self.server = socketserver.ThreadingTCPServer(('127.0.0.1', port), StreamHandler, bind_and_activate=False)
+            self.server.allow_reuse_address = True
+            self.server.server_bind()
+            self.server.server_activate()
+            if certfile:
+                context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+                context.load_cert_chain(certfile)
+                self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def listeners():
+    started = []
+
+    def start(protocol, port=0, certfile=None):
+        listener = Listener(protocol, port, certfile)
+        started.append(listener)
+        return listener
+
+    yield start
+    for listener in started:
+        listener.close()
+
+
+def test_udp_sends_one_rfc5424_message_per_datagram(listeners):
+    listener = listeners("udp")
+    sink = SyslogSink("127.0.0.1", listener.port, "udp", columns=COLUMNS)
+    sink.send(make_events(50))
+
+    assert wait_for(lambda: len(listener.messages) == 50)
+    sink.close()
+    match = RFC5424.match(sorted(listener.messages, key=lambda m: int(m.rsplit('#', 1)[1]))[0])
+    assert match.group(1) == "14"  # facility user, severity info
+    assert match.group(2) == "2024-05-01T12:00:00.123456Z"
+    assert match.group(5) == "1000"
+    assert match.group(6) == '[bitwarden@32473 userEmail="u0@example.com" ipAddress="203.0.113.7"]'
+    assert match.group(7) == "Logged in #0"
+    assert sink.stats()["sent"] == 50 and sink.stats()["dropped"] == 0
+
+
+def test_udp_truncates_oversized_messages_and_keeps_going(listeners):
+    listener = listeners("udp")
+    sink = SyslogSink("127.0.0.1", listener.port, "udp", columns=COLUMNS)
+    huge = dict(make_events(1)[0], event="é" * MAX_UDP_PAYLOAD)
+    sink.send([huge] + make_events(3, start=1))
+
+    assert wait_for(lambda: len(listener.messages) == 4)
+    sink.close()
+    stats = sink.stats()
+    assert stats["truncated"] == 1 and stats["sent"] == 4 and stats["dropped"] == 0
+    assert max(len(m.encode('utf-8')) for m in listener.messages) <= MAX_UDP_PAYLOAD
+
+
+def test_udp_retries_transient_errors_without_duplicates(listeners):
+    port = free_port(socket.SOCK_DGRAM)
+    sink = SyslogSink("127.0.0.1", port, "udp", columns=COLUMNS, batch_size=10)
+    # Nothing listens yet: loopback reports ICMP port unreachable as ECONNREFUSED on later sends
+    sink.send(make_events(30))
+    assert wait_for(lambda: sink.stats()["errors"] >= 1, timeout=5)
+
+    listener = listeners("udp", port)
+    assert wait_for(lambda: sink.stats()["buffered"] == 0 and sink.stats()["sent"] == 30)
+    sink.close()
+    assert sink.stats()["dropped"] == 0
+    delivered = [m.rsplit('#', 1)[1] for m in listener.messages]
+    assert len(delivered) == len(set(delivered))
+
+
+def test_tcp_batches_with_octet_counting(listeners):
+    listener = listeners("tcp")
+    sink = SyslogSink("127.0.0.1", listener.port, "tcp", columns=COLUMNS, batch_size=100)
+    sink.send(make_events(250))
+    sink.close()
+
+    assert wait_for(lambda: len(listener.messages) == 250)
+    assert [m.rsplit('#', 1)[1] for m in listener.messages] == [str(i) for i in range(250)]
+    assert listener.connections == 1
+    assert sink.stats()["batches"] >= 3
+
+
+def test_slow_collector_spills_to_disk_and_delivers_in_order(listeners, tmp_path):
+    port = free_port()
+    sink = SyslogSink("127.0.0.1", port, "tcp", columns=COLUMNS, max_buffer=20, batch_size=10,
+                      spill_dir=str(tmp_path))
+    for start in range(0, 100, 10):
+        sink.send(make_events(10, start))
+    assert sink.stats()["spilled"] >= 80
+
+    listener = listeners("tcp", port)
+    assert wait_for(lambda: len(listener.messages) == 100, timeout=30)
+    sink.close()
+    assert [m.rsplit('#', 1)[1] for m in listener.messages] == [str(i) for i in range(100)]
+    assert sink.stats()["dropped"] == 0
+    assert not list(tmp_path.iterdir())  # The spill file is removed once drained
+
+
+def test_without_spill_dir_overflow_is_dropped_and_counted():
+    sink = SyslogSink("127.0.0.1", free_port(), "tcp", columns=COLUMNS, max_buffer=10)
+    sink.send(make_events(25))
+    assert wait_for(lambda: sink.stats()["errors"] >= 1)  # Nothing listens, so the sender is backing off
+    sink.close(timeout=0.1)
+
+    assert sink.stats()["dropped"] == 25  # 15 overflowed, 10 undelivered at close
+
+
+@pytest.mark.skipif(not shutil.which("openssl"), reason="needs openssl to create a test certificate")
+def test_tls(listeners, tmp_path):
+    pem = tmp_path / "collector.pem"
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+                    "-keyout", str(pem), "-out", str(pem)], check=True, capture_output=True)
+    listener = listeners("tls", certfile=str(pem))
+    sink = SyslogSink("127.0.0.1", listener.port, "tls", columns=COLUMNS, insecure=True)
+    sink.send(make_events(20))
+    sink.close()
+
+    assert wait_for(lambda: len(listener.messages) == 20)
+    assert RFC5424.match(listener.messages[0])
+
+
+def test_udp_drops_messages_that_fail_permanently(listeners):
+    listener = listeners("udp")
+    sink = SyslogSink("127.0.0.1", listener.port, "udp", columns=COLUMNS)
+    sink.send(make_events(1))
+    assert wait_for(lambda: len(listener.messages) == 1)
+
+    class RejectingSocket:
+        # Refuses one message the way the kernel does for a datagram it will never send
+        def __init__(self, sock):
+            self.sock = sock
+
+        def send(self, data):
+            if b"#2" in data:
+                raise OSError(errno.EMSGSIZE, "Message too long")
+            return self.sock.send(data)
+
+        def close(self):
+            self.sock.close()
+
+    with sink.lock:
+        sink.sock = RejectingSocket(sink.sock)
+        sink.send(make_events(4, start=1))
+
+    assert wait_for(lambda: len(listener.messages) == 4)
+    sink.close()
+    stats = sink.stats()
+    assert stats["dropped"] == 1 and stats["sent"] == 4 and stats["errors"] == 0
+    assert sorted(m.rsplit('#', 1)[1] for m in listener.messages) == ["0", "1", "3", "4"]